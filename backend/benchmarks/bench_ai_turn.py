@@ -0,0 +1,59 @@
+"""Time one AI turn on the scalar (per-unit) and NumPy (vectorized) paths.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ai_turn
+"""
+import random
+import time
+from models.game import GameState, Player, Unit
+from services import game_rules
+from services.spatial_index import get_spatial_index
+
+UNITS_PER_SIDE = [500, 2000, 5000, 10000]
+UNIT_TYPES = ["peasant", "soldier", "archer", "knight", "mage"]
+
+
+def make_game(units_per_side: int, seed: int) -> GameState:
+    rng = random.Random(seed)
+
+    def side(owner: str) -> Player:
+        return Player(
+            id=f"{owner}1",
+            name=owner,
+            resources={},
+            units=[
+                Unit(type=rng.choice(UNIT_TYPES), x=rng.randrange(20), y=rng.randrange(20),
+                     health=100, owner=owner)
+                for _ in range(units_per_side)
+            ],
+            buildings=[],
+        )
+
+    return GameState(player=side("player"), enemy=side("enemy"))
+
+
+def run_turn(units_per_side: int, vectorized: bool) -> float:
+    game_state = make_game(units_per_side, seed=units_per_side)
+    # Resident games already carry their spatial index
+    get_spatial_index(game_state)
+    threshold = game_rules.VECTORIZE_MIN_PAIRS
+    game_rules.VECTORIZE_MIN_PAIRS = 0 if vectorized else float("inf")
+    try:
+        started = time.perf_counter()
+        game_rules.ai_turn(game_state, random.Random(7))
+        return time.perf_counter() - started
+    finally:
+        game_rules.VECTORIZE_MIN_PAIRS = threshold
+
+
+def main() -> None:
+    print(f"{'units/side':>10} {'scalar ms':>10} {'numpy ms':>9} {'speedup':>8}")
+    for count in UNITS_PER_SIDE:
+        scalar = run_turn(count, vectorized=False)
+        vectorized = run_turn(count, vectorized=True)
+        print(f"{count:>10} {scalar * 1000:>10.1f} {vectorized * 1000:>9.1f} {scalar / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Time influence maps: a full rebuild vs syncing the units that moved.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_influence
+"""
+import random
+import time
+from models.game import GameState, Player, Unit
+from services.influence import InfluenceMap, get_influence
+from services.spatial_index import get_spatial_index
+
+UNITS_PER_SIDE = [500, 2000, 10000]
+MAP_SIZE = 64
+UNIT_TYPES = ["peasant", "soldier", "archer", "knight", "mage"]
+
+
+def make_game(units_per_side: int, seed: int) -> GameState:
+    rng = random.Random(seed)
+
+    def side(owner: str) -> Player:
+        return Player(
+            id=f"{owner}1",
+            name=owner,
+            resources={},
+            units=[
+                Unit(type=rng.choice(UNIT_TYPES), x=rng.randrange(MAP_SIZE), y=rng.randrange(MAP_SIZE),
+                     health=100, owner=owner)
+                for _ in range(units_per_side)
+            ],
+            buildings=[],
+        )
+
+    return GameState(player=side("player"), enemy=side("enemy"), map_size={"width": MAP_SIZE, "height": MAP_SIZE})
+
+
+def move_units(game_state: GameState, fraction: float, rng: random.Random) -> None:
+    """Step a share of the enemy units one tile, like an AI turn does"""
+    index = get_spatial_index(game_state)
+    for unit in game_state.enemy.units:
+        if rng.random() < fraction:
+            x = min(MAP_SIZE - 1, max(0, unit.x + rng.choice((-1, 0, 1))))
+            y = min(MAP_SIZE - 1, max(0, unit.y + rng.choice((-1, 0, 1))))
+            index.move("enemy", "units", unit, x, y)
+
+
+def timed_sync(game_state: GameState, fraction: float, rng: random.Random) -> float:
+    move_units(game_state, fraction, rng)
+    started = time.perf_counter()
+    get_influence(game_state)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    print(f"{'units/side':>10} {'rebuild ms':>11} {'sync 30% ms':>12} {'sync 10 units ms':>17}")
+    for count in UNITS_PER_SIDE:
+        game_state = make_game(count, seed=count)
+        rng = random.Random(count)
+        # Resident games already carry their spatial index
+        get_spatial_index(game_state)
+        started = time.perf_counter()
+        InfluenceMap(game_state)
+        rebuild = time.perf_counter() - started
+        get_influence(game_state)
+        most = timed_sync(game_state, 0.3, rng)
+        few = timed_sync(game_state, 10 / count, rng)
+        print(f"{count:>10} {rebuild * 1000:>11.2f} {most * 1000:>12.2f} {few * 1000:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare one shared flow field with per-unit A* searches for a group move.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pathfinding
+"""
+import random
+import time
+from models.game import GameState, Player, Unit, Building
+from services.pathfinding import Navigator
+
+MAP_SIZES = [20, 64, 128]
+GROUP_SIZES = [10, 100, 500]
+
+
+def make_game(size: int, group_size: int, rng: random.Random) -> GameState:
+    # Scatter buildings over a tenth of the map as obstacles
+    blocked = {(rng.randrange(size), rng.randrange(size)) for _ in range(size * size // 10)}
+    player = Player(
+        id="player1",
+        name="player",
+        resources={},
+        units=[
+            Unit(type="soldier", x=rng.randrange(size // 4), y=rng.randrange(size // 4),
+                 health=100, owner="player")
+            for _ in range(group_size)
+        ],
+        buildings=[Building(type="farm", x=x, y=y, health=200, owner="player") for x, y in blocked],
+    )
+    enemy = Player(id="enemy1", name="enemy", resources={}, units=[], buildings=[])
+    return GameState(player=player, enemy=enemy, map_size={"width": size, "height": size})
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'map':>5} {'units':>6} {'A* ms':>9} {'flow ms':>9} {'speedup':>8}")
+    for size in MAP_SIZES:
+        for group_size in GROUP_SIZES:
+            game_state = make_game(size, group_size, rng)
+            goal = (size - 1, size - 1)
+            navigator = Navigator(game_state)
+            navigator._blocked.discard(goal)
+
+            started = time.perf_counter()
+            for unit in game_state.player.units:
+                navigator.find_path((unit.x, unit.y), goal)
+            astar = time.perf_counter() - started
+
+            started = time.perf_counter()
+            navigator.invalidate()
+            navigator._blocked.discard(goal)
+            field = navigator.flow_field(goal)
+            for unit in game_state.player.units:
+                field.next_step((unit.x, unit.y), navigator)
+            flow = time.perf_counter() - started
+
+            print(f"{size:>5} {group_size:>6} {astar * 1000:>9.2f} {flow * 1000:>9.2f} {astar / flow:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare bytes written per action: full replace_one vs tracked deltas.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_persistence
+"""
+from typing import Callable, List, Tuple
+from datetime import datetime
+import bson
+from models.game import GameState, Player, Unit, Building
+from services.game_delta import build_update_operations, full_replace_operation
+
+ARMY_SIZES = [10, 100, 1000, 5000]
+
+
+def make_game(army_size: int) -> GameState:
+    def side(owner: str, offset: int) -> Player:
+        return Player(
+            id=f"{owner}1",
+            name=owner,
+            resources={"gold": 500, "wood": 300, "food": 100},
+            units=[
+                Unit(id=f"{owner}_unit{i}", type="soldier", x=i % 20, y=offset + i // 20,
+                     health=100, owner=owner)
+                for i in range(army_size)
+            ],
+            buildings=[
+                Building(id=f"{owner}_building{i}", type="farm", x=i % 20, y=offset,
+                         health=200, owner=owner)
+                for i in range(army_size // 10 + 1)
+            ],
+        )
+
+    game_state = GameState(player=side("player", 0), enemy=side("enemy", 10))
+    game_state.mark_clean()
+    return game_state
+
+
+def move_two_units(game_state: GameState) -> None:
+    for unit in game_state.player.units[:2]:
+        unit.x = 3
+        unit.y = 4
+
+
+def attack_and_kill(game_state: GameState) -> None:
+    game_state.enemy.units[0].health = 0
+    game_state.enemy.units = [u for u in game_state.enemy.units if u.health > 0]
+
+
+def build_farm(game_state: GameState) -> None:
+    game_state.player.resources["gold"] -= 100
+    game_state.player.resources["wood"] -= 100
+    game_state.player.buildings.append(
+        Building(type="farm", x=1, y=1, health=200, owner="player")
+    )
+
+
+ACTIONS: List[Tuple[str, Callable[[GameState], None]]] = [
+    ("move", move_two_units),
+    ("attack", attack_and_kill),
+    ("build", build_farm),
+]
+
+
+def operation_size(operation) -> int:
+    """BSON bytes of the command payload sent for one write operation"""
+    payload = dict(operation._doc)
+    if getattr(operation, "_array_filters", None):
+        payload["arrayFilters"] = operation._array_filters
+    return len(bson.encode({"q": operation._filter, "u": payload}))
+
+
+def main() -> None:
+    print(f"{'army':>6} {'action':>8} {'replace B':>11} {'delta B':>9} {'ratio':>8}")
+    for army_size in ARMY_SIZES:
+        for name, action in ACTIONS:
+            game_state = make_game(army_size)
+            action(game_state)
+            # update_game always stamps the document
+            game_state.updated_at = datetime.utcnow()
+            delta = sum(operation_size(op) for op in build_update_operations(game_state))
+            full = operation_size(full_replace_operation(game_state))
+            print(f"{army_size:>6} {name:>8} {full:>11} {delta:>9} {full / delta:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Play headless bot-vs-AI matches across a process pool (see services.self_play).
+
+Every strategy plays the same seeds, so win rates and game lengths are
+compared on identical games; the same seed always replays the same match.
+Reports per-strategy balance figures and simulated ticks per second, the
+throughput of the rules, income, AI and pathfinding core.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_self_play --matches 1000
+    python -m benchmarks.bench_self_play --strategy knight --workers 1 --json knight.json
+"""
+from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import statistics
+import time
+from services.self_play import STRATEGIES, MatchResult, play_match
+
+TICK_RATE = 10.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(results: List[MatchResult]) -> Dict[str, Any]:
+    lengths = [r.ticks / TICK_RATE for r in results]
+    cpu = sum(r.cpu_seconds for r in results)
+    return {
+        "matches": len(results),
+        "win_rate": {
+            side: sum(r.winner == side for r in results) / len(results)
+            for side in ("player", "enemy", "draw")
+        },
+        "length_s": {
+            "mean": statistics.fmean(lengths),
+            "p50": percentile(lengths, 0.5),
+            "p95": percentile(lengths, 0.95),
+        },
+        "events_per_match": statistics.fmean(r.events for r in results),
+        "ticks_per_cpu_second": sum(r.ticks for r in results) / cpu if cpu else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=1000, help="matches per strategy")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES,
+                        help="unit type the bot trains; repeat for several (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--max-ticks", type=int, default=6000, help="ticks before a match is a draw")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes to play on")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    strategies = args.strategy or list(STRATEGIES)
+    seeds = [args.seed + i for i in range(args.matches)] * len(strategies)
+    plans = [s for s in strategies for _ in range(args.matches)]
+    max_ticks = [args.max_ticks] * len(seeds)
+
+    started = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers) as pool:
+            chunksize = max(1, len(seeds) // (args.workers * 8))
+            results = list(pool.map(play_match, seeds, plans, max_ticks, chunksize=chunksize))
+    else:
+        results = [play_match(*match) for match in zip(seeds, plans, max_ticks)]
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "scenario": {"matches": args.matches, "seed": args.seed, "max_ticks": args.max_ticks,
+                     "workers": args.workers, "tick_rate": TICK_RATE},
+        "strategies": {s: summarize([r for r in results if r.strategy == s]) for s in strategies},
+        "elapsed_s": elapsed,
+        "ticks_per_second": sum(r.ticks for r in results) / elapsed,
+    }
+
+    print(f"{'strategy':>9} {'matches':>8} {'player':>7} {'enemy':>6} {'draw':>5} "
+          f"{'mean s':>7} {'p95 s':>6} {'events':>7} {'ticks/cpu-s':>12}")
+    for strategy, summary in report["strategies"].items():
+        rates = summary["win_rate"]
+        print(f"{strategy:>9} {summary['matches']:>8} {rates['player']:>7.1%} {rates['enemy']:>6.1%} "
+              f"{rates['draw']:>5.1%} {summary['length_s']['mean']:>7.1f} {summary['length_s']['p95']:>6.1f} "
+              f"{summary['events_per_match']:>7.1f} {summary['ticks_per_cpu_second']:>12.0f}")
+    print(f"{len(results)} matches in {elapsed:.1f}s on {args.workers} workers: "
+          f"{report['ticks_per_second']:.0f} simulated ticks/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
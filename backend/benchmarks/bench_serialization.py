@@ -0,0 +1,100 @@
+"""Serialization CPU of one game response and one game load.
+
+Compares FastAPI's response_model path (dump, re-validate, encode, then
+json.dumps) with serializing the model once, and loading a stored
+document through validation with and without nested model_construct.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization
+"""
+from typing import Any, Callable, Dict, List
+import time
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models.game import GameState, Player, Unit, Building
+
+ARMY_SIZES = [10, 100, 1000]
+RESPONSE_FIELD = create_response_field(name="Response_GameState", type_=GameState)
+
+
+def make_game(army_size: int) -> GameState:
+    def side(owner: str) -> Player:
+        return Player(
+            id=f"{owner}1",
+            name=owner,
+            resources={"gold": 500, "wood": 300, "food": 100},
+            units=[
+                Unit(id=f"{owner}_unit{i}", type="soldier", x=i % 20, y=i // 20, health=100, owner=owner)
+                for i in range(army_size)
+            ],
+            buildings=[
+                Building(id=f"{owner}_building{i}", type="farm", x=i % 20, y=19, health=200, owner=owner)
+                for i in range(army_size // 10 + 1)
+            ],
+        )
+
+    return GameState(player=side("player"), enemy=side("enemy"))
+
+
+def serialized_content(game_state: GameState) -> Any:
+    # serialize_response never awaits for a coroutine endpoint; step it
+    # directly instead of paying for an event loop per call
+    coroutine = serialize_response(field=RESPONSE_FIELD, response_content=game_state)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def response_model_path(game_state: GameState) -> bytes:
+    return JSONResponse(serialized_content(game_state)).body
+
+
+def response_model_orjson_path(game_state: GameState) -> bytes:
+    return ORJSONResponse(serialized_content(game_state)).body
+
+
+def direct_path(game_state: GameState) -> bytes:
+    return game_state.model_dump_json().encode()
+
+
+def constructed(doc: Dict[str, Any]) -> GameState:
+    def player(data: Dict[str, Any]) -> Player:
+        return Player.model_construct(**{
+            **data,
+            "units": [Unit.model_construct(**u) for u in data["units"]],
+            "buildings": [Building.model_construct(**b) for b in data["buildings"]],
+        })
+
+    return GameState.model_construct(**{**doc, "player": player(doc["player"]), "enemy": player(doc["enemy"])})
+
+
+def per_call_us(fn: Callable[[], Any], budget_s: float = 0.5) -> float:
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < budget_s:
+        fn()
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    columns: List[str] = ["response_model", "+orjson", "direct", "validate", "construct"]
+    print(f"{'army':>6} " + " ".join(f"{c + ' us':>16}" for c in columns))
+    for army_size in ARMY_SIZES:
+        game_state = make_game(army_size)
+        doc = game_state.model_dump()
+        timings = [
+            per_call_us(lambda: response_model_path(game_state)),
+            per_call_us(lambda: response_model_orjson_path(game_state)),
+            per_call_us(lambda: direct_path(game_state)),
+            per_call_us(lambda: GameState(**doc)),
+            per_call_us(lambda: constructed(doc)),
+        ]
+        print(f"{army_size:>6} " + " ".join(f"{t:>16.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
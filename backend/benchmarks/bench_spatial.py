@@ -0,0 +1,110 @@
+"""Compare linear scans with the spatial grid index.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_spatial
+"""
+from typing import Callable, List
+import random
+import time
+from models.game import GameState, Player, Unit, Building
+from services.spatial_index import GameSpatialIndex
+
+ENTITIES_PER_SIDE = [1000, 10000]
+QUERIES = 500
+
+
+def make_game(entities_per_side: int, rng: random.Random) -> GameState:
+    # Keep density comparable to the default 20x20 map with a few dozen entities
+    size = max(20, int((entities_per_side * 8) ** 0.5))
+
+    def side(owner: str) -> Player:
+        return Player(
+            id=f"{owner}1",
+            name=owner,
+            resources={},
+            units=[
+                Unit(type="soldier", x=rng.randrange(size), y=rng.randrange(size),
+                     health=100, owner=owner)
+                for _ in range(entities_per_side)
+            ],
+            buildings=[
+                Building(type="farm", x=rng.randrange(size), y=rng.randrange(size),
+                         health=200, owner=owner)
+                for _ in range(entities_per_side // 10)
+            ],
+        )
+
+    return GameState(player=side("player"), enemy=side("enemy"),
+                     map_size={"width": size, "height": size})
+
+
+def timed(fn: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'entities':>9} {'query':>10} {'linear ms':>10} {'grid ms':>9} {'speedup':>8}")
+    for count in ENTITIES_PER_SIDE:
+        game_state = make_game(count, rng)
+        size = game_state.map_size["width"]
+        points = [(rng.randrange(size), rng.randrange(size)) for _ in range(QUERIES)]
+        everything = (game_state.player.units + game_state.player.buildings +
+                      game_state.enemy.units + game_state.enemy.buildings)
+
+        build_time = timed(lambda: GameSpatialIndex(game_state))
+        index = GameSpatialIndex(game_state)
+        player_units = index.layer("player", "units")
+        print(f"{count:>9} {'build':>10} {'-':>10} {build_time * 1000:>9.2f} {'-':>8}")
+
+        results: List[tuple] = []
+
+        def linear_occupied():
+            for x, y in points:
+                any(e.x == x and e.y == y for e in everything)
+
+        def grid_occupied():
+            for x, y in points:
+                index.occupied(x, y)
+
+        results.append(("occupied", timed(linear_occupied), timed(grid_occupied)))
+
+        def linear_nearest():
+            for x, y in points:
+                min(game_state.player.units, key=lambda u: abs(u.x - x) + abs(u.y - y))
+
+        def grid_nearest():
+            for x, y in points:
+                player_units.nearest(x, y)
+
+        results.append(("nearest", timed(linear_nearest), timed(grid_nearest)))
+
+        def linear_k_nearest():
+            for x, y in points:
+                sorted(game_state.player.units, key=lambda u: abs(u.x - x) + abs(u.y - y))[:8]
+
+        def grid_k_nearest():
+            for x, y in points:
+                player_units.nearest(x, y, k=8)
+
+        results.append(("8-nearest", timed(linear_k_nearest), timed(grid_k_nearest)))
+
+        def linear_in_range():
+            for x, y in points:
+                [u for u in game_state.player.units if abs(u.x - x) + abs(u.y - y) <= 3]
+
+        def grid_in_range():
+            for x, y in points:
+                player_units.in_range(x, y, 3)
+
+        results.append(("in_range", timed(linear_in_range), timed(grid_in_range)))
+
+        for name, linear, grid in results:
+            print(f"{count:>9} {name:>10} {linear * 1000:>10.2f} {grid * 1000:>9.2f} {linear / grid:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""Load test of the /api/games endpoints, in process over ASGI.
+
+Plays scripted sessions (create a game, then a mix of move, attack,
+build, produce, polling and the legacy resources/ai-turn calls) for many
+concurrent games against the real app, with the simulation loop running.
+Reports p50/p95/p99 latency per route, throughput and storage operations
+per action.
+
+Load generator and server share one event loop, so latency includes
+waiting behind other sessions' work: compare runs with each other, not
+with production numbers. Routes that hand off to the game actors wait
+for the loop to come round, while reads served from the cache never
+yield and look faster than they would against a remote Mongo.
+
+Storage is mongomock-motor unless --mongo-url points at a real server or
+--storage picks the in-memory or SQLite backend. mongomock does not
+implement arrayFilters, so there the game cache writes whole documents
+instead of deltas. Storage operations are Mongo commands, or repository
+calls for the embedded backends.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --games 500 --actions 40
+    python -m benchmarks.load_test --storage memory
+    python -m benchmarks.load_test --save-baseline   # record the current numbers
+    python -m benchmarks.load_test --check           # exit 1 on regression
+
+Baselines live in benchmarks/baselines/, one file per scenario. Absolute
+latencies depend on the machine, so every run first times a fixed slice
+of game work (load, serialize and rule a game) and baselines only keep
+latency and throughput as multiples of that calibration, plus storage
+operation counts. They carry over between machines roughly; when a check
+fails on new hardware for no code reason, rerun --save-baseline there.
+"""
+from typing import Dict, List, Optional
+from collections import Counter, defaultdict
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+# Games serialized, reloaded and ruled per calibration round; the best of
+# many short rounds is steadier than one long one
+CALIBRATION_GAMES = 50
+
+# Relative weights of the actions in a session, roughly a player clicking
+# around while the client polls the game
+ACTION_WEIGHTS = {
+    "get": 30,
+    "move": 25,
+    "attack": 10,
+    "build": 8,
+    "produce": 8,
+    "resources": 10,
+    "ai_turn": 5,
+    "pending": 4,
+}
+
+MONGO_METHODS = [
+    "insert_one", "insert_many", "find", "find_one", "find_one_and_update", "update_one",
+    "update_many", "replace_one", "bulk_write", "delete_many", "count_documents",
+]
+
+
+def _count_mongomock_ops(ops: Counter) -> None:
+    """Count every collection call made through mongomock"""
+    import mongomock.collection
+
+    for name in MONGO_METHODS:
+        original = getattr(mongomock.collection.Collection, name)
+
+        def counted(self, *args, _original=original, _name=name, **kwargs):
+            ops[_name] += 1
+            return _original(self, *args, **kwargs)
+
+        setattr(mongomock.collection.Collection, name, counted)
+
+
+def _count_mongo_commands(ops: Counter) -> None:
+    """Count every command sent to a real server"""
+    from pymongo import monitoring
+
+    class CommandCounter(monitoring.CommandListener):
+        def started(self, event):
+            ops[event.command_name] += 1
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    monitoring.register(CommandCounter())
+
+
+def _count_repository_calls(storage, ops: Counter) -> None:
+    """Count every call into the repositories of an embedded backend"""
+    for name in ("games", "productions", "actions", "snapshots"):
+        repository = getattr(storage, name)
+        for method in [m for m in dir(repository) if not m.startswith("_")]:
+            original = getattr(repository, method)
+            if not asyncio.iscoroutinefunction(original):
+                continue
+
+            async def counted(*args, _original=original, _name=f"{name}.{method}", **kwargs):
+                ops[_name] += 1
+                return await _original(*args, **kwargs)
+
+            setattr(repository, method, counted)
+
+
+def load_app(storage: str, mongo_url: Optional[str], ops: Counter):
+    """Import the server against the chosen storage, counting its operations"""
+    os.environ.setdefault("DB_NAME", "rts_load_test")
+    if storage != "mongomock":
+        os.environ["STORAGE_BACKEND"] = storage
+        if storage == "sqlite":
+            os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "load_test.sqlite3")
+        import server
+        _count_repository_calls(server.storage, ops)
+    elif mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+        _count_mongo_commands(ops)
+    else:
+        try:
+            import mongomock_motor
+        except ImportError:
+            sys.exit("mongomock-motor is required without --mongo-url (pip install mongomock-motor)")
+        import motor.motor_asyncio
+
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+        _count_mongomock_ops(ops)
+
+    import server
+    if storage == "mongomock" and not mongo_url:
+        from storage import mongo
+        mongo.build_update_operations = lambda state: [mongo.full_replace_operation(state)]
+    # Keep the report readable; warnings and errors still show
+    logging.getLogger().setLevel(logging.WARNING)
+    return server
+
+
+def calibrate(rounds: int = 20) -> float:
+    """Milliseconds this machine takes for a fixed slice of game work, best of `rounds`"""
+    from models.game import GameState
+    from services.game_rules import ai_turn, new_game
+
+    best = None
+    for _ in range(rounds):
+        rng = random.Random(0)
+        started = time.perf_counter()
+        for _ in range(CALIBRATION_GAMES):
+            game_state = GameState.model_validate_json(new_game("calibration", seed=0).model_dump_json())
+            ai_turn(game_state, rng)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    @property
+    def actions(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def play_session(client, recorder: Recorder, rng: random.Random, actions: int) -> None:
+    async def call(route: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        recorder.add(route, time.perf_counter() - started, response.status_code < 400)
+        return response
+
+    response = await call("create", "POST", "/api/games/", json={"player_name": "load"})
+    if response.status_code != 200:
+        return
+    game = response.json()
+    game_id = game["id"]
+    base = f"/api/games/{game_id}"
+
+    names, weights = zip(*ACTION_WEIGHTS.items())
+    for _ in range(actions):
+        action = rng.choices(names, weights)[0]
+        units = [u["id"] for u in game["player"]["units"]]
+        enemies = [u["id"] for u in game["enemy"]["units"] + game["enemy"]["buildings"]]
+        if action == "get":
+            response = await call("get", "GET", base)
+        elif action == "move" and units:
+            response = await call("move", "POST", f"{base}/move", json={
+                "unit_ids": rng.sample(units, min(len(units), rng.randint(1, 3))),
+                "target_x": rng.randrange(20),
+                "target_y": rng.randrange(20),
+            })
+        elif action == "attack" and units and enemies:
+            response = await call("attack", "POST", f"{base}/attack", json={
+                "attacker_id": rng.choice(units), "target_id": rng.choice(enemies),
+            })
+        elif action == "build":
+            response = await call("build", "POST", f"{base}/build", json={
+                "building_type": rng.choice(["farm", "barracks"]),
+                "x": rng.randrange(20),
+                "y": rng.randrange(20),
+            })
+        elif action == "produce":
+            response = await call("produce", "POST", f"{base}/produce", json={
+                "building_id": "building1", "unit_type": "peasant",
+            })
+        elif action == "resources":
+            response = await call("resources", "POST", f"{base}/resources")
+        elif action == "ai_turn":
+            response = await call("ai_turn", "POST", f"{base}/ai-turn")
+        elif action == "pending":
+            response = await call("pending", "GET", f"{base}/productions")
+        else:
+            continue
+        # Keep the client's view current, as the frontend does
+        if response.status_code == 200 and "player" in response.json():
+            game = response.json()
+
+
+async def run(args, server, ops: Counter) -> dict:
+    import httpx
+
+    calibration_ms = calibrate()
+    await server.startup_event()
+    recorder = Recorder()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            ops_before = sum(ops.values())
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                play_session(client, recorder, random.Random(args.seed + i), args.actions)
+                for i in range(args.games)
+            ))
+            elapsed = time.perf_counter() - started
+            request_ops = sum(ops.values()) - ops_before
+    finally:
+        await server.shutdown_db_client()
+    # Calibrated on both sides of the run so a passing slowdown of the
+    # machine on one side does not skew the ratios
+    calibration_ms = min(calibration_ms, calibrate())
+
+    routes = {}
+    for route, values in sorted(recorder.latencies.items()):
+        routes[route] = {
+            "count": len(values),
+            "errors": recorder.errors[route],
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+        routes[route]["p95_rel"] = routes[route]["p95_ms"] / calibration_ms
+    throughput = recorder.actions / elapsed
+    return {
+        "scenario": {"games": args.games, "actions": args.actions, "seed": args.seed,
+                     "storage": _storage_name(args)},
+        "elapsed_s": elapsed,
+        "calibration_ms": calibration_ms,
+        "throughput_rps": throughput,
+        # Requests served in the time of one calibration run
+        "throughput_rel": throughput * calibration_ms / 1000,
+        # Includes background flushes and simulation work during the run
+        "storage_ops_per_action": request_ops / recorder.actions,
+        "storage_ops": dict(ops),
+        "routes": routes,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'route':>10} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in report["routes"].items():
+        print(f"{route:>10} {stats['count']:>7} {stats['errors']:>7} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    print(f"throughput: {report['throughput_rps']:.0f} requests/s over {report['elapsed_s']:.1f}s")
+    print(f"storage ops per action: {report['storage_ops_per_action']:.2f}")
+    print(f"calibration: {report['calibration_ms']:.1f}ms")
+
+
+def baseline_of(report: dict) -> dict:
+    """The machine-independent part of a report"""
+    return {
+        "scenario": report["scenario"],
+        "throughput_rel": report["throughput_rel"],
+        "storage_ops_per_action": report["storage_ops_per_action"],
+        "storage_ops": report["storage_ops"],
+        "routes": {
+            route: {"count": stats["count"], "errors": stats["errors"], "p95_rel": stats["p95_rel"]}
+            for route, stats in report["routes"].items()
+        },
+    }
+
+
+def check_regressions(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Relative latency, throughput and storage op counts worse than the baseline by more than `tolerance`"""
+    failures = []
+    limit = 1 + tolerance
+    for route, stats in report["routes"].items():
+        base = baseline["routes"].get(route)
+        if base and stats["p95_rel"] > base["p95_rel"] * limit:
+            failures.append(
+                f"{route} p95 {stats['p95_rel']:.3f}x calibration > baseline {base['p95_rel']:.3f}x"
+            )
+    if report["throughput_rel"] < baseline["throughput_rel"] / limit:
+        failures.append(
+            f"throughput {report['throughput_rel']:.1f} per calibration < baseline {baseline['throughput_rel']:.1f}"
+        )
+    if report["storage_ops_per_action"] > baseline["storage_ops_per_action"] * limit:
+        failures.append(
+            f"storage ops/action {report['storage_ops_per_action']:.2f} > "
+            f"baseline {baseline['storage_ops_per_action']:.2f}"
+        )
+    return failures
+
+
+def _storage_name(args) -> str:
+    if args.storage == "mongomock" and args.mongo_url:
+        return "mongo"
+    return args.storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--games", type=int, default=200, help="concurrent game sessions")
+    parser.add_argument("--actions", type=int, default=25, help="actions per session after create")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--storage", choices=["mongomock", "memory", "sqlite"], default="mongomock")
+    parser.add_argument("--mongo-url", help="real Mongo instead of mongomock-motor")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="fail if worse than the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    ops: Counter = Counter()
+    server = load_app(args.storage, args.mongo_url, ops)
+    report = asyncio.run(run(args, server, ops))
+    print_report(report)
+
+    scenario = report["scenario"]
+    baseline_path = BASELINE_DIR / f"load_{scenario['storage']}_{scenario['games']}x{scenario['actions']}.json"
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline_of(report), indent=2, sort_keys=True) + "\n")
+        print(f"baseline saved to {baseline_path}")
+    if args.check:
+        if not baseline_path.exists():
+            sys.exit(f"no baseline at {baseline_path}; run with --save-baseline first")
+        baseline = json.loads(baseline_path.read_text())
+        if "throughput_rel" not in baseline:
+            sys.exit(f"{baseline_path} holds absolute numbers; run with --save-baseline to record ratios")
+        failures = check_regressions(report, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Dict, Optional, Set, Any, Tuple
 from datetime import datetime
+import random
 import uuid
 
-class Unit(BaseModel):
+class TrackedModel(BaseModel):
+    """Model that records which fields were assigned since it was last persisted.
+
+    Assignments are recorded in pydantic's own fields-set, which is free at
+    validation time; a private attribute would cost a Python call for each
+    of the hundreds of entities built on every load. Players and games
+    clear it for their whole tree once built, so only later assignments
+    count as changes.
+    """
+
+    def changed_fields(self) -> Set[str]:
+        return self.__pydantic_fields_set__
+
+    def mark_clean(self) -> None:
+        self.__pydantic_fields_set__.clear()
+
+class Unit(TrackedModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     type: str
     x: int
@@ -11,8 +28,11 @@ class Unit(BaseModel):
     health: int
     selected: bool = False
     owner: str  # 'player' or 'enemy'
+    # Destination of the current move order, walked by the simulation
+    target_x: Optional[int] = None
+    target_y: Optional[int] = None
 
-class Building(BaseModel):
+class Building(TrackedModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     type: str
     x: int
@@ -21,14 +41,80 @@ class Building(BaseModel):
     selected: bool = False
     owner: str  # 'player' or 'enemy'
 
-class Player(BaseModel):
+class Player(TrackedModel):
     id: str
     name: str
     resources: Dict[str, int]
     units: List[Unit]
     buildings: List[Building]
+    # Start of the first income round not yet credited (see services.economy)
+    last_update: Optional[datetime] = None
+
+    # What the stored document looked like at the last persist
+    _persisted_unit_ids: Set[str] = PrivateAttr(default_factory=set)
+    _persisted_building_ids: Set[str] = PrivateAttr(default_factory=set)
+    _persisted_resources: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    # id -> entity lookups; lists must grow through add_unit/add_building,
+    # reassigning `units`/`buildings` rebuilds them
+    _units_by_id: Dict[str, Unit] = PrivateAttr(default_factory=dict)
+    _buildings_by_id: Dict[str, Building] = PrivateAttr(default_factory=dict)
+    # Income per round, derived from the buildings on first use and kept
+    # current by services.economy; reassigning `buildings` resets it
+    _income: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._units_by_id = {u.id: u for u in self.units}
+        self._buildings_by_id = {b.id: b for b in self.buildings}
+        self.mark_clean()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == "units":
+            self._units_by_id = {u.id: u for u in value}
+        elif name == "buildings":
+            self._buildings_by_id = {b.id: b for b in value}
+            self._income = None
+
+    def get_unit(self, unit_id: str) -> Optional[Unit]:
+        return self._units_by_id.get(unit_id)
+
+    def get_building(self, building_id: str) -> Optional[Building]:
+        return self._buildings_by_id.get(building_id)
+
+    def add_unit(self, unit: Unit) -> None:
+        self.units.append(unit)
+        self._units_by_id[unit.id] = unit
+
+    def add_building(self, building: Building) -> None:
+        self.buildings.append(building)
+        self._buildings_by_id[building.id] = building
+
+    def _snapshot(self) -> None:
+        self._persisted_unit_ids = {u.id for u in self.units}
+        self._persisted_building_ids = {b.id for b in self.buildings}
+        self._persisted_resources = dict(self.resources)
+
+    def persisted_unit_ids(self) -> Set[str]:
+        return self._persisted_unit_ids
+
+    def persisted_building_ids(self) -> Set[str]:
+        return self._persisted_building_ids
 
-class GameState(BaseModel):
+    def changed_resources(self) -> Dict[str, int]:
+        """Resources whose amount differs from the stored document"""
+        return {
+            resource: amount for resource, amount in self.resources.items()
+            if self._persisted_resources.get(resource) != amount
+        }
+
+    def mark_clean(self) -> None:
+        super().mark_clean()
+        for entity in self.units + self.buildings:
+            entity.mark_clean()
+        self._snapshot()
+
+class GameState(TrackedModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     player: Player
     enemy: Player
@@ -38,16 +124,46 @@ class GameState(BaseModel):
     map_size: Dict[str, int] = {"width": 20, "height": 20}
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Seed of the per-event AI random streams and the last applied event
+    # number (see services.event_store)
+    seed: int = Field(default_factory=lambda: random.getrandbits(32))
+    event_seq: int = 0
+
+    # Derived in-memory structures, never persisted (see services.spatial_index,
+    # services.pathfinding, services.influence and services.visibility)
+    _spatial_index: Any = PrivateAttr(default=None)
+    _navigator: Any = PrivateAttr(default=None)
+    _influence: Any = PrivateAttr(default=None)
+    _visibility: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        # Games stored before seed and event_seq existed get them defaulted
+        # here; they stay changed so the first write stores them, or the
+        # seed would be drawn again on every load
+        defaulted = {"seed", "event_seq"} - self.__pydantic_fields_set__
+        # Players cleaned themselves when they were built
+        super().mark_clean()
+        self.__pydantic_fields_set__.update(defaulted)
+
+    def mark_clean(self) -> None:
+        super().mark_clean()
+        self.player.mark_clean()
+        self.enemy.mark_clean()
 
 class GameAction(BaseModel):
     game_id: str
-    action_type: str  # 'move', 'attack', 'build', 'produce'
+    # 'move', 'attack', 'build', 'produce', 'spawn', 'resources', 'ai_turn', 'advance'
+    action_type: str
+    seq: Optional[int] = None  # position in the game's event stream
     unit_id: Optional[str] = None
+    unit_ids: Optional[List[str]] = None  # 'move'
+    unit_type: Optional[str] = None  # 'produce', 'spawn'
     building_id: Optional[str] = None
     target_x: Optional[int] = None
     target_y: Optional[int] = None
     target_id: Optional[str] = None
     build_type: Optional[str] = None
+    moves: Optional[List[Tuple[str, int, int, bool]]] = None  # 'advance': unit id, x, y, arrived
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class UnitProduction(BaseModel):
@@ -60,18 +176,42 @@ class UnitProduction(BaseModel):
     completed: bool = False
 
 # Request/Response Models
+class GameSummary(BaseModel):
+    id: str
+    player_name: str
+    game_status: str
+    updated_at: datetime
+
+class GameSummaryPage(BaseModel):
+    games: List[GameSummary]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
 class CreateGameRequest(BaseModel):
     player_name: str
 
 class GameActionRequest(BaseModel):
-    action_type: str
+    action_type: str  # 'move', 'attack', 'build', 'produce'
     unit_id: Optional[str] = None
+    unit_ids: Optional[List[str]] = None  # 'move' with several units
+    unit_type: Optional[str] = None  # 'produce'
     building_id: Optional[str] = None
     target_x: Optional[int] = None
     target_y: Optional[int] = None
     target_id: Optional[str] = None
     build_type: Optional[str] = None
 
+class CommandBatchRequest(BaseModel):
+    commands: List[GameActionRequest] = Field(..., min_length=1, max_length=100)
+
+class CommandResult(BaseModel):
+    ok: bool
+    error: Optional[str] = None
+    production: Optional[UnitProduction] = None  # 'produce'
+
+class CommandBatchResult(BaseModel):
+    results: List[CommandResult]  # one per command, in order
+    game: GameState  # state after the whole batch
+
 class MoveUnitRequest(BaseModel):
     unit_ids: List[str]
     target_x: int
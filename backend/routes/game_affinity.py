@@ -0,0 +1,72 @@
+from typing import Optional
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from services.game_ownership import GameOwnership
+import httpx
+import re
+
+# /api/games/{game_id}/... ; other segments under /api/games are not games
+GAME_PATH = re.compile(r"^/api/games/(?P<game_id>[^/]+)")
+NON_GAME_SEGMENTS = {"summaries"}
+
+# Set on forwarded requests so two workers never bounce a request between them
+FORWARDED_HEADER = "x-rts-forwarded-by"
+
+# Hop-by-hop headers are not passed through the proxy
+HOP_HEADERS = {
+    "connection", "keep-alive", "transfer-encoding", "upgrade", "host", "content-length", "content-encoding"
+}
+
+
+class GameAffinityMiddleware(BaseHTTPMiddleware):
+    """Send each game request to the worker that owns the game.
+
+    Requests for a game this worker owns (or can take) run here. Others are
+    answered with a 307 to the owner (`mode="redirect"`) or proxied to it
+    (`mode="forward"`). WebSocket connections check ownership in the route.
+    """
+
+    def __init__(self, app, ownership: GameOwnership, mode: str = "redirect"):
+        super().__init__(app)
+        self.ownership = ownership
+        self.mode = mode
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        match = GAME_PATH.match(request.url.path)
+        if not match or match["game_id"] in NON_GAME_SEGMENTS:
+            return await call_next(request)
+
+        owner_url = await self.ownership.ensure(match["game_id"])
+        if owner_url is None:
+            return await call_next(request)
+        if not owner_url or request.headers.get(FORWARDED_HEADER):
+            # Owner unreachable, or ownership moved while forwarding
+            return JSONResponse(
+                {"detail": "Game is owned by another worker"}, status_code=503, headers={"Retry-After": "1"}
+            )
+
+        target = owner_url.rstrip("/") + request.url.path
+        if request.url.query:
+            target += "?" + request.url.query
+        if self.mode == "forward":
+            return await self._forward(request, target)
+        return RedirectResponse(target, status_code=307)
+
+    async def _forward(self, request: Request, target: str) -> Response:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_HEADERS}
+        headers[FORWARDED_HEADER] = self.ownership.worker_id
+        try:
+            upstream = await self._client.request(
+                request.method, target, headers=headers, content=await request.body()
+            )
+        except httpx.HTTPError as e:
+            return JSONResponse({"detail": f"Owner worker unreachable: {e}"}, status_code=502)
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() not in HOP_HEADERS},
+        )
@@ -1,22 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import List
-from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter
+from typing import Any, List, Optional
 from models.game import (
-    GameState, GameAction, UnitProduction,
-    CreateGameRequest, GameActionRequest, MoveUnitRequest, 
+    GameState, UnitProduction, GameSummaryPage,
+    CreateGameRequest, GameActionRequest, CommandBatchRequest, CommandBatchResult, MoveUnitRequest, 
     AttackRequest, BuildBuildingRequest, ProduceUnitRequest
 )
 from services.game_service import GameService
+from services.game_cache import GameStateCache
+from services.production_scheduler import ProductionScheduler
+from services.game_actor import GameActorRegistry
+from services.event_store import EventStore
+from services.game_ownership import GameOwnership
+from services.archiver import GameArchiver
+from services.state_stream import StateStreamHub, Subscription, encode, decode
+from services.visibility import visible_state
+from storage.base import Storage
 import asyncio
+import json
 
 router = APIRouter(prefix="/games", tags=["games"])
 
-# Global db variable will be set in server.py
-db = None
+# Global storage, cache, scheduler, stream, actor, event store, ownership and archiver variables will be set in server.py
+storage: Optional[Storage] = None
+game_cache: Optional[GameStateCache] = None
+production_scheduler: Optional[ProductionScheduler] = None
+state_stream: Optional[StateStreamHub] = None
+game_actors: Optional[GameActorRegistry] = None
+event_store: Optional[EventStore] = None
+game_ownership: Optional[GameOwnership] = None
+game_archiver: Optional[GameArchiver] = None
+# Hide enemy entities outside the player's sight (see services.visibility)
+fog_of_war: bool = True
 
 async def get_game_service() -> GameService:
-    return GameService(db)
+    return GameService(storage, game_cache, production_scheduler, game_actors, event_store, game_archiver)
+
+# Route results are models the service built, so they are serialized once
+# by pydantic instead of going through FastAPI's response_model pass (dump,
+# re-validate, encode, json.dumps). response_model still documents them.
+GAME = TypeAdapter(GameState)
+GAME_LIST = TypeAdapter(List[GameState])
+GAME_SUMMARY_PAGE = TypeAdapter(GameSummaryPage)
+PRODUCTION = TypeAdapter(UnitProduction)
+PRODUCTION_LIST = TypeAdapter(List[UnitProduction])
+COMMAND_BATCH_RESULT = TypeAdapter(CommandBatchResult)
+
+def trusted_response(adapter: TypeAdapter, value: Any) -> Response:
+    return Response(adapter.dump_json(value), media_type="application/json")
+
+def player_view(game_state: GameState) -> GameState:
+    """The game as the player may see it"""
+    return visible_state(game_state) if fog_of_war else game_state
 
 @router.post("/", response_model=GameState)
 async def create_game(
@@ -26,7 +61,10 @@ async def create_game(
     """Create a new game session"""
     try:
         game_state = await game_service.create_game(request.player_name)
-        return game_state
+        if game_ownership is not None:
+            # The creating worker owns the new game
+            await game_ownership.ensure(game_state.id)
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -37,7 +75,19 @@ async def list_games(
     """List all games"""
     try:
         games = await game_service.list_games()
-        return games
+        return trusted_response(GAME_LIST, [player_view(game) for game in games])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/summaries", response_model=GameSummaryPage)
+async def list_game_summaries(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    game_service: GameService = Depends(get_game_service)
+):
+    """List games newest first, one page at a time"""
+    try:
+        return trusted_response(GAME_SUMMARY_PAGE, await game_service.list_game_summaries(limit, cursor))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -51,7 +101,7 @@ async def get_game(
         game_state = await game_service.get_game(game_id)
         if not game_state:
             raise HTTPException(status_code=404, detail="Game not found")
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -66,7 +116,7 @@ async def move_units(
         game_state = await game_service.move_units(
             game_id, request.unit_ids, request.target_x, request.target_y
         )
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -81,7 +131,7 @@ async def attack_target(
         game_state = await game_service.attack_target(
             game_id, request.attacker_id, request.target_id
         )
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -96,7 +146,7 @@ async def build_building(
         game_state = await game_service.build_building(
             game_id, request.building_type, request.x, request.y
         )
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -104,25 +154,28 @@ async def build_building(
 async def produce_unit(
     game_id: str,
     request: ProduceUnitRequest,
-    background_tasks: BackgroundTasks,
     game_service: GameService = Depends(get_game_service)
 ):
-    """Start unit production"""
+    """Queue unit production; the production scheduler completes it"""
     try:
         production = await game_service.produce_unit(
             game_id, request.building_id, request.unit_type
         )
-        
-        # Schedule completion
-        async def complete_production():
-            await asyncio.sleep(production.end_time.timestamp() - datetime.utcnow().timestamp())
-            try:
-                await game_service.complete_unit_production(production.id)
-            except Exception as e:
-                print(f"Error completing production: {e}")
-        
-        background_tasks.add_task(complete_production)
-        return production
+        return trusted_response(PRODUCTION, production)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{game_id}/commands", response_model=CommandBatchResult)
+async def execute_commands(
+    game_id: str,
+    request: CommandBatchRequest,
+    game_service: GameService = Depends(get_game_service)
+):
+    """Apply several actions in order in one request, with a result per action"""
+    try:
+        result = await game_service.execute_commands(game_id, request.commands)
+        result = result.model_copy(update={"game": player_view(result.game)})
+        return trusted_response(COMMAND_BATCH_RESULT, result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -134,7 +187,7 @@ async def get_pending_productions(
     """Get all pending unit productions"""
     try:
         productions = await game_service.get_pending_productions(game_id)
-        return productions
+        return trusted_response(PRODUCTION_LIST, productions)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -143,10 +196,13 @@ async def update_resources(
     game_id: str,
     game_service: GameService = Depends(get_game_service)
 ):
-    """Update player resources based on buildings"""
+    """Update player resources based on buildings.
+
+    Kept for older clients; the simulation loop credits income on its own.
+    """
     try:
         game_state = await game_service.update_resources(game_id)
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -155,10 +211,25 @@ async def ai_turn(
     game_id: str,
     game_service: GameService = Depends(get_game_service)
 ):
-    """Execute AI turn"""
+    """Execute AI turn.
+
+    Kept for older clients; the simulation loop runs the AI on its own.
+    """
     try:
         game_state = await game_service.ai_turn(game_id)
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{game_id}/replay", response_model=GameState)
+async def replay_game(
+    game_id: str,
+    seq: Optional[int] = Query(None, ge=0),
+    game_service: GameService = Depends(get_game_service)
+):
+    """Rebuild a game as of event `seq` (default: latest) from snapshots and the event log"""
+    try:
+        return trusted_response(GAME, player_view(await game_service.replay_game(game_id, seq)))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -171,6 +242,61 @@ async def complete_production(
     """Manually complete unit production"""
     try:
         game_state = await game_service.complete_unit_production(production_id)
-        return game_state
+        return trusted_response(GAME, player_view(game_state))
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.websocket("/{game_id}/ws")
+async def game_stream(websocket: WebSocket, game_id: str):
+    """Stream per-tick state diffs and accept actions over one connection.
+
+    Server frames are msgpack (see services.state_stream). Client frames
+    are GameActionRequest objects as msgpack (binary) or JSON (text), with
+    an optional "ref" echoed back in the {"t": "ack"} reply.
+    """
+    if game_ownership is not None:
+        owner_url = await game_ownership.ensure(game_id)
+        if owner_url is not None:
+            # Clients reconnect to the owning worker given in the reason
+            await websocket.close(code=4307, reason=owner_url)
+            return
+
+    game_service = await get_game_service()
+    game_state = await game_service.get_game(game_id)
+    if not game_state or state_stream is None:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    subscription = state_stream.subscribe(game_state)
+    sender = asyncio.create_task(_pump_frames(websocket, subscription))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            ref = None
+            try:
+                if message.get("bytes") is not None:
+                    payload = decode(message["bytes"])
+                else:
+                    payload = json.loads(message.get("text") or "{}")
+                if not isinstance(payload, dict):
+                    raise ValueError("Expected an action object")
+                ref = payload.pop("ref", None)
+                action = GameActionRequest(**payload)
+                await game_service.execute_action(game_id, action)
+                reply = {"t": "ack", "ref": ref, "ok": True}
+            except Exception as e:
+                reply = {"t": "ack", "ref": ref, "ok": False, "error": str(e)}
+            subscription.send(encode(reply))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        state_stream.unsubscribe(subscription)
+
+async def _pump_frames(websocket: WebSocket, subscription: Subscription):
+    while True:
+        frame = await subscription.queue.get()
+        await websocket.send_bytes(frame)
@@ -0,0 +1,48 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.metrics import registry
+import time
+
+REQUEST_SECONDS = registry.histogram(
+    "rts_http_request_seconds", "HTTP request latency by route template", ["method", "route"]
+)
+REQUESTS = registry.counter(
+    "rts_http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+
+# Label of requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """Time every HTTP request and label it with its route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task or request
+    object per call. The route is read from the scope after the router
+    matched it, so /api/games/{game_id} is one series, not one per game.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED)
+            method = scope["method"]
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=path)
+            REQUESTS.inc(method=method, route=path, status=str(status))
@@ -1,26 +1,164 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+import socket
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List
 import uuid
 from datetime import datetime
 from routes.game_routes import router as game_router
+from services.game_cache import GameStateCache
+from services.simulation import SimulationLoop
+from services.production_scheduler import ProductionScheduler
+from services.state_stream import StateStreamHub
+from services.game_actor import GameActorRegistry
+from services.action_log import ActionLog
+from services.event_store import EventStore
+from services.game_ownership import GameOwnership
+from services.archiver import GameArchiver
+from routes.game_affinity import GameAffinityMiddleware
+from routes.request_metrics import RequestMetricsMiddleware
+from services.game_service import GameService
+from services.metrics import registry as metrics_registry
+from services.loop_monitor import EventLoopMonitor
+from storage.base import Storage
+from storage.memory import MemoryStorage
+from storage.mongo import CommandMetrics, MongoStorage
+from storage.sqlite import SQLiteStorage
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage backend: "mongo" (shared by every worker), "sqlite" (embedded,
+# one worker, no network hop) or "memory" (tests and benchmarks)
+storage_backend = os.environ.get('STORAGE_BACKEND', 'mongo')
+client = None
+db = None
+storage: Storage
+if storage_backend == 'mongo':
+    # MongoDB connection
+    mongo_url = os.environ['MONGO_URL']
+    # Every driver command is counted and timed (see storage.mongo.CommandMetrics)
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[CommandMetrics()])
+    db = client[os.environ['DB_NAME']]
+    storage = MongoStorage(db)
+elif storage_backend == 'sqlite':
+    storage = SQLiteStorage(os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'rts.sqlite3')))
+elif storage_backend == 'memory':
+    storage = MemoryStorage()
+else:
+    raise ValueError(f"Unknown STORAGE_BACKEND: {storage_backend}")
 
-# Create the main app without a prefix
-app = FastAPI(title="RTS Medieval API", version="1.0.0")
+# Resident game state cache with write-behind persistence
+game_cache = GameStateCache(
+    storage.games,
+    max_games=int(os.environ.get('GAME_CACHE_MAX_GAMES', '1000')),
+    ttl_seconds=float(os.environ.get('GAME_CACHE_TTL_SECONDS', '600')),
+    flush_interval=float(os.environ.get('GAME_CACHE_FLUSH_INTERVAL', '1.0')),
+    flush_batch_size=int(os.environ.get('GAME_CACHE_FLUSH_BATCH_SIZE', '100')),
+)
+
+# game_actions audit rows are buffered and written in batches
+action_log = ActionLog(
+    storage.actions,
+    max_batch=int(os.environ.get('ACTION_LOG_MAX_BATCH', '500')),
+    max_buffer=int(os.environ.get('ACTION_LOG_MAX_BUFFER', '10000')),
+    flush_interval=float(os.environ.get('ACTION_LOG_FLUSH_INTERVAL', '0.5')),
+)
+
+# Every state change is a numbered event; snapshots allow rebuilding games
+event_store = EventStore(
+    storage,
+    action_log,
+    snapshot_every=int(os.environ.get('EVENT_SNAPSHOT_EVERY', '200')),
+)
+# Games are written after the events they include, and catch up on load
+game_cache.events = event_store
+
+# Pending unit productions, rehydrated from storage on startup
+production_scheduler = ProductionScheduler(storage.productions, game_cache, event_store)
+
+# Finished and idle games move to a compressed archive and come back when
+# asked for; completed production rows are deleted after their retention
+archive_sweep_enabled = os.environ.get('ARCHIVE_SWEEP_ENABLED', 'true').lower() == 'true'
+game_archiver = GameArchiver(
+    storage,
+    game_cache,
+    production_scheduler,
+    event_store,
+    finished_after=float(os.environ.get('ARCHIVE_FINISHED_AFTER_SECONDS', '3600')),
+    idle_after=float(os.environ.get('ARCHIVE_IDLE_AFTER_SECONDS', '604800')),
+    production_ttl=float(os.environ.get('PRODUCTION_RETENTION_SECONDS', '86400')),
+    interval=float(os.environ.get('ARCHIVE_SWEEP_INTERVAL', '60')),
+    batch_size=int(os.environ.get('ARCHIVE_SWEEP_BATCH_SIZE', '100')),
+)
+
+# Per-game command queues: actions on one game are applied one at a time
+_game_store = GameService(storage, game_cache, production_scheduler, events=event_store, archiver=game_archiver)
+game_actors = GameActorRegistry(
+    _game_store.get_game,
+    _game_store.update_game,
+    max_batch=int(os.environ.get('GAME_ACTOR_MAX_BATCH', '64')),
+    max_pending=int(os.environ.get('GAME_ACTOR_MAX_PENDING', '1000')),
+    idle_timeout=float(os.environ.get('GAME_ACTOR_IDLE_TIMEOUT', '30')),
+)
+
+# Server-side fixed-timestep simulation of all resident games
+simulation = SimulationLoop(
+    game_cache,
+    production_scheduler,
+    tick_rate=float(os.environ.get('SIMULATION_TICK_RATE', '10')),
+    ai_interval=float(os.environ.get('SIMULATION_AI_INTERVAL', '3.0')),
+    move_interval=float(os.environ.get('SIMULATION_MOVE_INTERVAL', '0.5')),
+    events=event_store,
+)
+
+# Game ownership across workers. Each worker runs as its own process with
+# its own WORKER_URL; requests for games owned elsewhere are redirected or
+# forwarded there, and leases of a dead worker expire and move on. Leases
+# live in Mongo, the only backend shared between workers
+game_ownership = None
+if os.environ.get('GAME_OWNERSHIP_ENABLED', 'false').lower() == 'true':
+    if db is None:
+        raise ValueError("GAME_OWNERSHIP_ENABLED requires STORAGE_BACKEND=mongo")
+    game_ownership = GameOwnership(
+        db,
+        game_cache,
+        worker_id=os.environ.get('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}",
+        worker_url=os.environ.get('WORKER_URL', ''),
+        lease_seconds=float(os.environ.get('GAME_LEASE_SECONDS', '15')),
+    )
+    game_ownership.add_acquire_listener(production_scheduler.rehydrate)
+
+    async def _forget_productions(game_id: str) -> None:
+        production_scheduler.forget_game(game_id)
+
+    game_ownership.add_release_listener(_forget_productions)
+    # The archiver only moves games no other worker holds
+    game_archiver.ownership = game_ownership
+    # Only games this worker holds are advanced and written back
+    game_cache.owns = game_ownership.owns
+    simulation.owns = game_ownership.owns
+
+# Responses and streams only show enemy entities within the player's sight
+fog_of_war = os.environ.get('FOG_OF_WAR_ENABLED', 'true').lower() == 'true'
+
+# WebSocket clients receive per-tick diffs after every simulation tick
+state_stream = StateStreamHub(
+    game_cache,
+    snapshot_every=int(os.environ.get('STREAM_SNAPSHOT_EVERY_TICKS', '50')),
+    fog_of_war=fog_of_war,
+)
+simulation.add_tick_listener(state_stream.publish_tick)
+
+# Create the main app without a prefix; orjson encodes the responses that
+# are not pre-serialized (see routes.game_routes.trusted_response)
+app = FastAPI(title="RTS Medieval API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -41,6 +179,8 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Status checks need the mongo storage backend")
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
     _ = await db.status_checks.insert_one(status_obj.dict())
@@ -48,9 +188,19 @@ async def create_status_check(input: StatusCheckCreate):
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
+    if db is None:
+        raise HTTPException(status_code=503, detail="Status checks need the mongo storage backend")
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of server metrics"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Include game routes
 api_router.include_router(game_router)
 
@@ -63,7 +213,22 @@ async def get_database():
 
 # Make db available to routes
 import routes.game_routes
-routes.game_routes.db = db
+routes.game_routes.storage = storage
+routes.game_routes.game_cache = game_cache
+routes.game_routes.production_scheduler = production_scheduler
+routes.game_routes.state_stream = state_stream
+routes.game_routes.game_actors = game_actors
+routes.game_routes.event_store = event_store
+routes.game_routes.game_ownership = game_ownership
+routes.game_routes.game_archiver = game_archiver
+routes.game_routes.fog_of_war = fog_of_war
+
+if game_ownership is not None:
+    app.add_middleware(
+        GameAffinityMiddleware,
+        ownership=game_ownership,
+        mode=os.environ.get('GAME_ROUTING_MODE', 'redirect'),
+    )
 
 app.add_middleware(
     CORSMiddleware,
@@ -73,6 +238,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so route latency includes every other middleware
+app.add_middleware(RequestMetricsMiddleware)
+
+# Probes how long ready callbacks wait behind the event loop
+loop_monitor = EventLoopMonitor(
+    interval=float(os.environ.get('EVENT_LOOP_PROBE_INTERVAL', '0.5')),
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -82,9 +255,32 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
+    await storage.setup()
+    await game_cache.start()
+    await action_log.start()
+    # With ownership, productions are loaded per game as it is acquired
+    await production_scheduler.start(rehydrate=game_ownership is None)
+    if game_ownership is not None:
+        await game_ownership.start()
+    await simulation.start()
+    if archive_sweep_enabled:
+        await game_archiver.start()
+    await loop_monitor.start()
     logger.info("RTS Medieval API started")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    # Write back dirty games before the connection goes away
+    await loop_monitor.stop()
+    await game_archiver.stop()
+    await simulation.stop()
+    await game_actors.stop()
+    await action_log.stop()
+    await game_cache.stop()
+    if game_ownership is not None:
+        # Only after the final flush, so the next owner loads current state
+        await game_ownership.stop()
+    await storage.close()
+    if client is not None:
+        client.close()
     logger.info("RTS Medieval API stopped")
\ No newline at end of file
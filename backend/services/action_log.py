@@ -0,0 +1,124 @@
+from typing import Deque, List, Optional
+from collections import deque
+from models.game import GameAction
+from storage.base import ActionRepository
+from services.metrics import registry
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+BUFFERED = registry.gauge("rts_action_log_buffered", "Game actions waiting to be written")
+WRITTEN = registry.counter("rts_action_log_written_total", "Game actions written to game_actions")
+DROPPED = registry.counter("rts_action_log_dropped_total", "Game actions lost to failed writes")
+BACKPRESSURE = registry.counter(
+    "rts_action_log_backpressure_total", "Times a caller waited for room in a full action buffer"
+)
+FLUSH_SECONDS = registry.histogram("rts_action_log_flush_seconds", "Time to insert one batch of game actions")
+
+
+class ActionLog:
+    """Buffered writer for the `game_actions` audit log.
+
+    Actions are appended to an in-process buffer and written in one
+    repository call once `max_batch` are waiting or every `flush_interval`
+    seconds, whichever comes first. When `max_buffer` actions are pending,
+    `record` waits for the next write to make room. Everything still
+    buffered is written on shutdown.
+    """
+
+    def __init__(
+        self,
+        actions: ActionRepository,
+        max_batch: int = 500,
+        max_buffer: int = 10000,
+        flush_interval: float = 0.5,
+    ):
+        self.actions = actions
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self._buffer: Deque[GameAction] = deque()
+        self._wakeup: Optional[asyncio.Future] = None
+        self._space = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def record(self, action: GameAction) -> None:
+        """Queue an action for the next batch write"""
+        while len(self._buffer) >= self.max_buffer:
+            BACKPRESSURE.inc()
+            self._space.clear()
+            self._wake()
+            await self._space.wait()
+        self._buffer.append(action)
+        BUFFERED.set(len(self._buffer))
+        if len(self._buffer) >= self.max_batch:
+            self._wake()
+
+    async def flush(self) -> int:
+        """Write every buffered action in batches of `max_batch`"""
+        async with self._flush_lock:
+            written = 0
+            while self._buffer:
+                batch: List[GameAction] = []
+                while self._buffer and len(batch) < self.max_batch:
+                    batch.append(self._buffer.popleft())
+                BUFFERED.set(len(self._buffer))
+                self._space.set()
+                written += await self._write(batch)
+            return written
+
+    async def _write(self, batch: List[GameAction]) -> int:
+        started = time.perf_counter()
+        try:
+            await self.actions.append(batch)
+        except Exception as e:
+            # Not retried: without a unique key a retry could duplicate rows
+            # that did get written, and the log is advisory
+            DROPPED.inc(len(batch))
+            logger.error(f"Dropping {len(batch)} game actions: {e}")
+            return 0
+        finally:
+            FLUSH_SECONDS.observe(time.perf_counter() - started)
+        WRITTEN.inc(len(batch))
+        return len(batch)
+
+    async def start(self) -> None:
+        """Start the background writer"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the background writer and write out everything buffered"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Sleep until the flush interval elapses or a full batch is waiting
+            self._wakeup = loop.create_future()
+            timer = loop.call_later(self.flush_interval, self._wake)
+            try:
+                await self._wakeup
+            finally:
+                timer.cancel()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing action log: {e}")
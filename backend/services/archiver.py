@@ -0,0 +1,231 @@
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from models.game import GameState, GameAction, UnitProduction
+from services.event_store import EventStore
+from services.game_cache import GameStateCache
+from services.game_ownership import GameOwnership
+from services.game_rules import FINISHED_STATUSES
+from services.production_scheduler import ProductionScheduler
+from services.metrics import registry
+from storage.base import Storage
+import asyncio
+import logging
+import msgpack
+import zlib
+
+logger = logging.getLogger(__name__)
+
+GAMES_ARCHIVED = registry.counter("rts_games_archived_total", "Games moved to the archive by status", ["status"])
+GAMES_RESTORED = registry.counter("rts_games_restored_total", "Archived games moved back on demand")
+ARCHIVE_BYTES = registry.counter("rts_archive_bytes_total", "Compressed bytes written to the archive")
+PRODUCTIONS_EXPIRED = registry.counter(
+    "rts_productions_expired_total", "Completed production rows deleted once past their retention"
+)
+
+# The data of an archive record is one zlib-compressed msgpack map:
+#   {"game": doc, "actions": [doc, ...], "productions": [doc, ...],
+#    "snapshots": [{"seq", "created_at", "state"}, ...]}
+# Documents are JSON-mode model dumps, so datetimes travel as ISO strings.
+# zlib rather than zstd: it ships with Python, so no new dependency; the
+# records are written once and read rarely, so its slower level 9 is fine.
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+
+@dataclass
+class ArchivedGame:
+    game: GameState
+    actions: List[GameAction]
+    productions: List[UnitProduction]
+    snapshots: List[Dict[str, Any]]
+
+
+def encode_archive(archived: ArchivedGame) -> bytes:
+    bundle = {
+        "game": archived.game.model_dump(mode="json"),
+        "actions": [action.model_dump(mode="json") for action in archived.actions],
+        "productions": [production.model_dump(mode="json") for production in archived.productions],
+        "snapshots": [
+            {"seq": s["seq"], "created_at": s["created_at"].isoformat(), "state": s["state"]}
+            for s in archived.snapshots
+        ],
+    }
+    return zlib.compress(msgpack.packb(bundle, use_bin_type=True), ARCHIVE_COMPRESSION_LEVEL)
+
+
+def decode_archive(data: bytes) -> ArchivedGame:
+    bundle = msgpack.unpackb(zlib.decompress(data), raw=False)
+    game = GameState.model_validate(bundle["game"])
+    return ArchivedGame(
+        game=game,
+        actions=[GameAction.model_validate(doc) for doc in bundle["actions"]],
+        productions=[UnitProduction.model_validate(doc) for doc in bundle["productions"]],
+        snapshots=[
+            {"game_id": game.id, "seq": s["seq"], "created_at": datetime.fromisoformat(s["created_at"]),
+             "state": s["state"]}
+            for s in bundle["snapshots"]
+        ],
+    )
+
+
+class GameArchiver:
+    """Keeps the hot collections down to games that are still played.
+
+    Every `interval` seconds a sweep picks games that finished more than
+    `finished_after` seconds ago, or that nobody updated for `idle_after`
+    seconds (archived with their status, so they restore playable). Each
+    game, its event log, snapshots and pending productions become one
+    compressed archive record and are then deleted from the hot collections. Completed production rows are
+    deleted `production_ttl` seconds after they ended; the sweep does this
+    rather than a Mongo TTL index so it works on every storage backend and
+    the retention stays a setting. Resident games are skipped, as are games
+    leased by another worker when `ownership` is set. `restore` moves an
+    archived game back when it is asked for.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        cache: Optional[GameStateCache] = None,
+        scheduler: Optional[ProductionScheduler] = None,
+        events: Optional[EventStore] = None,
+        finished_after: float = 3600.0,
+        idle_after: float = 7 * 86400.0,
+        production_ttl: float = 86400.0,
+        interval: float = 60.0,
+        batch_size: int = 100,
+        ownership: Optional[GameOwnership] = None,
+    ):
+        self.storage = storage
+        self.cache = cache
+        self.scheduler = scheduler
+        self.events = events
+        self.finished_after = finished_after
+        self.idle_after = idle_after
+        self.production_ttl = production_ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self.ownership = ownership
+        self._restore_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        """Archive one batch of finished or idle games, returns how many"""
+        now = datetime.utcnow()
+        if self.events is not None:
+            # Archived logs must include events still buffered
+            await self.events.flush()
+        game_ids = await self.storage.games.archivable(
+            FINISHED_STATUSES,
+            now - timedelta(seconds=self.finished_after),
+            now - timedelta(seconds=self.idle_after),
+            self.batch_size,
+        )
+        archived = 0
+        for game_id in game_ids:
+            try:
+                if await self.archive(game_id):
+                    archived += 1
+            except Exception as e:
+                logger.error(f"Archiving game {game_id} failed: {e}")
+
+        expired = await self.storage.productions.expire_completed(now - timedelta(seconds=self.production_ttl))
+        PRODUCTIONS_EXPIRED.inc(expired)
+        if archived or expired:
+            logger.info(f"Archived {archived} games, expired {expired} completed productions")
+        return archived
+
+    async def archive(self, game_id: str) -> bool:
+        """Move a stored game to the archive; False if it is resident, owned elsewhere or gone"""
+        if self.ownership is not None and await self.ownership.ensure(game_id) is not None:
+            # Another worker holds the game and may be writing it
+            return False
+        if self.cache is not None:
+            return bool(await self.cache.run_unloaded(game_id, lambda: self._move(game_id)))
+        return await self._move(game_id)
+
+    async def _move(self, game_id: str) -> bool:
+        game_state = await self.storage.games.get(game_id)
+        if game_state is None:
+            return False
+        status = game_state.game_status
+        data = encode_archive(ArchivedGame(
+            game=game_state,
+            actions=await self.storage.actions.read(game_id, -1),
+            productions=await self.storage.productions.pending(game_id),
+            snapshots=await self.storage.snapshots.all(game_id),
+        ))
+        await self.storage.archive.put({
+            "game_id": game_id,
+            "game_status": status,
+            "player_name": game_state.player.name,
+            "archived_at": datetime.utcnow(),
+            "data": data,
+        })
+        # Only once the archive holds everything. The game goes first, so
+        # a failure after it leaves rows that `restore` clears
+        await self.storage.games.delete(game_id)
+        await self.storage.actions.delete(game_id)
+        await self.storage.snapshots.delete(game_id)
+        await self.storage.productions.delete(game_id)
+        if self.scheduler is not None:
+            self.scheduler.forget_game(game_id)
+        GAMES_ARCHIVED.inc(status=status)
+        ARCHIVE_BYTES.inc(len(data))
+        return True
+
+    async def restore(self, game_id: str) -> Optional[GameState]:
+        """Move an archived game back to the hot collections and load it"""
+        async with self._restore_lock:
+            # Restored while this call waited for the lock
+            game_state = await self._load(game_id)
+            if game_state is not None:
+                return game_state
+            record = await self.storage.archive.get(game_id)
+            if record is None:
+                return None
+            archived = decode_archive(record["data"])
+            # Restoring counts as activity, or the next sweep would take it again
+            archived.game.updated_at = datetime.utcnow()
+            # Rows a half-finished archive run left behind
+            await self.storage.actions.delete(game_id)
+            await self.storage.snapshots.delete(game_id)
+            await self.storage.productions.delete(game_id)
+            await self.storage.games.insert(archived.game)
+            if archived.actions:
+                await self.storage.actions.append(archived.actions)
+            if archived.snapshots:
+                await self.storage.snapshots.append(archived.snapshots)
+            for production in archived.productions:
+                await self.storage.productions.insert(production)
+                if self.scheduler is not None:
+                    self.scheduler.schedule(production)
+            await self.storage.archive.delete(game_id)
+            GAMES_RESTORED.inc()
+            return await self._load(game_id)
+
+    async def _load(self, game_id: str) -> Optional[GameState]:
+        if self.cache is not None:
+            return await self.cache.get(game_id)
+        return await self.storage.games.get(game_id)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error in archive sweep: {e}")
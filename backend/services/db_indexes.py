@@ -0,0 +1,55 @@
+from typing import Dict, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes behind every query the services issue, declared once at startup.
+# create_indexes is a no-op for indexes that already exist.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "games": [
+        # get_game and every write-back filter on the game id
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Summary listing, newest first with the id as tie-break
+        IndexModel([("updated_at", DESCENDING), ("id", DESCENDING)], name="updated_at_id"),
+        # Archiver sweep for finished games
+        IndexModel([("game_status", ASCENDING), ("updated_at", ASCENDING)], name="game_status_updated_at"),
+    ],
+    "unit_productions": [
+        # complete_unit_production claims by production id
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # get_pending_productions
+        IndexModel([("game_id", ASCENDING), ("completed", ASCENDING)], name="game_id_completed"),
+        # Scheduler rehydration of pending rows in completion order, and
+        # the archiver expiring old completed rows
+        IndexModel([("completed", ASCENDING), ("end_time", ASCENDING)], name="completed_end_time"),
+    ],
+    "game_actions": [
+        # Per-game action history in order
+        IndexModel([("game_id", ASCENDING), ("timestamp", ASCENDING)], name="game_id_timestamp"),
+        # Replay reads a game's events after a snapshot in sequence order
+        IndexModel([("game_id", ASCENDING), ("seq", ASCENDING)], name="game_id_seq"),
+    ],
+    "game_leases": [
+        # One owner per game; a second claim fails on this index
+        IndexModel([("game_id", ASCENDING)], unique=True, name="game_id_unique"),
+        # Lease renewal and release by worker
+        IndexModel([("owner", ASCENDING)], name="owner"),
+    ],
+    "game_snapshots": [
+        # Nearest snapshot at or before an event
+        IndexModel([("game_id", ASCENDING), ("seq", DESCENDING)], name="game_id_seq"),
+    ],
+    "archived_games": [
+        # Restore by game id; one record per game
+        IndexModel([("game_id", ASCENDING)], unique=True, name="game_id_unique"),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Create the indexes of every collection the game services query"""
+    for collection, indexes in INDEXES.items():
+        names = await db[collection].create_indexes(indexes)
+        logger.info(f"Indexes on {collection}: {', '.join(names)}")
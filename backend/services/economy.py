@@ -0,0 +1,71 @@
+from typing import Optional
+from datetime import datetime, timedelta
+from models.game import GameState, Player, Building
+from services.game_data import INCOME_INTERVAL_MS
+from services.rule_tables import BUILDING_RULES, ResourceVector, add_vector, income_vector
+
+# Income accrues lazily: each player keeps an income vector (what one round
+# of income credits, kept up to date as buildings are added or destroyed)
+# and `last_update`, the start of its first uncredited round. Whoever looks
+# at a game credits the whole rounds elapsed since then. last_update only
+# moves by whole rounds from a millisecond-aligned start, so crediting at
+# several times or once at the end gives the same totals, and event times
+# truncated to milliseconds by storage replay to the same rounds.
+
+INCOME_INTERVAL = timedelta(milliseconds=INCOME_INTERVAL_MS)
+
+
+def income_rate(player: Player) -> ResourceVector:
+    """Resources one round of income credits to the player"""
+    if player._income is None:
+        player._income = income_vector(b.type for b in player.buildings)
+    return player._income
+
+
+def building_added(player: Player, building: Building) -> None:
+    """Fold a new building's income into the cached rate"""
+    rules = BUILDING_RULES.get(building.type)
+    if player._income is not None and rules is not None:
+        player._income = tuple(a + b for a, b in zip(player._income, rules.income))
+
+
+def start(game_state: GameState, now: datetime) -> None:
+    """Start the income clock of sides that have none.
+
+    Only called by events, so the start is part of the replayed history;
+    games created before lazy income start at their next event.
+    """
+    for player in (game_state.player, game_state.enemy):
+        if player.last_update is None:
+            player.last_update = floor_ms(now)
+
+
+def accrue(game_state: GameState, now: datetime) -> bool:
+    """Credit both sides the income rounds completed by `now`, True if any were"""
+    credited = False
+    for player in (game_state.player, game_state.enemy):
+        credited = _accrue_player(player, now) or credited
+    return credited
+
+
+def _accrue_player(player: Player, now: datetime) -> bool:
+    if player.last_update is None:
+        return False
+    rounds = (now - player.last_update) // INCOME_INTERVAL
+    if rounds <= 0:
+        return False
+    income = income_rate(player)
+    if any(income):
+        add_vector(player.resources, tuple(amount * rounds for amount in income))
+    player.last_update += INCOME_INTERVAL * rounds
+    return True
+
+
+def settled_at(game_state: GameState) -> Optional[datetime]:
+    """Latest time either side has been credited up to"""
+    times = [p.last_update for p in (game_state.player, game_state.enemy) if p.last_update is not None]
+    return max(times) if times else None
+
+
+def floor_ms(value: datetime) -> datetime:
+    return value.replace(microsecond=value.microsecond - value.microsecond % 1000)
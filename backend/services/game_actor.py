@@ -0,0 +1,157 @@
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from models.game import GameState
+from services.metrics import registry
+import asyncio
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+Command = Callable[[GameState], Awaitable[Any]]
+
+ACTIVE_ACTORS = registry.gauge("rts_game_actors", "Games with a running command actor")
+COMMANDS = registry.counter("rts_game_commands_total", "Commands applied by game actors", ["outcome"])
+BATCH_SIZE = registry.histogram(
+    "rts_game_command_batch_size", "Commands applied per game load",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+class _GameActor:
+    __slots__ = ("game_id", "commands", "wake", "task")
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.commands: Deque[Tuple[Command, asyncio.Future]] = deque()
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class GameActorRegistry:
+    """Per-game command queues with a single consumer each.
+
+    Commands for one game run one at a time in arrival order, so no request
+    works on a copy of the game that another request is changing. Commands
+    that queue up while one is running are applied as a batch against a
+    single load and saved once. Different games have independent actors and
+    run concurrently. An actor exits after `idle_timeout` seconds without
+    commands and is recreated on the next one.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[Optional[GameState]]],
+        save: Callable[[GameState], Awaitable[Any]],
+        max_batch: int = 64,
+        max_pending: int = 1000,
+        idle_timeout: float = 30.0,
+    ):
+        self.load = load
+        self.save = save
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        self._actors: Dict[str, _GameActor] = {}
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    async def submit(self, game_id: str, command: Command) -> Any:
+        """Queue a command on a game and wait for its result"""
+        if self._stopping:
+            raise ValueError("Server is shutting down")
+        actor = self._actors.get(game_id)
+        if actor is None:
+            actor = _GameActor(game_id)
+            self._actors[game_id] = actor
+            # In a fresh context: the actor outlives the request that created
+            # it and must not carry that request's context variables
+            actor.task = contextvars.Context().run(asyncio.create_task, self._run(actor))
+            ACTIVE_ACTORS.set(len(self._actors))
+        if len(actor.commands) >= self.max_pending:
+            raise ValueError("Too many pending commands for this game")
+
+        future = asyncio.get_running_loop().create_future()
+        actor.commands.append((command, future))
+        actor.wake.set()
+        return await future
+
+    async def stop(self) -> None:
+        """Refuse new commands and wait for queued ones to finish"""
+        self._stopping = True
+        actors = list(self._actors.values())
+        for actor in actors:
+            actor.wake.set()
+        await asyncio.gather(*(a.task for a in actors if a.task), return_exceptions=True)
+
+    async def _run(self, actor: _GameActor) -> None:
+        try:
+            while True:
+                if not actor.commands:
+                    if self._stopping:
+                        return
+                    actor.wake.clear()
+                    try:
+                        await asyncio.wait_for(actor.wake.wait(), self.idle_timeout)
+                    except asyncio.TimeoutError:
+                        if not actor.commands:
+                            return
+                    continue
+
+                batch = []
+                while actor.commands and len(batch) < self.max_batch:
+                    batch.append(actor.commands.popleft())
+                await self._apply(actor.game_id, batch)
+        finally:
+            # Removed in the same step that saw the queue empty, so a
+            # submit either reaches this actor or creates a fresh one
+            if self._actors.get(actor.game_id) is actor:
+                del self._actors[actor.game_id]
+            ACTIVE_ACTORS.set(len(self._actors))
+            for _, future in actor.commands:
+                if not future.done():
+                    future.set_exception(ValueError("Server is shutting down"))
+
+    async def _apply(self, game_id: str, batch: List[Tuple[Command, asyncio.Future]]) -> None:
+        try:
+            game_state = await self.load(game_id)
+        except Exception as e:
+            _fail([f for _, f in batch], e)
+            return
+        if game_state is None:
+            _fail([f for _, f in batch], ValueError("Game not found"))
+            return
+
+        BATCH_SIZE.observe(len(batch))
+        applied = []
+        for command, future in batch:
+            if future.done():
+                # The caller gave up before its command ran
+                continue
+            try:
+                applied.append((future, await command(game_state)))
+                COMMANDS.inc(outcome="ok")
+            except Exception as e:
+                COMMANDS.inc(outcome="error")
+                if not future.done():
+                    future.set_exception(e)
+
+        if not applied:
+            return
+        try:
+            await self.save(game_state)
+        except Exception as e:
+            logger.error(f"Saving game {game_id} failed: {e}")
+            _fail([f for f, _ in applied], e)
+            return
+        for future, result in applied:
+            if not future.done():
+                future.set_result(result)
+
+
+def _fail(futures: List[asyncio.Future], error: Exception) -> None:
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
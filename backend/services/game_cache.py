@@ -0,0 +1,278 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+from models.game import GameState
+from services.event_store import EventStore
+from services.metrics import registry
+from storage.base import GameRepository
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+WRITES_FENCED = registry.counter(
+    "rts_game_writes_fenced_total", "Dirty games held back from a flush because this worker does not own them"
+)
+
+
+class _CacheEntry:
+    __slots__ = ("state", "dirty", "needs_full_write", "last_access")
+
+    def __init__(self, state: GameState, dirty: bool):
+        self.state = state
+        self.dirty = dirty
+        # Set when tracked deltas were lost and the document must be rewritten
+        self.needs_full_write = False
+        self.last_access = time.monotonic()
+
+
+class GameStateCache:
+    """Resident store of hot games with write-behind persistence.
+
+    Games are loaded from the game repository once and then served from
+    process memory. Mutated games are flagged dirty and written back in
+    batches every `flush_interval` seconds and on shutdown. Idle games are
+    evicted once they exceed `ttl_seconds` or the store exceeds `max_games`
+    (least recently used first). Dirty games are never evicted before they
+    have been flushed, and pinned games (those a client is watching) not
+    before they are unpinned, so `max_games` is a soft limit.
+
+    With `owns` set (see services.game_ownership), a flush only writes
+    games this worker holds the lease of. Others stay dirty: a game still
+    being claimed is written by a later flush, and one whose lease was
+    lost is discarded by the ownership renewal instead of overwriting the
+    new owner's writes.
+
+    With `events` set, a flush first stores every buffered event, so a
+    stored game is never ahead of its event log. A crash between the two
+    writes can leave the log ahead instead, so a game loaded from storage
+    is brought up to the end of its log before it is served.
+    """
+
+    def __init__(
+        self,
+        games: GameRepository,
+        max_games: int = 1000,
+        ttl_seconds: float = 600.0,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 100,
+        owns: Optional[Callable[[str], bool]] = None,
+        events: Optional[EventStore] = None,
+    ):
+        self.games = games
+        self.max_games = max_games
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.owns = owns
+        self.events = events
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # Pin counts by game id; they outlive eviction and discard
+        self._pins: Dict[str, int] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._entries
+
+    def resident_ids(self) -> List[str]:
+        """Ids of all games currently held in memory"""
+        return list(self._entries.keys())
+
+    def peek(self, game_id: str) -> Optional[GameState]:
+        """Return a resident game without loading or touching LRU order"""
+        entry = self._entries.get(game_id)
+        return entry.state if entry else None
+
+    async def get(self, game_id: str) -> Optional[GameState]:
+        """Get a game, loading it from storage only if it is not resident"""
+        entry = self._entries.get(game_id)
+        if entry:
+            self._touch(game_id, entry)
+            return entry.state
+
+        # Coalesce concurrent loads so every caller shares one instance
+        pending = self._loading.get(game_id)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[game_id] = future
+        try:
+            game_state = await self.games.get(game_id)
+            if game_state and self.events is not None:
+                await self.events.catch_up(game_state)
+            if game_state:
+                # Fields defaulted on load (a legacy game's seed) are written back
+                self.put(game_state, dirty=bool(game_state.changed_fields()))
+            future.set_result(game_state)
+            return game_state
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._loading[game_id]
+            # Nobody else may be waiting; avoid "exception never retrieved"
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    async def run_unloaded(self, game_id: str, task: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `task` on the stored copy of a game that is not resident.
+
+        Returns what `task` returns, or None without running it if the game
+        is resident or being loaded. Loads that start while `task` runs
+        wait for it and get None, so nobody keeps a copy of a game `task`
+        moves out of storage; callers that can find it elsewhere look there.
+        """
+        if game_id in self._entries or game_id in self._loading:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._loading[game_id] = future
+        try:
+            return await task()
+        finally:
+            del self._loading[game_id]
+            future.set_result(None)
+
+    def put(self, game_state: GameState, dirty: bool = True) -> None:
+        """Make a game resident, optionally flagging it for write-back"""
+        entry = self._entries.get(game_state.id)
+        if entry:
+            entry.state = game_state
+            entry.dirty = entry.dirty or dirty
+            self._touch(game_state.id, entry)
+        else:
+            self._entries[game_state.id] = _CacheEntry(game_state, dirty)
+        self._evict()
+
+    def mark_dirty(self, game_state: GameState) -> None:
+        """Flag a resident game as changed since its last flush.
+
+        Does not count as an access, so games only advanced by background
+        work still expire once nobody reads or watches them.
+        """
+        entry = self._entries.get(game_state.id)
+        if entry and entry.state is game_state:
+            entry.dirty = True
+        else:
+            self.put(game_state, dirty=True)
+
+    def pin(self, game_id: str) -> None:
+        """Keep a game resident, however long nobody reads it, until unpinned"""
+        self._pins[game_id] = self._pins.get(game_id, 0) + 1
+
+    def unpin(self, game_id: str) -> None:
+        """Release one pin; the game expires `ttl_seconds` after the last one"""
+        count = self._pins.get(game_id, 0) - 1
+        if count > 0:
+            self._pins[game_id] = count
+            return
+        self._pins.pop(game_id, None)
+        entry = self._entries.get(game_id)
+        if entry:
+            self._touch(game_id, entry)
+
+    def discard(self, game_id: str) -> None:
+        """Drop a game from memory without flushing it"""
+        self._entries.pop(game_id, None)
+
+    async def flush(self) -> int:
+        """Write all dirty games back to storage in batches"""
+        async with self._flush_lock:
+            written = 0
+            dirty_ids = [gid for gid, entry in self._entries.items() if entry.dirty]
+            for start in range(0, len(dirty_ids), self.flush_batch_size):
+                batch = dirty_ids[start:start + self.flush_batch_size]
+                written += await self._flush_batch(batch)
+            self._evict()
+            return written
+
+    async def _flush_batch(self, game_ids: List[str]) -> int:
+        if self.events is not None:
+            # Nothing awaits between this and the repository serializing
+            # the games, so every event they include is stored first
+            await self.events.flush()
+        # Clear the dirty flag before awaiting; the repository serializes
+        # before its first await too, so mutations made during the write
+        # are picked up by the next flush
+        games = []
+        full_ids = set()
+        flushed = []
+        for game_id in game_ids:
+            entry = self._entries.get(game_id)
+            if not entry or not entry.dirty:
+                continue
+            if self.owns is not None and not self.owns(game_id):
+                WRITES_FENCED.inc()
+                continue
+            games.append(entry.state)
+            if entry.needs_full_write:
+                full_ids.add(game_id)
+            entry.dirty = False
+            entry.needs_full_write = False
+            flushed.append(game_id)
+
+        if not games:
+            return 0
+
+        try:
+            await self.games.save(games, full_ids)
+        except Exception:
+            for game_id in flushed:
+                entry = self._entries.get(game_id)
+                if entry:
+                    entry.dirty = True
+                    entry.needs_full_write = True
+            raise
+        return len(flushed)
+
+    def _touch(self, game_id: str, entry: _CacheEntry) -> None:
+        entry.last_access = time.monotonic()
+        self._entries.move_to_end(game_id)
+
+    def _evict(self) -> None:
+        """Drop clean games that are expired or over capacity, LRU first"""
+        now = time.monotonic()
+        overflow = len(self._entries) - self.max_games
+        for game_id in list(self._entries.keys()):
+            entry = self._entries[game_id]
+            expired = now - entry.last_access > self.ttl_seconds
+            if not expired and overflow <= 0:
+                # Entries are in LRU order, nothing newer can be expired
+                break
+            if entry.dirty:
+                continue
+            if game_id in self._pins:
+                # Watched counts as used, so it leaves the LRU front
+                self._touch(game_id, entry)
+                continue
+            del self._entries[game_id]
+            overflow -= 1
+
+    async def start(self) -> None:
+        """Start the periodic write-behind flush"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write out everything still dirty"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing game cache: {e}")
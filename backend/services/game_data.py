@@ -29,6 +29,7 @@ UNIT_STATS = {
         "attack": 5,
         "cost": {"gold": 50, "food": 1},
         "buildTime": 3000,
+        "sight": 3,
         "icon": "👨‍🌾"
     },
     "soldier": {
@@ -37,6 +38,7 @@ UNIT_STATS = {
         "attack": 15,
         "cost": {"gold": 100, "food": 2},
         "buildTime": 5000,
+        "sight": 3,
         "icon": "⚔️"
     },
     "archer": {
@@ -45,6 +47,7 @@ UNIT_STATS = {
         "attack": 20,
         "cost": {"gold": 120, "wood": 50},
         "buildTime": 4000,
+        "sight": 5,
         "icon": "🏹"
     },
     "knight": {
@@ -53,6 +56,7 @@ UNIT_STATS = {
         "attack": 30,
         "cost": {"gold": 250, "food": 3},
         "buildTime": 8000,
+        "sight": 4,
         "icon": "🛡️"
     },
     "mage": {
@@ -61,6 +65,7 @@ UNIT_STATS = {
         "attack": 35,
         "cost": {"gold": 200, "food": 2},
         "buildTime": 6000,
+        "sight": 4,
         "icon": "🧙‍♂️"
     }
 }
@@ -71,6 +76,7 @@ BUILDING_STATS = {
         "health": 500,
         "cost": {"gold": 500, "wood": 300},
         "buildTime": 10000,
+        "sight": 5,
         "icon": "🏛️",
         "produces": ["peasant"]
     },
@@ -79,6 +85,7 @@ BUILDING_STATS = {
         "health": 300,
         "cost": {"gold": 200, "wood": 150},
         "buildTime": 8000,
+        "sight": 3,
         "icon": "🏰",
         "produces": ["soldier", "archer"]
     },
@@ -87,6 +94,7 @@ BUILDING_STATS = {
         "health": 200,
         "cost": {"gold": 100, "wood": 100},
         "buildTime": 5000,
+        "sight": 2,
         "icon": "🚜",
         "produces": []
     },
@@ -95,6 +103,7 @@ BUILDING_STATS = {
         "health": 250,
         "cost": {"gold": 150, "wood": 200},
         "buildTime": 6000,
+        "sight": 2,
         "icon": "⛏️",
         "produces": []
     },
@@ -103,6 +112,7 @@ BUILDING_STATS = {
         "health": 280,
         "cost": {"gold": 300, "wood": 200},
         "buildTime": 7000,
+        "sight": 3,
         "icon": "🐎",
         "produces": ["knight"]
     }
@@ -114,6 +124,9 @@ INITIAL_RESOURCES = {
     "food": 100
 }
 
+# Length of one round of RESOURCE_GENERATION income
+INCOME_INTERVAL_MS = 3000
+
 RESOURCE_GENERATION = {
     "farm": {"food": 2},
     "mine": {"gold": 3},
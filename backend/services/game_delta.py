@@ -0,0 +1,92 @@
+from typing import Any, Dict, List
+from pymongo import ReplaceOne, UpdateOne
+from models.game import GameState, Player
+
+# Mongo rejects an update that touches the same array with more than one
+# operator ($pull + $push, or $set on an element + $push), so changes are
+# grouped into stages that run as one ordered bulk_write.
+ENTITY_LISTS = ("units", "buildings")
+SIDES = ("player", "enemy")
+
+
+def full_replace_operation(game_state: GameState) -> ReplaceOne:
+    """Rewrite the whole stored document"""
+    return ReplaceOne({"id": game_state.id}, game_state.model_dump(), upsert=True)
+
+
+def build_update_operations(game_state: GameState) -> List[UpdateOne]:
+    """Translate tracked changes into minimal Mongo update operations"""
+    pulls: Dict[str, Any] = {}
+    sets: Dict[str, Any] = {}
+    array_filters: List[Dict[str, str]] = []
+    pushes: Dict[str, Any] = {}
+
+    changed = game_state.changed_fields()
+    for field in changed:
+        if field not in SIDES:
+            sets[field] = getattr(game_state, field)
+
+    for side in SIDES:
+        player: Player = getattr(game_state, side)
+        if side in changed:
+            # Whole player object was replaced
+            sets[side] = player.model_dump()
+            continue
+        _collect_player_changes(side, player, pulls, sets, array_filters, pushes)
+
+    selector = {"id": game_state.id}
+    operations = []
+    if pulls:
+        operations.append(UpdateOne(selector, {"$pull": pulls}))
+    if sets:
+        operations.append(UpdateOne(selector, {"$set": sets}, array_filters=array_filters or None))
+    if pushes:
+        operations.append(UpdateOne(selector, {"$push": pushes}))
+    return operations
+
+
+def _collect_player_changes(
+    side: str,
+    player: Player,
+    pulls: Dict[str, Any],
+    sets: Dict[str, Any],
+    array_filters: List[Dict[str, str]],
+    pushes: Dict[str, Any],
+) -> None:
+    for field in player.changed_fields():
+        if field not in ENTITY_LISTS and field != "resources":
+            sets[f"{side}.{field}"] = getattr(player, field)
+
+    for resource, amount in player.changed_resources().items():
+        sets[f"{side}.resources.{resource}"] = amount
+
+    for list_name in ENTITY_LISTS:
+        entities = getattr(player, list_name)
+        persisted_ids = (
+            player.persisted_unit_ids() if list_name == "units"
+            else player.persisted_building_ids()
+        )
+        path = f"{side}.{list_name}"
+
+        current_ids = set()
+        new_docs = []
+        for entity in entities:
+            current_ids.add(entity.id)
+            if entity.id not in persisted_ids:
+                new_docs.append(entity.model_dump())
+                continue
+            entity_changes = entity.changed_fields()
+            if not entity_changes:
+                continue
+            # Each modified element gets its own arrayFilters identifier
+            name = f"e{len(array_filters)}"
+            array_filters.append({f"{name}.id": entity.id})
+            for field in entity_changes:
+                sets[f"{path}.$[{name}].{field}"] = getattr(entity, field)
+
+        removed_ids = persisted_ids - current_ids
+        if removed_ids:
+            pulls[path] = {"id": {"$in": sorted(removed_ids)}}
+        if new_docs:
+            pushes[path] = {"$each": new_docs}
+
@@ -0,0 +1,194 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from services.game_cache import GameStateCache
+from services.metrics import registry
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+OWNED_GAMES = registry.gauge("rts_owned_games", "Games leased by this worker")
+LEASES_ACQUIRED = registry.counter("rts_game_leases_acquired_total", "Game leases taken by this worker")
+LEASES_LOST = registry.counter("rts_game_leases_lost_total", "Game leases taken over by another worker")
+NOT_OWNED = registry.counter("rts_game_requests_not_owned_total", "Game requests that reached a non-owning worker")
+
+GameListener = Callable[[str], Awaitable[None]]
+
+
+class GameOwnership:
+    """Exclusive per-game ownership across workers, held as leases in Mongo.
+
+    A worker owns a game while its row in `game_leases` names it and has
+    not expired. Leases of resident games are renewed every third of
+    `lease_seconds`; games that left the cache are released so another
+    worker can take them. When a worker dies its leases expire and the next
+    worker asked for one of its games takes it over. Only games that are
+    stored, live or archived, are claimed. Acquire listeners run
+    once a game is taken (e.g. to load its pending productions), release
+    listeners once it is given up or lost.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        cache: GameStateCache,
+        worker_id: str,
+        worker_url: str = "",
+        lease_seconds: float = 15.0,
+    ):
+        self.db = db
+        self.cache = cache
+        self.worker_id = worker_id
+        self.worker_url = worker_url
+        self.lease_seconds = lease_seconds
+        # Owned game ids and the monotonic time they were acquired
+        self._owned: Dict[str, float] = {}
+        self._acquiring: Dict[str, asyncio.Future] = {}
+        self._acquire_listeners: List[GameListener] = []
+        self._release_listeners: List[GameListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_acquire_listener(self, listener: GameListener) -> None:
+        self._acquire_listeners.append(listener)
+
+    def add_release_listener(self, listener: GameListener) -> None:
+        self._release_listeners.append(listener)
+
+    def owns(self, game_id: str) -> bool:
+        return game_id in self._owned
+
+    async def ensure(self, game_id: str) -> Optional[str]:
+        """Take the game if it is free; None when this worker owns it or
+        there is no such game, otherwise the owner's URL ("" if the owner
+        has none)"""
+        if game_id in self._owned:
+            return None
+        # Coalesce concurrent claims so listeners run once per acquisition
+        pending = self._acquiring.get(game_id)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._acquiring[game_id] = future
+        try:
+            owner_url = await self._claim(game_id)
+            future.set_result(owner_url)
+            return owner_url
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._acquiring[game_id]
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    async def _claim(self, game_id: str) -> Optional[str]:
+        if not await self._exists(game_id):
+            # Nothing to own; the request fails on its own with "not found"
+            return None
+        now = datetime.utcnow()
+        try:
+            # Matches our own or an expired lease; otherwise the upsert
+            # collides with the live lease on the unique game_id index
+            await self.db.game_leases.find_one_and_update(
+                {"game_id": game_id, "$or": [{"owner": self.worker_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {
+                    "owner": self.worker_id,
+                    "owner_url": self.worker_url,
+                    "expires_at": now + timedelta(seconds=self.lease_seconds),
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            NOT_OWNED.inc()
+            lease = await self.db.game_leases.find_one({"game_id": game_id})
+            return lease.get("owner_url", "") if lease else ""
+
+        self._owned[game_id] = time.monotonic()
+        OWNED_GAMES.set(len(self._owned))
+        LEASES_ACQUIRED.inc()
+        for listener in self._acquire_listeners:
+            try:
+                await listener(game_id)
+            except Exception as e:
+                logger.error(f"Error in acquire listener for game {game_id}: {e}")
+        return None
+
+    async def _exists(self, game_id: str) -> bool:
+        if game_id in self.cache:
+            return True
+        if await self.db.games.find_one({"id": game_id}, {"_id": 1}):
+            return True
+        # Restored by the request, so it needs an owner like a live game
+        return await self.db.archived_games.find_one({"game_id": game_id}, {"_id": 1}) is not None
+
+    async def renew(self) -> None:
+        """Extend held leases, release idle games and drop lost ones"""
+        now = datetime.utcnow()
+        resident = set(self.cache.resident_ids())
+        grace_start = time.monotonic() - self.lease_seconds
+        # Games that left the cache; the grace period covers requests that
+        # have claimed a game but not loaded it yet
+        idle = [gid for gid, acquired in self._owned.items() if gid not in resident and acquired < grace_start]
+        if idle:
+            await self.db.game_leases.delete_many({"owner": self.worker_id, "game_id": {"$in": idle}})
+            for game_id in idle:
+                await self._forget(game_id)
+
+        if not self._owned:
+            return
+        owned = list(self._owned)
+        await self.db.game_leases.update_many(
+            {"owner": self.worker_id, "game_id": {"$in": owned}},
+            {"$set": {"expires_at": now + timedelta(seconds=self.lease_seconds)}}
+        )
+        held = set()
+        async for lease in self.db.game_leases.find({"owner": self.worker_id}, {"game_id": 1}):
+            held.add(lease["game_id"])
+        for game_id in owned:
+            if game_id not in held:
+                # Taken over after our lease expired: the new owner's copy
+                # is authoritative, so ours is dropped unflushed
+                LEASES_LOST.inc()
+                logger.warning(f"Lost ownership of game {game_id}")
+                self.cache.discard(game_id)
+                await self._forget(game_id)
+
+    async def _forget(self, game_id: str) -> None:
+        self._owned.pop(game_id, None)
+        OWNED_GAMES.set(len(self._owned))
+        for listener in self._release_listeners:
+            try:
+                await listener(game_id)
+            except Exception as e:
+                logger.error(f"Error in release listener for game {game_id}: {e}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._renew_loop())
+
+    async def stop(self) -> None:
+        """Stop renewing and hand every lease back for immediate takeover"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.db.game_leases.delete_many({"owner": self.worker_id})
+        self._owned.clear()
+        OWNED_GAMES.set(0)
+
+    async def _renew_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.renew()
+            except Exception as e:
+                logger.error(f"Error renewing game leases: {e}")
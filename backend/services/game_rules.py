@@ -0,0 +1,352 @@
+from typing import List, Optional, Sequence, Tuple
+from models.game import GameState, Player, Unit, Building
+from services.game_data import INITIAL_RESOURCES
+from services.rule_tables import UNIT_RULES, BUILDING_RULES, missing_resource, pay
+from services.spatial_index import get_spatial_index
+from services.pathfinding import get_navigator
+from services.influence import get_influence
+from services import economy
+from services import unit_arrays
+import random
+import uuid
+
+# Above this many enemy x player unit pairs the AI runs on NumPy arrays
+VECTORIZE_MIN_PAIRS = 20000
+
+# AI units below this share of their full health fall back when the
+# player's threat on their tile outweighs their own side's
+RETREAT_HEALTH = 0.5
+
+# Pure game rules: every function mutates a GameState in memory and does no
+# I/O, so the same code serves HTTP actions, the simulation loop and event
+# replay. Entity positions, spawns and deaths go through the game's spatial
+# index so it stays in sync without being rebuilt. Results must depend only
+# on the GameState and the arguments: replay relies on it.
+
+# One planned step of an ordered unit: unit id, x, y, order finished
+Move = Tuple[str, int, int, bool]
+
+# Statuses of games that are over and take no more events
+FINISHED_STATUSES = ("victory", "defeat")
+
+
+def new_game(player_name: str, seed: Optional[int] = None) -> GameState:
+    """Starting position: a town hall and three units against the AI's two"""
+    # Create initial player
+    player = Player(
+        id="player1",
+        name=player_name,
+        resources=INITIAL_RESOURCES.copy(),
+        units=[
+            Unit(id="unit1", type="peasant", x=5, y=5, health=50, owner="player"),
+            Unit(id="unit2", type="peasant", x=6, y=5, health=50, owner="player"),
+            Unit(id="unit3", type="soldier", x=7, y=5, health=100, owner="player")
+        ],
+        buildings=[
+            Building(id="building1", type="town_hall", x=5, y=6, health=500, owner="player")
+        ]
+    )
+
+    # Create initial enemy AI
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources=INITIAL_RESOURCES.copy(),
+        units=[
+            Unit(id="enemy_unit1", type="soldier", x=15, y=15, health=100, owner="enemy"),
+            Unit(id="enemy_unit2", type="archer", x=16, y=15, health=80, owner="enemy")
+        ],
+        buildings=[
+            Building(id="enemy_building1", type="town_hall", x=15, y=16, health=500, owner="enemy")
+        ]
+    )
+
+    game_state = GameState(player=player, enemy=enemy)
+    if seed is not None:
+        game_state.seed = seed
+    # Both sides earn income from the moment the game exists
+    player.last_update = enemy.last_update = economy.floor_ms(game_state.created_at)
+    game_state.mark_clean()
+    return game_state
+
+
+def move_units(game_state: GameState, unit_ids: List[str], target_x: int, target_y: int) -> None:
+    """Order player units to walk to target position"""
+    units = []
+    for unit_id in set(unit_ids):
+        unit = game_state.player.get_unit(unit_id)
+        if unit:
+            units.append(unit)
+    if not units:
+        raise ValueError("Units not found")
+    get_navigator(game_state).order(units, (target_x, target_y))
+
+
+def plan_moves(game_state: GameState) -> List[Move]:
+    """Next tile of every unit with a move order, without applying it"""
+    navigator = get_navigator(game_state)
+    moves = []
+    for unit in navigator.moving.values():
+        goal = (unit.target_x, unit.target_y)
+        if (unit.x, unit.y) == goal:
+            moves.append((unit.id, unit.x, unit.y, True))
+            continue
+        step = navigator.next_step(unit)
+        if step is None:
+            # Destination unreachable, drop the order
+            moves.append((unit.id, unit.x, unit.y, True))
+            continue
+        moves.append((unit.id, step[0], step[1], step == goal))
+    return moves
+
+
+def apply_moves(game_state: GameState, moves: Sequence[Move]) -> None:
+    """Put units on their planned tiles and close finished orders"""
+    index = get_spatial_index(game_state)
+    navigator = get_navigator(game_state)
+    for unit_id, x, y, finished in moves:
+        unit = game_state.player.get_unit(unit_id)
+        if not unit:
+            continue
+        index.move("player", "units", unit, x, y)
+        if finished:
+            navigator.arrive(unit)
+
+
+def attack_target(game_state: GameState, attacker_id: str, target_id: str) -> None:
+    """Damage an enemy unit or building with a player unit"""
+    # Find attacker
+    attacker = game_state.player.get_unit(attacker_id)
+    if not attacker:
+        raise ValueError("Attacker not found")
+
+    # Calculate damage
+    damage = UNIT_RULES[attacker.type].attack
+
+    # Find and damage target, enemy units first then buildings
+    kind = "units"
+    target = game_state.enemy.get_unit(target_id)
+    if not target:
+        kind = "buildings"
+        target = game_state.enemy.get_building(target_id)
+    if not target:
+        raise ValueError("Target not found")
+
+    target.health = max(0, target.health - damage)
+    get_spatial_index(game_state).touch("enemy", kind, target)
+
+    # Remove destroyed units/buildings
+    remove_dead(game_state, "enemy")
+
+
+def build_building(
+    game_state: GameState, building_type: str, x: int, y: int, building_id: Optional[str] = None
+) -> Building:
+    """Pay for and place a new player building"""
+    rules = BUILDING_RULES[building_type]
+
+    # Check if player can afford
+    missing = missing_resource(game_state.player.resources, rules.cost_items)
+    if missing:
+        raise ValueError(f"Insufficient {missing}")
+
+    # Check if position is free
+    index = get_spatial_index(game_state)
+    if index.occupied(x, y):
+        raise ValueError("Position occupied")
+
+    # Deduct resources
+    pay(game_state.player.resources, rules.cost_items)
+
+    # Create building
+    new_building = Building(
+        id=building_id or str(uuid.uuid4()),
+        type=building_type,
+        x=x,
+        y=y,
+        health=rules.health,
+        owner="player"
+    )
+
+    game_state.player.add_building(new_building)
+    economy.building_added(game_state.player, new_building)
+    index.add("player", "buildings", new_building)
+    _obstacles_changed(game_state)
+    return new_building
+
+
+def check_unit_production(game_state: GameState, building_id: str, unit_type: str) -> Building:
+    """Raise unless a player building can produce and afford a unit now"""
+    # Find building
+    building = game_state.player.get_building(building_id)
+    if not building:
+        raise ValueError("Building not found")
+
+    # Check if building can produce this unit
+    if unit_type not in BUILDING_RULES[building.type].produces:
+        raise ValueError("Building cannot produce this unit")
+
+    cost = UNIT_RULES[unit_type].cost_items
+
+    # Check if player can afford
+    missing = missing_resource(game_state.player.resources, cost)
+    if missing:
+        raise ValueError(f"Insufficient {missing}")
+
+    return building
+
+
+def pay_for_unit(game_state: GameState, building_id: str, unit_type: str) -> Building:
+    """Check that a player building can produce a unit and deduct its cost"""
+    building = check_unit_production(game_state, building_id, unit_type)
+    pay(game_state.player.resources, UNIT_RULES[unit_type].cost_items)
+    return building
+
+
+def spawn_unit(game_state: GameState, building_id: str, unit_type: str, unit_id: Optional[str] = None) -> Unit:
+    """Add a freshly produced player unit next to its building"""
+    # Find building
+    building = game_state.player.get_building(building_id)
+    if not building:
+        raise ValueError("Building not found")
+
+    # Create unit
+    new_unit = Unit(
+        id=unit_id or str(uuid.uuid4()),
+        type=unit_type,
+        x=building.x + 1,
+        y=building.y,
+        health=UNIT_RULES[unit_type].health,
+        owner="player"
+    )
+
+    game_state.player.add_unit(new_unit)
+    get_spatial_index(game_state).add("player", "units", new_unit)
+    return new_unit
+
+
+def remove_dead(game_state: GameState, side: str) -> None:
+    """Drop destroyed units and buildings of one side"""
+    player = getattr(game_state, side)
+    index = get_spatial_index(game_state)
+    for kind in ("units", "buildings"):
+        entities = getattr(player, kind)
+        dead = [e for e in entities if e.health <= 0]
+        if not dead:
+            continue
+        for entity in dead:
+            index.remove(side, kind, entity)
+        setattr(player, kind, [e for e in entities if e.health > 0])
+
+        navigator = game_state._navigator
+        if navigator is not None:
+            if kind == "buildings":
+                _obstacles_changed(game_state)
+            else:
+                for unit in dead:
+                    navigator.forget(unit)
+
+
+def settle_outcome(game_state: GameState) -> None:
+    """End a playing game once one side has no units or buildings left"""
+    if game_state.game_status != "playing":
+        return
+    if not game_state.enemy.units and not game_state.enemy.buildings:
+        game_state.game_status = "victory"
+    elif not game_state.player.units and not game_state.player.buildings:
+        game_state.game_status = "defeat"
+
+
+def _obstacles_changed(game_state: GameState) -> None:
+    # Cached flow fields and paths route around the old set of buildings
+    if game_state._navigator is not None:
+        game_state._navigator.invalidate()
+
+
+def retreat(game_state: GameState, movers: List[bool]) -> None:
+    """Move wounded, outmatched AI movers to their safest neighbouring tile.
+
+    Threat comes from the game's influence map as it stood at the start
+    of the turn. A unit only steps onto a free tile it could walk to.
+    Units that fall back are cleared from `movers`; those with no safer
+    tile in reach fight on.
+    """
+    enemy_units = game_state.enemy.units
+    wounded = [
+        i for i, moves in enumerate(movers)
+        if moves and enemy_units[i].health < UNIT_RULES[enemy_units[i].type].health * RETREAT_HEALTH
+    ]
+    if not wounded or not game_state.player.units:
+        return
+
+    influence = get_influence(game_state)
+    index = get_spatial_index(game_state)
+    navigator = get_navigator(game_state)
+    for i in wounded:
+        unit = enemy_units[i]
+        danger = influence.threat_at("player", unit.x, unit.y)
+        if danger <= influence.threat_at("enemy", unit.x, unit.y):
+            continue
+        safest = None
+        # Same steps as a move order: no buildings, no corner cutting, no stacking
+        for x, y in navigator.neighbors((unit.x, unit.y)):
+            if index.occupied(x, y):
+                continue
+            threat = influence.threat_at("player", x, y)
+            if threat < danger:
+                danger, safest = threat, (x, y)
+        if safest is not None:
+            index.move("enemy", "units", unit, *safest)
+            movers[i] = False
+
+
+def ai_turn(game_state: GameState, rng: random.Random = random) -> None:
+    """Simple AI: randomly move units towards player, wounded ones fall back"""
+    # 30% chance to move, drawn in unit order so both paths replay identically
+    movers = [rng.random() < 0.3 for _ in game_state.enemy.units]
+    # Before either path, so both see the same units advance
+    retreat(game_state, movers)
+
+    if len(game_state.enemy.units) * len(game_state.player.units) >= VECTORIZE_MIN_PAIRS:
+        unit_arrays.ai_step(game_state, movers)
+        remove_dead(game_state, "player")
+        return
+
+    index = get_spatial_index(game_state)
+    player_units = index.layer("player", "units")
+    list_order = {u.id: i for i, u in enumerate(game_state.player.units)}
+    for unit, moves in zip(game_state.enemy.units, movers):
+        if moves:
+            # Find nearest player unit
+            nearest = player_units.nearest(unit.x, unit.y)
+            nearest_target = nearest[0] if nearest else None
+            if nearest_target:
+                # Ties go to the unit listed first, like the vectorized path,
+                # so the choice does not depend on grid bucket order
+                distance = abs(nearest_target.x - unit.x) + abs(nearest_target.y - unit.y)
+                tied = player_units.in_range(unit.x, unit.y, distance)
+                nearest_target = min(tied, key=lambda u: list_order[u.id])
+
+            if nearest_target:
+                # Move towards target
+                x, y = unit.x, unit.y
+                if x < nearest_target.x:
+                    x = min(x + 1, 19)
+                elif x > nearest_target.x:
+                    x = max(x - 1, 0)
+
+                if y < nearest_target.y:
+                    y = min(y + 1, 19)
+                elif y > nearest_target.y:
+                    y = max(y - 1, 0)
+
+                index.move("enemy", "units", unit, x, y)
+
+                # Attack if in range
+                if abs(unit.x - nearest_target.x) <= 1 and abs(unit.y - nearest_target.y) <= 1:
+                    damage = UNIT_RULES[unit.type].attack
+                    nearest_target.health = max(0, nearest_target.health - damage)
+                    index.touch("player", "units", nearest_target)
+
+    # Remove dead units
+    remove_dead(game_state, "player")
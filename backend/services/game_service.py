@@ -1,359 +1,395 @@
-from typing import List, Optional, Dict
+from typing import Any, Awaitable, Callable, List, Optional, Dict, Union
 from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from models.game import GameState, Player, Unit, Building, GameAction, UnitProduction
-from services.game_data import UNIT_STATS, BUILDING_STATS, INITIAL_RESOURCES, RESOURCE_GENERATION
-import random
+from models.game import (
+    GameState, GameAction, UnitProduction, GameActionRequest,
+    GameSummaryPage, CommandResult, CommandBatchResult
+)
+from services.rule_tables import UNIT_RULES
+from services import economy
+from services.game_cache import GameStateCache
+from services.production_scheduler import ProductionScheduler
+from services.game_actor import GameActorRegistry
+from services.event_store import EventStore, apply_event, spawn_event
+from services.archiver import GameArchiver
+from services import game_rules
+from services.metrics import registry
+from storage.base import Storage
+import base64
+import contextvars
+import functools
+import json
+import time
+import uuid
+
+# A change to one loaded game, run by `run_command`
+Command = Callable[[GameState], Awaitable[Any]]
+
+SERVICE_SECONDS = registry.histogram(
+    "rts_game_service_seconds",
+    "GameService time by public method and phase: load, mutate, persist, or the total call",
+    ["method", "phase"]
+)
+
+# Public method being served, the label of the load/mutate/persist spans
+# under it. Actors load and save batches outside any request and label
+# them get_game / update_game.
+_method: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("game_service_method", default=None)
+
+def _timed(fn):
+    """Time a public GameService method and label the spans it runs"""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _method.set(name)
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            SERVICE_SECONDS.observe(time.perf_counter() - started, method=name, phase="total")
+            _method.reset(token)
+
+    return wrapper
 
 class GameService:
-    def __init__(self, db: AsyncIOMotorDatabase):
-        self.db = db
+    def __init__(
+        self,
+        storage: Storage,
+        cache: Optional[GameStateCache] = None,
+        scheduler: Optional[ProductionScheduler] = None,
+        actors: Optional[GameActorRegistry] = None,
+        events: Optional[EventStore] = None,
+        archiver: Optional[GameArchiver] = None
+    ):
+        self.storage = storage
+        self.cache = cache
+        self.scheduler = scheduler
+        self.actors = actors
+        self.events = events
+        self.archiver = archiver
     
+    @_timed
     async def create_game(self, player_name: str) -> GameState:
         """Create a new game session"""
-        # Create initial player
-        player = Player(
-            id="player1",
-            name=player_name,
-            resources=INITIAL_RESOURCES.copy(),
-            units=[
-                Unit(id="unit1", type="peasant", x=5, y=5, health=50, owner="player"),
-                Unit(id="unit2", type="peasant", x=6, y=5, health=50, owner="player"),
-                Unit(id="unit3", type="soldier", x=7, y=5, health=100, owner="player")
-            ],
-            buildings=[
-                Building(id="building1", type="town_hall", x=5, y=6, health=500, owner="player")
-            ]
-        )
-        
-        # Create initial enemy AI
-        enemy = Player(
-            id="enemy1",
-            name="IA",
-            resources=INITIAL_RESOURCES.copy(),
-            units=[
-                Unit(id="enemy_unit1", type="soldier", x=15, y=15, health=100, owner="enemy"),
-                Unit(id="enemy_unit2", type="archer", x=16, y=15, health=80, owner="enemy")
-            ],
-            buildings=[
-                Building(id="enemy_building1", type="town_hall", x=15, y=16, health=500, owner="enemy")
-            ]
-        )
-        
-        game_state = GameState(
-            player=player,
-            enemy=enemy
-        )
+        game_state = game_rules.new_game(player_name)
         
         # Save to database
-        await self.db.games.insert_one(game_state.dict())
+        await self.storage.games.insert(game_state)
+        if self.cache is not None:
+            self.cache.put(game_state, dirty=False)
+        if self.events is not None:
+            # Event 0: every replay of this game starts here
+            self.events.snapshot(game_state)
+            await self.events.commit()
         return game_state
     
     async def get_game(self, game_id: str) -> Optional[GameState]:
-        """Get game state by ID"""
-        game_doc = await self.db.games.find_one({"id": game_id})
-        if game_doc:
-            return GameState(**game_doc)
-        return None
+        """Get game state by ID, with income credited up to now.
+        
+        Archived games are restored first.
+        """
+        with SERVICE_SECONDS.time(method=_method.get() or "get_game", phase="load"):
+            if self.cache is not None:
+                game_state = await self.cache.get(game_id)
+            else:
+                game_state = await self.storage.games.get(game_id)
+            if game_state is None and self.archiver is not None:
+                game_state = await self.archiver.restore(game_id)
+        if game_state is not None:
+            economy.accrue(game_state, datetime.utcnow())
+        return game_state
     
     async def update_game(self, game_state: GameState) -> GameState:
         """Update game state in database"""
         game_state.updated_at = datetime.utcnow()
-        await self.db.games.replace_one(
-            {"id": game_state.id}, 
-            game_state.dict()
-        )
+        with SERVICE_SECONDS.time(method=_method.get() or "update_game", phase="persist"):
+            if self.cache is not None:
+                # Written back by the cache's periodic flush
+                self.cache.mark_dirty(game_state)
+                return game_state
+            await self.storage.games.save([game_state])
         return game_state
     
-    async def move_units(self, game_id: str, unit_ids: List[str], target_x: int, target_y: int) -> GameState:
-        """Move units to target position"""
+    async def run_command(self, game_id: str, command: Command) -> Any:
+        """Apply a command to a game and save it.
+
+        With an actor registry the command is queued on the game's actor, so
+        commands on one game never interleave.
+        """
+        command = _mutate_span(command, _method.get() or "run_command")
+        if self.actors is not None:
+            return await self.actors.submit(game_id, command)
         game_state = await self.get_game(game_id)
         if not game_state:
             raise ValueError("Game not found")
-        
-        # Move units
-        for unit in game_state.player.units:
-            if unit.id in unit_ids:
-                unit.x = target_x
-                unit.y = target_y
-        
-        # Log action
-        action = GameAction(
-            game_id=game_id,
-            action_type="move",
-            unit_id=unit_ids[0] if unit_ids else None,
-            target_x=target_x,
-            target_y=target_y
-        )
-        await self.db.game_actions.insert_one(action.dict())
-        
-        return await self.update_game(game_state)
+        result = await command(game_state)
+        await self.update_game(game_state)
+        return result
+    
+    async def _apply(self, game_state: GameState, event: GameAction) -> None:
+        """Apply an event to a game and log it"""
+        if self.events is not None:
+            self.events.apply(game_state, event)
+            await self.events.commit()
+        else:
+            apply_event(game_state, event)
+            await self.storage.actions.append([event])
     
+    @_timed
+    async def move_units(self, game_id: str, unit_ids: List[str], target_x: int, target_y: int) -> GameState:
+        """Move units to target position"""
+        return await self.run_command(game_id, self._move_command(game_id, unit_ids, target_x, target_y))
+    
+    def _move_command(self, game_id: str, unit_ids: List[str], target_x: int, target_y: int) -> Command:
+        async def command(game_state: GameState) -> GameState:
+            await self._apply(game_state, GameAction(
+                game_id=game_id,
+                action_type="move",
+                unit_id=unit_ids[0] if unit_ids else None,
+                unit_ids=unit_ids,
+                target_x=target_x,
+                target_y=target_y
+            ))
+            return game_state
+        
+        return command
+    
+    @_timed
     async def attack_target(self, game_id: str, attacker_id: str, target_id: str) -> GameState:
         """Attack a target unit or building"""
-        game_state = await self.get_game(game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        # Find attacker
-        attacker = None
-        for unit in game_state.player.units:
-            if unit.id == attacker_id:
-                attacker = unit
-                break
-        
-        if not attacker:
-            raise ValueError("Attacker not found")
-        
-        # Calculate damage
-        attacker_stats = UNIT_STATS[attacker.type]
-        damage = attacker_stats["attack"]
-        
-        # Find and damage target
-        target_found = False
-        
-        # Check enemy units
-        for unit in game_state.enemy.units:
-            if unit.id == target_id:
-                unit.health = max(0, unit.health - damage)
-                target_found = True
-                break
-        
-        # Check enemy buildings
-        if not target_found:
-            for building in game_state.enemy.buildings:
-                if building.id == target_id:
-                    building.health = max(0, building.health - damage)
-                    target_found = True
-                    break
-        
-        if not target_found:
-            raise ValueError("Target not found")
-        
-        # Remove destroyed units/buildings
-        game_state.enemy.units = [u for u in game_state.enemy.units if u.health > 0]
-        game_state.enemy.buildings = [b for b in game_state.enemy.buildings if b.health > 0]
-        
-        # Log action
-        action = GameAction(
-            game_id=game_id,
-            action_type="attack",
-            unit_id=attacker_id,
-            target_id=target_id
-        )
-        await self.db.game_actions.insert_one(action.dict())
-        
-        return await self.update_game(game_state)
+        return await self.run_command(game_id, self._attack_command(game_id, attacker_id, target_id))
+    
+    def _attack_command(self, game_id: str, attacker_id: str, target_id: str) -> Command:
+        async def command(game_state: GameState) -> GameState:
+            await self._apply(game_state, GameAction(
+                game_id=game_id,
+                action_type="attack",
+                unit_id=attacker_id,
+                target_id=target_id
+            ))
+            return game_state
+        
+        return command
     
+    @_timed
     async def build_building(self, game_id: str, building_type: str, x: int, y: int) -> GameState:
         """Build a new building"""
-        game_state = await self.get_game(game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        building_stats = BUILDING_STATS[building_type]
-        
-        # Check if player can afford
-        for resource, cost in building_stats["cost"].items():
-            if game_state.player.resources.get(resource, 0) < cost:
-                raise ValueError(f"Insufficient {resource}")
-        
-        # Check if position is free
-        occupied = any(
-            (entity.x == x and entity.y == y)
-            for entity in game_state.player.units + game_state.player.buildings + 
-                         game_state.enemy.units + game_state.enemy.buildings
-        )
-        
-        if occupied:
-            raise ValueError("Position occupied")
-        
-        # Deduct resources
-        for resource, cost in building_stats["cost"].items():
-            game_state.player.resources[resource] -= cost
-        
-        # Create building
-        new_building = Building(
-            type=building_type,
-            x=x,
-            y=y,
-            health=building_stats["health"],
-            owner="player"
-        )
-        
-        game_state.player.buildings.append(new_building)
-        
-        # Log action
-        action = GameAction(
-            game_id=game_id,
-            action_type="build",
-            build_type=building_type,
-            target_x=x,
-            target_y=y
-        )
-        await self.db.game_actions.insert_one(action.dict())
-        
-        return await self.update_game(game_state)
+        return await self.run_command(game_id, self._build_command(game_id, building_type, x, y))
+    
+    def _build_command(self, game_id: str, building_type: str, x: int, y: int) -> Command:
+        async def command(game_state: GameState) -> GameState:
+            # The new building's id is part of the event so replay recreates it
+            await self._apply(game_state, GameAction(
+                game_id=game_id,
+                action_type="build",
+                build_type=building_type,
+                building_id=str(uuid.uuid4()),
+                target_x=x,
+                target_y=y
+            ))
+            return game_state
+        
+        return command
     
+    @_timed
     async def produce_unit(self, game_id: str, building_id: str, unit_type: str) -> UnitProduction:
         """Start unit production"""
-        game_state = await self.get_game(game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        # Find building
-        building = None
-        for b in game_state.player.buildings:
-            if b.id == building_id:
-                building = b
-                break
-        
-        if not building:
-            raise ValueError("Building not found")
-        
-        # Check if building can produce this unit
-        building_stats = BUILDING_STATS[building.type]
-        if unit_type not in building_stats.get("produces", []):
-            raise ValueError("Building cannot produce this unit")
-        
-        unit_stats = UNIT_STATS[unit_type]
-        
-        # Check if player can afford
-        for resource, cost in unit_stats["cost"].items():
-            if game_state.player.resources.get(resource, 0) < cost:
-                raise ValueError(f"Insufficient {resource}")
-        
-        # Deduct resources
-        for resource, cost in unit_stats["cost"].items():
-            game_state.player.resources[resource] -= cost
-        
-        # Create production order
-        production = UnitProduction(
-            game_id=game_id,
-            building_id=building_id,
-            unit_type=unit_type,
-            start_time=datetime.utcnow(),
-            end_time=datetime.utcnow() + timedelta(milliseconds=unit_stats["buildTime"])
-        )
-        
-        await self.db.unit_productions.insert_one(production.dict())
-        await self.update_game(game_state)
-        
-        return production
+        return await self.run_command(game_id, self._produce_command(game_id, building_id, unit_type))
     
+    def _produce_command(self, game_id: str, building_id: str, unit_type: str) -> Command:
+        async def command(game_state: GameState) -> UnitProduction:
+            # Nothing is paid or stored until the whole order can go through
+            game_rules.check_unit_production(game_state, building_id, unit_type)
+            
+            # Create production order, queued behind the building's current orders
+            start_time = datetime.utcnow()
+            if self.scheduler is not None:
+                start_time = self.scheduler.next_start(game_id, building_id, start_time)
+            production = UnitProduction(
+                game_id=game_id,
+                building_id=building_id,
+                unit_type=unit_type,
+                start_time=start_time,
+                end_time=start_time + timedelta(milliseconds=UNIT_RULES[unit_type].build_time_ms)
+            )
+            
+            await self.storage.productions.insert(production)
+            try:
+                await self._apply(game_state, GameAction(
+                    game_id=game_id,
+                    action_type="produce",
+                    building_id=building_id,
+                    unit_type=unit_type
+                ))
+            except Exception:
+                # Claimed orders never spawn; the expiry sweep removes them
+                await self.storage.productions.claim(production.id)
+                raise
+            if self.scheduler is not None:
+                self.scheduler.schedule(production)
+            return production
+        
+        return command
+    
+    @_timed
     async def complete_unit_production(self, production_id: str) -> GameState:
         """Complete unit production and add unit to game"""
-        production_doc = await self.db.unit_productions.find_one({"id": production_id})
-        if not production_doc:
+        # Claim the production atomically so the simulation loop and a
+        # manual completion can never both spawn the unit
+        production = await self.storage.productions.claim(production_id)
+        if not production:
+            if await self.storage.productions.get(production_id):
+                raise ValueError("Production already completed")
             raise ValueError("Production not found")
         
-        production = UnitProduction(**production_doc)
-        
-        if production.completed:
-            raise ValueError("Production already completed")
-        
-        game_state = await self.get_game(production.game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        # Find building
-        building = None
-        for b in game_state.player.buildings:
-            if b.id == production.building_id:
-                building = b
-                break
-        
-        if not building:
-            raise ValueError("Building not found")
-        
-        # Create unit
-        unit_stats = UNIT_STATS[production.unit_type]
-        new_unit = Unit(
-            type=production.unit_type,
-            x=building.x + 1,
-            y=building.y,
-            health=unit_stats["health"],
-            owner="player"
-        )
+        if self.scheduler is not None:
+            self.scheduler.discard(production.id)
         
-        game_state.player.units.append(new_unit)
+        async def command(game_state: GameState) -> GameState:
+            await self._apply(game_state, spawn_event(production))
+            return game_state
         
-        # Mark production as completed
-        production.completed = True
-        await self.db.unit_productions.replace_one(
-            {"id": production_id},
-            production.dict()
-        )
-        
-        return await self.update_game(game_state)
+        return await self.run_command(production.game_id, command)
     
+    @_timed
     async def update_resources(self, game_id: str) -> GameState:
-        """Update player resources based on buildings"""
-        game_state = await self.get_game(game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        # Calculate resource generation
-        for building in game_state.player.buildings:
-            if building.type in RESOURCE_GENERATION:
-                generation = RESOURCE_GENERATION[building.type]
-                for resource, amount in generation.items():
-                    game_state.player.resources[resource] += amount
+        """Credit income due so far; reads already do, kept for older clients"""
+        async def command(game_state: GameState) -> GameState:
+            await self._apply(game_state, GameAction(game_id=game_id, action_type="resources"))
+            return game_state
         
-        return await self.update_game(game_state)
+        return await self.run_command(game_id, command)
     
+    @_timed
     async def ai_turn(self, game_id: str) -> GameState:
         """Execute AI turn"""
-        game_state = await self.get_game(game_id)
-        if not game_state:
-            raise ValueError("Game not found")
-        
-        # Simple AI: randomly move units towards player
-        for unit in game_state.enemy.units:
-            if random.random() < 0.3:  # 30% chance to move
-                # Find nearest player unit
-                nearest_target = None
-                min_distance = float('inf')
-                
-                for player_unit in game_state.player.units:
-                    distance = abs(unit.x - player_unit.x) + abs(unit.y - player_unit.y)
-                    if distance < min_distance:
-                        min_distance = distance
-                        nearest_target = player_unit
-                
-                if nearest_target:
-                    # Move towards target
-                    if unit.x < nearest_target.x:
-                        unit.x = min(unit.x + 1, 19)
-                    elif unit.x > nearest_target.x:
-                        unit.x = max(unit.x - 1, 0)
-                    
-                    if unit.y < nearest_target.y:
-                        unit.y = min(unit.y + 1, 19)
-                    elif unit.y > nearest_target.y:
-                        unit.y = max(unit.y - 1, 0)
-                    
-                    # Attack if in range
-                    if abs(unit.x - nearest_target.x) <= 1 and abs(unit.y - nearest_target.y) <= 1:
-                        unit_stats = UNIT_STATS[unit.type]
-                        damage = unit_stats["attack"]
-                        nearest_target.health = max(0, nearest_target.health - damage)
+        async def command(game_state: GameState) -> GameState:
+            await self._apply(game_state, GameAction(game_id=game_id, action_type="ai_turn"))
+            return game_state
         
-        # Remove dead units
-        game_state.player.units = [u for u in game_state.player.units if u.health > 0]
-        
-        return await self.update_game(game_state)
+        return await self.run_command(game_id, command)
+    
+    @_timed
+    async def replay_game(self, game_id: str, seq: Optional[int] = None) -> GameState:
+        """Rebuild a game from its snapshots and event log"""
+        if self.events is None:
+            raise ValueError("Event sourcing is not enabled")
+        if self.archiver is not None:
+            # An archived game's log comes back with it
+            await self.get_game(game_id)
+        return await self.events.rebuild(game_id, seq)
+    
+    @_timed
+    async def execute_action(self, game_id: str, action: GameActionRequest) -> Union[GameState, UnitProduction]:
+        """Dispatch a generic action request to the matching game method"""
+        return await self.run_command(game_id, self._action_command(game_id, action))
     
+    @_timed
+    async def execute_commands(self, game_id: str, actions: List[GameActionRequest]) -> CommandBatchResult:
+        """Apply actions in order against one loaded game, saved once.
+        
+        A failing action is reported in its result and does not stop the
+        ones after it.
+        """
+        commands: List[Union[Command, Exception]] = []
+        for action in actions:
+            try:
+                commands.append(self._action_command(game_id, action))
+            except ValueError as e:
+                commands.append(e)
+        
+        async def command(game_state: GameState) -> CommandBatchResult:
+            results = []
+            for item in commands:
+                if isinstance(item, Exception):
+                    results.append(CommandResult(ok=False, error=str(item)))
+                    continue
+                try:
+                    result = await item(game_state)
+                except Exception as e:
+                    results.append(CommandResult(ok=False, error=str(e)))
+                    continue
+                production = result if isinstance(result, UnitProduction) else None
+                results.append(CommandResult(ok=True, production=production))
+            return CommandBatchResult(results=results, game=game_state)
+        
+        return await self.run_command(game_id, command)
+    
+    def _action_command(self, game_id: str, action: GameActionRequest) -> Command:
+        if action.action_type == "move":
+            unit_ids = action.unit_ids or ([action.unit_id] if action.unit_id else [])
+            if action.target_x is None or action.target_y is None:
+                raise ValueError("Move requires target_x and target_y")
+            return self._move_command(game_id, unit_ids, action.target_x, action.target_y)
+        if action.action_type == "attack":
+            if not action.unit_id or not action.target_id:
+                raise ValueError("Attack requires unit_id and target_id")
+            return self._attack_command(game_id, action.unit_id, action.target_id)
+        if action.action_type == "build":
+            if not action.build_type or action.target_x is None or action.target_y is None:
+                raise ValueError("Build requires build_type, target_x and target_y")
+            return self._build_command(game_id, action.build_type, action.target_x, action.target_y)
+        if action.action_type == "produce":
+            if not action.building_id or not action.unit_type:
+                raise ValueError("Produce requires building_id and unit_type")
+            return self._produce_command(game_id, action.building_id, action.unit_type)
+        raise ValueError(f"Unknown action type: {action.action_type}")
+    
+    @_timed
     async def get_pending_productions(self, game_id: str) -> List[UnitProduction]:
         """Get all pending unit productions for a game"""
-        productions = await self.db.unit_productions.find({
-            "game_id": game_id,
-            "completed": False
-        }).to_list(100)
-        
-        return [UnitProduction(**p) for p in productions]
+        return await self.storage.productions.pending(game_id, limit=100)
     
+    @_timed
     async def list_games(self) -> List[GameState]:
         """List all games"""
-        games = await self.db.games.find().to_list(100)
-        return [GameState(**g) for g in games]
\ No newline at end of file
+        games = await self.storage.games.list(100)
+        result = []
+        for g in games:
+            # Resident games may hold changes that are not flushed yet
+            resident = self.cache.peek(g.id) if self.cache is not None else None
+            result.append(resident or g)
+        return result
+    
+    @_timed
+    async def list_game_summaries(self, limit: int = 50, cursor: Optional[str] = None) -> GameSummaryPage:
+        """List games newest first without loading their units or buildings"""
+        after = _decode_cursor(cursor) if cursor else None
+        # One extra row tells whether there is a next page
+        summaries = await self.storage.games.summaries(limit + 1, after)
+        
+        for summary in summaries:
+            # Resident games may have changed status since their last flush
+            resident = self.cache.peek(summary.id) if self.cache is not None else None
+            if resident is not None:
+                summary.game_status = resident.game_status
+        
+        next_cursor = None
+        if len(summaries) > limit:
+            summaries = summaries[:limit]
+            last = summaries[-1]
+            next_cursor = _encode_cursor(last.updated_at, last.id)
+        return GameSummaryPage(games=summaries, next_cursor=next_cursor)
+
+
+def _mutate_span(command: Command, method: str) -> Command:
+    # Times the command alone, wherever it runs: the actor applies it
+    # outside the caller's context
+    async def timed(game_state: GameState) -> Any:
+        with SERVICE_SECONDS.time(method=method, phase="mutate"):
+            return await command(game_state)
+
+    return timed
+
+
+def _encode_cursor(updated_at: datetime, game_id: str) -> str:
+    raw = json.dumps([updated_at.isoformat(), game_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        updated_at, game_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(updated_at), str(game_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
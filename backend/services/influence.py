@@ -0,0 +1,160 @@
+from typing import Dict, List, Tuple
+from models.game import GameState
+from services.rule_tables import UNIT_RULES, BUILDING_RULES
+from services.spatial_index import Entity, get_spatial_index
+import numpy as np
+
+# Influence grids for AI decisions: for each side, the threat it projects
+# (attack of nearby units) and the value it exposes (cost of nearby units
+# and buildings) on every tile. An entity spreads its amount over the
+# tiles within INFLUENCE_RADIUS (Chebyshev), weighted radius + 1 - distance,
+# so grids stay integer and removing a stamp is exact. The AI reads the
+# player's threat to pull wounded units back (see game_rules.retreat).
+
+INFLUENCE_RADIUS = 3
+
+SIDES = ("player", "enemy")
+THREAT = 0
+VALUE = 1
+
+# Stamp of one entity: grid channel of its side, tile, threat and value
+Stamp = Tuple[int, int, int, int, int]
+
+
+def entity_amounts(kind: str, entity: Entity) -> Tuple[int, int]:
+    """Threat and value an entity contributes at its own tile, per unit of weight"""
+    if kind == "units":
+        rules = UNIT_RULES.get(entity.type)
+        return (rules.attack, sum(rules.cost)) if rules else (0, 0)
+    rules = BUILDING_RULES.get(entity.type)
+    return (0, sum(rules.cost)) if rules else (0, 0)
+
+
+class InfluenceMap:
+    """Threat and value grids of both sides, updated from the entities that changed.
+
+    Grids are indexed [y, x]. The game's spatial index records every
+    entity added, moved or removed; `sync` lifts each changed entity's old
+    stamp, lays its new one as point amounts and spreads only those
+    deltas by the kernel. Its cost follows the number of changes and the
+    map size, not the army sizes, and reading a tile is O(1).
+    """
+
+    def __init__(self, game_state: GameState, radius: int = INFLUENCE_RADIUS):
+        self.width = game_state.map_size.get("width", 20)
+        self.height = game_state.map_size.get("height", 20)
+        self.radius = radius
+        # Channels: side * 2 + THREAT / VALUE
+        self.grids = np.zeros((len(SIDES) * 2, self.height, self.width), dtype=np.int64)
+        self._offsets: List[Tuple[int, int, int]] = [
+            (dx, dy, radius + 1 - max(abs(dx), abs(dy)))
+            for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+        ]
+        self._kernel = np.array([w for _, _, w in self._offsets], dtype=np.int64).reshape(
+            2 * radius + 1, 2 * radius + 1
+        )
+        self._stamps: Dict[str, Stamp] = {}
+        self._index = get_spatial_index(game_state)
+        self._changes = self._index.track_changes()
+        points = []
+        for side in SIDES:
+            player = getattr(game_state, side)
+            for kind in ("units", "buildings"):
+                for entity in getattr(player, kind):
+                    stamp = self._stamp(side, kind, entity)
+                    if stamp is not None:
+                        self._stamps[entity.id] = stamp
+                        points.append((stamp, 1))
+        self._spread(points)
+
+    def threat(self, side: str) -> np.ndarray:
+        return self.grids[SIDES.index(side) * 2 + THREAT]
+
+    def value(self, side: str) -> np.ndarray:
+        return self.grids[SIDES.index(side) * 2 + VALUE]
+
+    def threat_at(self, side: str, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        return int(self.grids[SIDES.index(side) * 2 + THREAT, y, x])
+
+    def value_at(self, side: str, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        return int(self.grids[SIDES.index(side) * 2 + VALUE, y, x])
+
+    def sync(self) -> int:
+        """Apply the entity changes recorded since the last sync, returns how many"""
+        changes = self._changes.drain()
+        if not changes:
+            return 0
+        points = []
+        for entity_id, (side, kind, entity) in changes.items():
+            old = self._stamps.pop(entity_id, None)
+            new = self._stamp(side, kind, entity) if entity is not None else None
+            if old == new:
+                if new is not None:
+                    self._stamps[entity_id] = new
+                continue
+            if old is not None:
+                points.append((old, -1))
+            if new is not None:
+                self._stamps[entity_id] = new
+                points.append((new, 1))
+        self._spread(points)
+        return len(changes)
+
+    def _stamp(self, side: str, kind: str, entity: Entity):
+        if not (0 <= entity.x < self.width and 0 <= entity.y < self.height):
+            return None
+        threat, value = entity_amounts(kind, entity)
+        return (SIDES.index(side) * 2, entity.x, entity.y, threat, value)
+
+    def _spread(self, points: List[Tuple[Stamp, int]]) -> None:
+        """Add signed stamps to the grids"""
+        if len(points) <= len(self._offsets):
+            # Fewer stamps than kernel offsets: lay each kernel directly
+            for stamp, sign in points:
+                self._lay(stamp, sign)
+            return
+        # Otherwise amounts at their tiles first, then one pass per offset
+        channels, height, width = self.grids.shape
+        cells = height * width
+        # Threat goes to the side's threat channel, value to the one after it
+        flat = np.fromiter(
+            (c * cells + y * width + x for (c, x, y, _, _), _ in points), dtype=np.int64, count=len(points)
+        )
+        amounts = np.fromiter(
+            (amount * sign for (_, _, _, threat, value), sign in points for amount in (threat, value)),
+            dtype=np.int64, count=2 * len(points)
+        )
+        flat = np.stack((flat + THREAT * cells, flat + VALUE * cells), axis=1).ravel()
+        delta = np.bincount(flat, weights=amounts, minlength=channels * cells)
+        delta = delta.round().astype(np.int64).reshape(channels, height, width)
+        for dx, dy, weight in self._offsets:
+            # Tiles at (x + dx, y + dy) receive weight * the amount at (x, y)
+            self.grids[:, max(0, dy):height + min(0, dy), max(0, dx):width + min(0, dx)] += (
+                weight * delta[:, max(0, -dy):height - max(0, dy), max(0, -dx):width - max(0, dx)]
+            )
+
+    def _lay(self, stamp: Stamp, sign: int) -> None:
+        channel, x, y, threat, value = stamp
+        r = self.radius
+        x0, x1 = max(0, x - r), min(self.width, x + r + 1)
+        y0, y1 = max(0, y - r), min(self.height, y + r + 1)
+        kernel = self._kernel[y0 - (y - r):y1 - (y - r), x0 - (x - r):x1 - (x - r)]
+        if threat:
+            self.grids[channel + THREAT, y0:y1, x0:x1] += sign * threat * kernel
+        if value:
+            self.grids[channel + VALUE, y0:y1, x0:x1] += sign * value * kernel
+
+
+def get_influence(game_state: GameState) -> InfluenceMap:
+    """Return the game's influence map, built on first use and synced on every call"""
+    influence = game_state._influence
+    if influence is None or influence._index is not get_spatial_index(game_state):
+        influence = InfluenceMap(game_state)
+        game_state._influence = influence
+    else:
+        influence.sync()
+    return influence
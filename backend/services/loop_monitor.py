@@ -0,0 +1,44 @@
+from typing import Optional
+from services.metrics import registry
+import asyncio
+
+LOOP_LAG = registry.histogram(
+    "rts_event_loop_lag_seconds", "How late the event loop ran a callback scheduled for a fixed time",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+LOOP_LAG_LAST = registry.gauge("rts_event_loop_lag_last_seconds", "Event loop lag of the latest probe")
+
+
+class EventLoopMonitor:
+    """Measures event loop lag by sleeping `interval` and timing the wake-up.
+
+    Any time past the deadline was spent running other callbacks, so it
+    is how long a ready request would have waited. One timer every
+    `interval` seconds is all it costs.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - deadline)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
@@ -0,0 +1,250 @@
+from typing import Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, deque
+from models.game import GameState, Unit
+from services.metrics import registry
+from services.spatial_index import get_spatial_index
+import heapq
+
+Tile = Tuple[int, int]
+
+# 8-connected moves, orthogonal first so ties prefer straight steps
+NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+UNREACHABLE = -1
+
+FLOW_FIELDS_BUILT = registry.counter("rts_flow_fields_built_total", "Flow fields computed")
+FLOW_FIELD_HITS = registry.counter("rts_flow_field_cache_hits_total", "Flow field cache hits")
+PATH_SEARCHES = registry.counter("rts_path_searches_total", "A* searches for single-unit orders")
+
+
+class FlowField:
+    """Breadth-first distances from every tile to one destination.
+
+    Computed once per destination and shared by every unit heading there:
+    each unit just steps to the neighbouring tile with the lowest distance.
+    """
+
+    __slots__ = ("goal", "width", "distances")
+
+    def __init__(self, goal: Tile, width: int, distances: List[int]):
+        self.goal = goal
+        self.width = width
+        self.distances = distances
+
+    def distance(self, tile: Tile) -> int:
+        return self.distances[tile[1] * self.width + tile[0]]
+
+    def next_step(self, tile: Tile, navigator: "Navigator") -> Optional[Tile]:
+        best = None
+        best_distance = None
+        for neighbor in navigator.neighbors(tile):
+            distance = self.distance(neighbor)
+            if distance == UNREACHABLE:
+                continue
+            if best_distance is None or distance < best_distance:
+                best, best_distance = neighbor, distance
+        return best
+
+
+class Navigator:
+    """Movement planning for one game: buildings are obstacles.
+
+    An order gives every unit its own free tile, the goal or the nearest
+    ones around it, so a group does not pile up on one tile and a building
+    goal becomes the tiles next to it. Group members follow a flow field
+    shared per destination, kept in an LRU cache, until they are among
+    those tiles and then A* to their own; single-unit orders use A* all the
+    way. Every cached field and path is dropped when a building is placed
+    or destroyed.
+    """
+
+    def __init__(self, game_state: GameState, max_fields: int = 32):
+        self.width = game_state.map_size.get("width", 20)
+        self.height = game_state.map_size.get("height", 20)
+        self.max_fields = max_fields
+        self._game_state = game_state
+        self._blocked: Set[Tile] = set()
+        self._fields: "OrderedDict[Tile, FlowField]" = OrderedDict()
+        self._paths: Dict[str, deque] = {}
+        # Group members still on the shared field: group goal and the
+        # distance from it at which they head for their own tile
+        self._via: Dict[str, Tuple[Tile, int]] = {}
+        # Units with an outstanding move order
+        self.moving: Dict[str, Unit] = {
+            unit.id: unit for unit in game_state.player.units if unit.target_x is not None
+        }
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Rebuild obstacles and drop cached fields and paths"""
+        self._blocked = {
+            (b.x, b.y)
+            for side in (self._game_state.player, self._game_state.enemy)
+            for b in side.buildings
+        }
+        self._fields.clear()
+        self._paths.clear()
+
+    def in_bounds(self, tile: Tile) -> bool:
+        return 0 <= tile[0] < self.width and 0 <= tile[1] < self.height
+
+    def passable(self, tile: Tile) -> bool:
+        return self.in_bounds(tile) and tile not in self._blocked
+
+    def neighbors(self, tile: Tile):
+        x, y = tile
+        for dx, dy in NEIGHBORS:
+            neighbor = (x + dx, y + dy)
+            if not self.passable(neighbor):
+                continue
+            # No corner cutting between two obstacles
+            if dx and dy and not (self.passable((x + dx, y)) or self.passable((x, y + dy))):
+                continue
+            yield neighbor
+
+    def flow_field(self, goal: Tile) -> FlowField:
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            FLOW_FIELD_HITS.inc()
+            return field
+
+        distances = [UNREACHABLE] * (self.width * self.height)
+        distances[goal[1] * self.width + goal[0]] = 0
+        frontier = deque([goal])
+        while frontier:
+            tile = frontier.popleft()
+            next_distance = distances[tile[1] * self.width + tile[0]] + 1
+            for neighbor in self.neighbors(tile):
+                offset = neighbor[1] * self.width + neighbor[0]
+                if distances[offset] == UNREACHABLE:
+                    distances[offset] = next_distance
+                    frontier.append(neighbor)
+
+        field = FlowField(goal, self.width, distances)
+        self._fields[goal] = field
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        FLOW_FIELDS_BUILT.inc()
+        return field
+
+    def find_path(self, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+        """A* over the 8-connected grid, returns the tiles after `start`"""
+        PATH_SEARCHES.inc()
+        if start == goal:
+            return []
+        open_heap = [(_chebyshev(start, goal), 0, start)]
+        came_from: Dict[Tile, Tile] = {}
+        cost = {start: 0}
+        while open_heap:
+            _, g, tile = heapq.heappop(open_heap)
+            if tile == goal:
+                path = []
+                while tile != start:
+                    path.append(tile)
+                    tile = came_from[tile]
+                path.reverse()
+                return path
+            if g > cost[tile]:
+                continue
+            for neighbor in self.neighbors(tile):
+                next_cost = g + 1
+                if next_cost < cost.get(neighbor, next_cost + 1):
+                    cost[neighbor] = next_cost
+                    came_from[neighbor] = tile
+                    heapq.heappush(open_heap, (next_cost + _chebyshev(neighbor, goal), next_cost, neighbor))
+        return None
+
+    def order(self, units: List[Unit], goal: Tile) -> None:
+        """Give units a move order, each to its own free tile near the goal"""
+        if not self.in_bounds(goal):
+            raise ValueError("Target outside map")
+        # Sorted so the assignment does not depend on the order ids came in
+        units = sorted(units, key=lambda u: (_chebyshev((u.x, u.y), goal), u.id))
+        tiles = self.free_tiles(goal, len(units), {(u.x, u.y) for u in units})
+        if not tiles:
+            raise ValueError("No free tile near target")
+        if len(units) > 1:
+            # The nearest free tile stands in for a blocked goal
+            center = tiles[0] if not self.passable(goal) else goal
+            self.flow_field(center)
+            radius = max(_chebyshev(tile, center) for tile in tiles)
+        for i, unit in enumerate(units):
+            # More units than free tiles: the extra ones share
+            unit.target_x, unit.target_y = tiles[i % len(tiles)]
+            self._paths.pop(unit.id, None)
+            self._via.pop(unit.id, None)
+            if len(units) > 1:
+                self._via[unit.id] = (center, radius)
+            self.moving[unit.id] = unit
+        if len(units) == 1:
+            unit = units[0]
+            path = self.find_path((unit.x, unit.y), tiles[0])
+            if path is not None:
+                self._paths[unit.id] = deque(path)
+
+    def free_tiles(self, goal: Tile, count: int, own: Set[Tile] = frozenset()) -> List[Tile]:
+        """Up to `count` passable tiles without other entities, nearest to the goal first.
+
+        Tiles in `own` (those of the units being ordered) count as free.
+        Only tiles connected to the goal are considered.
+        """
+        index = get_spatial_index(self._game_state)
+        tiles: List[Tile] = []
+        seen = {goal}
+        frontier = deque([goal])
+        while frontier and len(tiles) < count:
+            tile = frontier.popleft()
+            if self.passable(tile) and (tile in own or not index.occupied(*tile)):
+                tiles.append(tile)
+            for neighbor in self.neighbors(tile):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    frontier.append(neighbor)
+        return tiles
+
+    def next_step(self, unit: Unit) -> Optional[Tile]:
+        """Tile a unit should move to next, None if it cannot progress"""
+        goal = (unit.target_x, unit.target_y)
+        position = (unit.x, unit.y)
+        via = self._via.get(unit.id)
+        if via is not None:
+            center, radius = via
+            if _chebyshev(position, center) > radius + 1:
+                return self.flow_field(center).next_step(position, self)
+            # Close to the group's tiles: a short search to its own
+            del self._via[unit.id]
+            path = self.find_path(position, goal)
+            if path is None:
+                return None
+            self._paths[unit.id] = deque(path)
+        path = self._paths.get(unit.id)
+        if path:
+            step = path.popleft()
+            if self.passable(step) or step == goal:
+                return step
+            self._paths.pop(unit.id, None)
+        field = self.flow_field(goal)
+        return field.next_step(position, self)
+
+    def arrive(self, unit: Unit) -> None:
+        unit.target_x = None
+        unit.target_y = None
+        self.forget(unit)
+
+    def forget(self, unit: Unit) -> None:
+        self.moving.pop(unit.id, None)
+        self._paths.pop(unit.id, None)
+        self._via.pop(unit.id, None)
+
+
+def get_navigator(game_state: GameState) -> Navigator:
+    """Return the game's navigator, building it on first use"""
+    navigator = game_state._navigator
+    if navigator is None:
+        navigator = Navigator(game_state)
+        game_state._navigator = navigator
+    return navigator
+
+
+def _chebyshev(a: Tile, b: Tile) -> int:
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from models.game import UnitProduction
+from services.game_cache import GameStateCache
+from storage.base import ProductionRepository
+from services.metrics import registry
+from services.event_store import EventStore, apply_event, spawn_event
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING_PRODUCTIONS = registry.gauge("rts_productions_pending", "Unit productions waiting in the scheduler")
+PRODUCTIONS_COMPLETED = registry.counter("rts_productions_completed_total", "Unit productions completed")
+PRODUCTIONS_DROPPED = registry.counter(
+    "rts_productions_dropped_total", "Due productions whose building no longer exists"
+)
+
+
+class ProductionScheduler:
+    """Single min-heap of pending unit productions ordered by end_time.
+
+    Each building has a sequential production queue: a new order starts
+    when the building's previous order finishes, so queuing many units is
+    one heap push each. Pending rows are reloaded from the production
+    repository on startup, and due items are completed in one batch per
+    game, with a single storage update for the whole batch.
+    """
+
+    def __init__(self, productions: ProductionRepository, cache: GameStateCache, events: Optional[EventStore] = None):
+        self.productions = productions
+        self.cache = cache
+        self.events = events
+        self._heap: List[Tuple[datetime, str]] = []
+        self._pending: Dict[str, UnitProduction] = {}
+        # End time of the last order queued on each (game, building); building
+        # ids are only unique within a game
+        self._building_tails: Dict[Tuple[str, str], datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self, rehydrate: bool = True) -> None:
+        """Reload productions that never completed.
+
+        Workers that only own some games pass rehydrate=False and load each
+        game's rows with `rehydrate` once they own it.
+        """
+        if rehydrate:
+            await self.rehydrate()
+
+    async def rehydrate(self, game_id: Optional[str] = None) -> int:
+        """Schedule the pending rows of one game, or of all games"""
+        before = len(self._pending)
+        for production in await self.productions.pending(game_id):
+            self.schedule(production)
+        loaded = len(self._pending) - before
+        logger.info(f"Rehydrated {loaded} pending unit productions")
+        return loaded
+
+    def forget_game(self, game_id: str) -> None:
+        """Drop a game's pending productions, e.g. once another worker owns it"""
+        for production_id in [p.id for p in self._pending.values() if p.game_id == game_id]:
+            del self._pending[production_id]
+        for key in [k for k in self._building_tails if k[0] == game_id]:
+            del self._building_tails[key]
+        PENDING_PRODUCTIONS.set(len(self._pending))
+
+    def next_start(self, game_id: str, building_id: str, now: datetime) -> datetime:
+        """When an order placed now on this building would start"""
+        tail = self._building_tails.get((game_id, building_id))
+        return tail if tail and tail > now else now
+
+    def schedule(self, production: UnitProduction) -> None:
+        if production.completed or production.id in self._pending:
+            return
+        self._pending[production.id] = production
+        heapq.heappush(self._heap, (production.end_time, production.id))
+        key = (production.game_id, production.building_id)
+        tail = self._building_tails.get(key)
+        if tail is None or production.end_time > tail:
+            self._building_tails[key] = production.end_time
+        PENDING_PRODUCTIONS.set(len(self._pending))
+
+    def discard(self, production_id: str) -> None:
+        """Forget a production completed elsewhere; its heap slot is skipped lazily"""
+        if self._pending.pop(production_id, None) is not None:
+            PENDING_PRODUCTIONS.set(len(self._pending))
+
+    def pop_due(self, now: datetime) -> List[UnitProduction]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, production_id = heapq.heappop(self._heap)
+            production = self._pending.pop(production_id, None)
+            if production is None:
+                continue
+            due.append(production)
+            key = (production.game_id, production.building_id)
+            if self._building_tails.get(key) == production.end_time:
+                del self._building_tails[key]
+        if due:
+            PENDING_PRODUCTIONS.set(len(self._pending))
+        return due
+
+    async def complete_due(self, now: datetime) -> int:
+        """Spawn the units of every production that has finished by `now`"""
+        due = self.pop_due(now)
+        if not due:
+            return 0
+
+        await self.productions.complete([p.id for p in due])
+
+        by_game: Dict[str, List[UnitProduction]] = {}
+        for production in due:
+            by_game.setdefault(production.game_id, []).append(production)
+
+        completed = 0
+        for game_id, productions in by_game.items():
+            game_state = await self.cache.get(game_id)
+            if game_state is None:
+                continue
+            for production in productions:
+                try:
+                    event = spawn_event(production)
+                    if self.events is not None:
+                        self.events.apply(game_state, event)
+                    else:
+                        apply_event(game_state, event)
+                    completed += 1
+                except ValueError as e:
+                    PRODUCTIONS_DROPPED.inc()
+                    logger.warning(f"Dropping production {production.id}: {e}")
+            game_state.updated_at = now
+            self.cache.mark_dirty(game_state)
+
+        if self.events is not None:
+            await self.events.commit()
+        PRODUCTIONS_COMPLETED.inc(completed)
+        return completed
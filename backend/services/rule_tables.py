@@ -0,0 +1,117 @@
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from services.game_data import RESOURCE_TYPES, UNIT_STATS, BUILDING_STATS, RESOURCE_GENERATION
+
+# game_data compiled once at import into immutable records, so the rules
+# read attributes instead of nested string-keyed dicts. Resource amounts
+# are vectors in RESOURCES order; type ids index the *_BY_ID tuples.
+
+RESOURCES: Tuple[str, ...] = tuple(RESOURCE_TYPES.values())
+
+# One amount per resource, in RESOURCES order
+ResourceVector = Tuple[int, ...]
+ZERO: ResourceVector = (0,) * len(RESOURCES)
+
+# The non-zero entries of a vector as (resource, amount) pairs; costs touch
+# one or two resources, so checks and payments walk only those
+SparseAmounts = Tuple[Tuple[str, int], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class UnitRules:
+    type_id: int
+    type: str
+    health: int
+    attack: int
+    cost: ResourceVector
+    cost_items: SparseAmounts
+    build_time_ms: int
+    # Tiles seen around the unit, Chebyshev distance
+    sight: int
+
+
+@dataclass(frozen=True, slots=True)
+class BuildingRules:
+    type_id: int
+    type: str
+    health: int
+    cost: ResourceVector
+    cost_items: SparseAmounts
+    build_time_ms: int
+    produces: FrozenSet[str]
+    # Resources credited per round of income
+    income: ResourceVector
+    sight: int
+
+
+def to_vector(amounts: Dict[str, int]) -> ResourceVector:
+    return tuple(amounts.get(resource, 0) for resource in RESOURCES)
+
+
+def to_items(vector: ResourceVector) -> SparseAmounts:
+    return tuple((resource, amount) for resource, amount in zip(RESOURCES, vector) if amount)
+
+
+UNIT_RULES_BY_ID: Tuple[UnitRules, ...] = tuple(
+    UnitRules(
+        type_id=type_id,
+        type=unit_type,
+        health=stats["health"],
+        attack=stats["attack"],
+        cost=to_vector(stats["cost"]),
+        cost_items=to_items(to_vector(stats["cost"])),
+        build_time_ms=stats["buildTime"],
+        sight=stats["sight"],
+    )
+    for type_id, (unit_type, stats) in enumerate(UNIT_STATS.items())
+)
+UNIT_RULES: Dict[str, UnitRules] = {rules.type: rules for rules in UNIT_RULES_BY_ID}
+
+BUILDING_RULES_BY_ID: Tuple[BuildingRules, ...] = tuple(
+    BuildingRules(
+        type_id=type_id,
+        type=building_type,
+        health=stats["health"],
+        cost=to_vector(stats["cost"]),
+        cost_items=to_items(to_vector(stats["cost"])),
+        build_time_ms=stats["buildTime"],
+        produces=frozenset(stats.get("produces", [])),
+        income=to_vector(RESOURCE_GENERATION.get(building_type, {})),
+        sight=stats["sight"],
+    )
+    for type_id, (building_type, stats) in enumerate(BUILDING_STATS.items())
+)
+BUILDING_RULES: Dict[str, BuildingRules] = {rules.type: rules for rules in BUILDING_RULES_BY_ID}
+
+
+def missing_resource(resources: Dict[str, int], cost_items: SparseAmounts) -> Optional[str]:
+    """First resource the stock has too little of for a cost, or None if affordable"""
+    for resource, needed in cost_items:
+        if resources.get(resource, 0) < needed:
+            return resource
+    return None
+
+
+def pay(resources: Dict[str, int], cost_items: SparseAmounts) -> None:
+    for resource, amount in cost_items:
+        resources[resource] -= amount
+
+
+def add_vector(resources: Dict[str, int], amounts: ResourceVector) -> None:
+    """Credit a vector, touching only its non-zero entries"""
+    for resource, amount in zip(RESOURCES, amounts):
+        if amount:
+            resources[resource] += amount
+
+
+def income_vector(building_types: Iterable[str]) -> ResourceVector:
+    """Income of one round: buildings counted by type times each type's income vector"""
+    income = list(ZERO)
+    for building_type, count in Counter(building_types).items():
+        rules = BUILDING_RULES.get(building_type)
+        if rules is None:
+            continue
+        for i, amount in enumerate(rules.income):
+            income[i] += count * amount
+    return tuple(income)
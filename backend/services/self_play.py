@@ -0,0 +1,231 @@
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from models.game import GameState, GameAction, Unit, Building
+from services.event_store import apply_event
+from services.rule_tables import UNIT_RULES, BUILDING_RULES, missing_resource
+from services.spatial_index import get_spatial_index
+from services import economy, game_rules
+import heapq
+import random
+import time
+
+# Headless matches: a scripted bot plays the player side against the
+# built-in AI, entirely in memory on a simulated clock. Every change goes
+# through apply_event with the simulated time as its timestamp, so the
+# rules, income and AI are the ones live games and replay run; nothing
+# is stored. The cadence mirrors SimulationLoop's defaults.
+
+# Unit types some building can produce, the strategies a bot can follow
+STRATEGIES: Tuple[str, ...] = tuple(
+    unit_type for unit_type in UNIT_RULES
+    if any(unit_type in rules.produces for rules in BUILDING_RULES.values())
+)
+
+
+@dataclass
+class MatchResult:
+    seed: int
+    strategy: str
+    # 'player', 'enemy', or 'draw' when max_ticks ran out
+    winner: str
+    ticks: int
+    events: int
+    player_units: int
+    enemy_units: int
+    cpu_seconds: float
+
+
+class HeadlessMatch:
+    """One bot-vs-AI game advanced tick by tick.
+
+    The bot builds whatever produces its strategy's unit, keeps every
+    producer busy while it can pay, strikes enemies next to its units and,
+    from `attack_at` units on, sends the idle ones at the nearest enemy.
+    A side loses when it has no units left and none in production; the
+    AI never produces, so it loses with its last unit.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        strategy: str = "soldier",
+        tick_rate: float = 10.0,
+        ai_interval: float = 3.0,
+        move_interval: float = 0.5,
+        bot_interval: float = 1.0,
+        attack_at: int = 4,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy}, expected one of {', '.join(STRATEGIES)}")
+        self.seed = seed
+        self.strategy = strategy
+        self.game_state = game_rules.new_game("bot", seed=seed)
+        self.rng = random.Random(seed)
+        self.tick_interval = timedelta(seconds=1.0 / tick_rate)
+        self.ticks_per_second = tick_rate
+        self.ai_every = max(1, round(ai_interval * tick_rate))
+        self.move_every = max(1, round(move_interval * tick_rate))
+        self.bot_every = max(1, round(bot_interval * tick_rate))
+        self.attack_at = attack_at
+        self.start = self.game_state.player.last_update
+        self.tick = 0
+        self.events = 0
+        # Unit productions as (due tick, building id), soonest first
+        self._productions: List[Tuple[int, str]] = []
+        self._producing: Set[str] = set()
+        self._ids = 0
+
+    def now(self) -> datetime:
+        return self.start + self.tick_interval * self.tick
+
+    def run(self, max_ticks: int) -> MatchResult:
+        """Play until a side loses or max_ticks have elapsed"""
+        started = time.process_time()
+        winner = self.winner()
+        while winner is None and self.tick < max_ticks:
+            self.step()
+            winner = self.winner()
+        return MatchResult(
+            seed=self.seed,
+            strategy=self.strategy,
+            winner=winner or "draw",
+            ticks=self.tick,
+            events=self.events,
+            player_units=len(self.game_state.player.units),
+            enemy_units=len(self.game_state.enemy.units),
+            cpu_seconds=time.process_time() - started,
+        )
+
+    def winner(self) -> Optional[str]:
+        if not self.game_state.enemy.units:
+            return "player"
+        if not self.game_state.player.units and not self._productions:
+            return "enemy"
+        return None
+
+    def step(self) -> None:
+        """Advance one tick: income, finished units, AI, movement, then the bot"""
+        self.tick += 1
+        game_state = self.game_state
+        economy.accrue(game_state, self.now())
+
+        while self._productions and self._productions[0][0] <= self.tick:
+            _, building_id = heapq.heappop(self._productions)
+            self._producing.discard(building_id)
+            self.apply("spawn", building_id=building_id, unit_type=self.strategy, unit_id=self._next_id("unit"))
+
+        if self.tick % self.ai_every == 0:
+            self.apply("ai_turn")
+        if self.tick % self.move_every == 0:
+            moves = game_rules.plan_moves(game_state)
+            if moves:
+                self.apply("advance", moves=moves)
+        if self.tick % self.bot_every == 0:
+            self._play()
+
+    def apply(self, action_type: str, **fields) -> bool:
+        """Apply one event at the simulated time, False if the rules rejected it"""
+        event = GameAction(game_id=self.game_state.id, action_type=action_type, timestamp=self.now(), **fields)
+        try:
+            apply_event(self.game_state, event)
+        except ValueError:
+            return False
+        self.events += 1
+        return True
+
+    def _play(self) -> None:
+        producers = [
+            b for b in self.game_state.player.buildings
+            if self.strategy in BUILDING_RULES[b.type].produces
+        ]
+        if not producers:
+            self._build_producer()
+        for building in producers:
+            if building.id not in self._producing:
+                self._produce(building)
+        self._fight()
+
+    def _build_producer(self) -> None:
+        resources = self.game_state.player.resources
+        candidates = sorted(
+            (rules for rules in BUILDING_RULES.values() if self.strategy in rules.produces),
+            key=lambda rules: rules.type_id
+        )
+        for rules in candidates:
+            if missing_resource(resources, rules.cost_items) is None:
+                tile = self._free_tile()
+                if tile is not None:
+                    self.apply("build", build_type=rules.type, target_x=tile[0], target_y=tile[1],
+                               building_id=self._next_id("building"))
+                return
+
+    def _produce(self, building: Building) -> None:
+        rules = UNIT_RULES[self.strategy]
+        if self.apply("produce", building_id=building.id, unit_type=rules.type):
+            due = self.tick + max(1, round(rules.build_time_ms / 1000 * self.ticks_per_second))
+            heapq.heappush(self._productions, (due, building.id))
+            self._producing.add(building.id)
+
+    def _fight(self) -> None:
+        game_state = self.game_state
+        idle: Dict[Tuple[int, int], List[str]] = {}
+        army = list(game_state.player.units)
+        for unit in army:
+            if game_state.player.get_unit(unit.id) is None:
+                continue
+            target = self._adjacent_target(unit)
+            if target is not None:
+                self.apply("attack", unit_id=unit.id, target_id=target.id)
+            elif len(army) >= self.attack_at and unit.target_x is None:
+                nearest = self._nearest_enemy(unit)
+                if nearest is not None:
+                    idle.setdefault((nearest.x, nearest.y), []).append(unit.id)
+        for (x, y), unit_ids in idle.items():
+            self.apply("move", unit_ids=unit_ids, target_x=x, target_y=y)
+
+    def _adjacent_target(self, unit: Unit):
+        # Melee range as the AI uses it; attack_target itself has no range
+        index = get_spatial_index(self.game_state)
+        targets = [
+            entity
+            for kind in ("units", "buildings")
+            for entity in index.layer("enemy", kind).in_range(unit.x, unit.y, 2)
+            if abs(entity.x - unit.x) <= 1 and abs(entity.y - unit.y) <= 1
+        ]
+        return min(targets, key=lambda e: (e.health, e.id), default=None)
+
+    def _nearest_enemy(self, unit: Unit):
+        index = get_spatial_index(self.game_state)
+        nearest = index.layer("enemy", "units").nearest(unit.x, unit.y)
+        return nearest[0] if nearest else None
+
+    def _free_tile(self) -> Optional[Tuple[int, int]]:
+        """A random free tile next to the first building, or near the units"""
+        index = get_spatial_index(self.game_state)
+        player = self.game_state.player
+        anchor = player.buildings[0] if player.buildings else (player.units[0] if player.units else None)
+        if anchor is None:
+            return None
+        width = self.game_state.map_size.get("width", 20)
+        height = self.game_state.map_size.get("height", 20)
+        for radius in range(1, max(width, height)):
+            tiles = [
+                (anchor.x + dx, anchor.y + dy)
+                for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                if max(abs(dx), abs(dy)) == radius
+                and 0 <= anchor.x + dx < width and 0 <= anchor.y + dy < height
+                and not index.occupied(anchor.x + dx, anchor.y + dy)
+            ]
+            if tiles:
+                return self.rng.choice(tiles)
+        return None
+
+    def _next_id(self, prefix: str) -> str:
+        self._ids += 1
+        return f"{prefix}{self._ids}"
+
+
+def play_match(seed: int, strategy: str = "soldier", max_ticks: int = 6000, **options) -> MatchResult:
+    """Play one headless match; a top-level function so process pools can pickle it"""
+    return HeadlessMatch(seed, strategy, **options).run(max_ticks)
@@ -0,0 +1,153 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from datetime import datetime
+from models.game import GameState, GameAction
+from services.game_cache import GameStateCache
+from services.production_scheduler import ProductionScheduler
+from services.event_store import EventStore, apply_event
+from services.metrics import registry
+from services import economy, game_rules
+import asyncio
+import logging
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = registry.histogram(
+    "rts_simulation_tick_seconds", "Wall time spent advancing all games for one tick"
+)
+TICKS = registry.counter("rts_simulation_ticks_total", "Simulation ticks executed")
+TICK_OVERRUNS = registry.counter(
+    "rts_simulation_tick_overruns_total", "Ticks that finished after the next tick was due"
+)
+ACTIVE_GAMES = registry.gauge("rts_simulation_active_games", "Games advanced by the last tick")
+RESIDENT_GAMES = registry.gauge("rts_resident_games", "Games held in the state cache")
+
+
+class SimulationLoop:
+    """Fixed-timestep scheduler that advances every resident game.
+
+    One asyncio task ticks `tick_rate` times per second. Each tick credits
+    the income rounds that have elapsed (see services.economy), runs the AI
+    every `ai_interval` seconds, steps ordered units one tile every
+    `move_interval` seconds and completes due unit productions, for all
+    playing games in a single pass. Games are phase-shifted by a hash of
+    their id so periodic work is spread across ticks instead of bursting.
+    With `owns` set, games this worker does not hold the lease of are left
+    alone, so two workers never advance the same game.
+    """
+
+    def __init__(
+        self,
+        cache: GameStateCache,
+        scheduler: ProductionScheduler,
+        tick_rate: float = 10.0,
+        ai_interval: float = 3.0,
+        move_interval: float = 0.5,
+        events: Optional[EventStore] = None,
+        owns: Optional[Callable[[str], bool]] = None,
+    ):
+        self.cache = cache
+        self.scheduler = scheduler
+        self.events = events
+        self.owns = owns
+        self.tick_rate = tick_rate
+        self.tick_interval = 1.0 / tick_rate
+        self.ai_every = max(1, round(ai_interval * tick_rate))
+        self.move_every = max(1, round(move_interval * tick_rate))
+        self.tick_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._tick_listeners: List[Callable[[int], Awaitable[None]]] = []
+
+    def add_tick_listener(self, listener: Callable[[int], Awaitable[None]]) -> None:
+        """Await `listener(tick_count)` at the end of every tick"""
+        self._tick_listeners.append(listener)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick_interval
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Error in simulation tick: {e}")
+
+            delay = next_tick - loop.time()
+            if delay < 0:
+                TICK_OVERRUNS.inc()
+                # Drop the missed ticks rather than spiralling to catch up
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def tick(self) -> None:
+        """Advance all playing games by one fixed step"""
+        started = time.perf_counter()
+        self.tick_count += 1
+        now = datetime.utcnow()
+
+        active = 0
+        for game_id in self.cache.resident_ids():
+            game_state = self.cache.peek(game_id)
+            if game_state is None or game_state.game_status != "playing":
+                continue
+            if self.owns is not None and not self.owns(game_id):
+                continue
+            active += 1
+            credited = economy.accrue(game_state, now)
+            if self.advance(game_state) or credited:
+                game_state.updated_at = now
+                self.cache.mark_dirty(game_state)
+
+        await self.scheduler.complete_due(now)
+        if self.events is not None:
+            await self.events.commit()
+
+        for listener in self._tick_listeners:
+            try:
+                await listener(self.tick_count)
+            except Exception as e:
+                logger.error(f"Error in tick listener: {e}")
+
+        ACTIVE_GAMES.set(active)
+        RESIDENT_GAMES.set(len(self.cache))
+        TICKS.inc()
+        TICK_SECONDS.observe(time.perf_counter() - started)
+
+    def advance(self, game_state: GameState) -> bool:
+        """Apply the periodic rules due on this tick, returns True if anything ran"""
+        phase = self.tick_count + zlib.crc32(game_state.id.encode())
+        changed = False
+        if phase % self.ai_every == 0:
+            self._apply(game_state, GameAction(game_id=game_state.id, action_type="ai_turn"))
+            changed = True
+        if phase % self.move_every == 0:
+            moves = game_rules.plan_moves(game_state)
+            if moves:
+                self._apply(game_state, GameAction(game_id=game_state.id, action_type="advance", moves=moves))
+                changed = True
+        return changed
+
+    def _apply(self, game_state: GameState, event: GameAction) -> None:
+        if self.events is not None:
+            self.events.apply(game_state, event)
+        else:
+            apply_event(game_state, event)
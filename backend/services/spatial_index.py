@@ -0,0 +1,228 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from models.game import GameState, Unit, Building
+import heapq
+
+Entity = Union[Unit, Building]
+Cell = Tuple[int, int]
+# Side, kind and the entity, or None once it was removed
+Change = Tuple[str, str, Optional[Entity]]
+
+DEFAULT_CELL_SIZE = 4
+
+
+class SpatialGrid:
+    """Uniform grid over one layer of entities (e.g. the enemy's units).
+
+    Entities are bucketed into `cell_size` x `cell_size` cells, so moving
+    one is O(1) and radius / nearest queries only visit nearby cells.
+    Distances are Manhattan, like the rest of the game rules.
+    """
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Dict[str, Entity]] = {}
+        self._cell_of: Dict[str, Cell] = {}
+        # Bounding box of every cell ever used, bounds the nearest search
+        self._min_cell: Optional[Cell] = None
+        self._max_cell: Optional[Cell] = None
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._cell_of
+
+    def _cell(self, x: int, y: int) -> Cell:
+        return (x // self.cell_size, y // self.cell_size)
+
+    def insert(self, entity: Entity) -> None:
+        cell = self._cell(entity.x, entity.y)
+        self._cells.setdefault(cell, {})[entity.id] = entity
+        self._cell_of[entity.id] = cell
+        if self._min_cell is None:
+            self._min_cell = self._max_cell = cell
+        else:
+            self._min_cell = (min(self._min_cell[0], cell[0]), min(self._min_cell[1], cell[1]))
+            self._max_cell = (max(self._max_cell[0], cell[0]), max(self._max_cell[1], cell[1]))
+
+    def remove(self, entity_id: str) -> None:
+        cell = self._cell_of.pop(entity_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[entity_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def update(self, entity: Entity) -> None:
+        """Re-bucket an entity after its x/y changed"""
+        old_cell = self._cell_of.get(entity.id)
+        if old_cell == self._cell(entity.x, entity.y):
+            return
+        self.remove(entity.id)
+        self.insert(entity)
+
+    def in_range(self, x: int, y: int, radius: int) -> List[Entity]:
+        """Entities whose Manhattan distance to (x, y) is at most radius"""
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self._cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    if abs(entity.x - x) + abs(entity.y - y) <= radius:
+                        found.append(entity)
+        return found
+
+    def nearest(self, x: int, y: int, k: int = 1) -> List[Entity]:
+        """The k entities closest to (x, y), nearest first"""
+        if not self._cell_of or k <= 0:
+            return []
+        origin = self._cell(x, y)
+        max_ring = max(
+            abs(origin[0] - self._min_cell[0]), abs(self._max_cell[0] - origin[0]),
+            abs(origin[1] - self._min_cell[1]), abs(self._max_cell[1] - origin[1]),
+        )
+        # Max-heap of the best k candidates: (-distance, tiebreak, entity)
+        best: List[Tuple[int, int, Entity]] = []
+        counter = 0
+        for ring in range(max_ring + 1):
+            # Nothing in this ring can be closer than its lower bound
+            if len(best) == k and -best[0][0] <= (ring - 1) * self.cell_size + 1:
+                break
+            for cell in _ring_cells(origin, ring):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    distance = abs(entity.x - x) + abs(entity.y - y)
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, -counter, entity))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, -counter, entity))
+        return [entity for _, _, entity in sorted(best, key=lambda item: (-item[0], -item[1]))]
+
+
+class ChangeLog:
+    """Latest change per entity id since the consumer last drained it"""
+
+    __slots__ = ("_changes",)
+
+    def __init__(self):
+        self._changes: Dict[str, Change] = {}
+
+    def record(self, entity_id: str, change: Change) -> None:
+        self._changes[entity_id] = change
+
+    def drain(self) -> Dict[str, Change]:
+        changes, self._changes = self._changes, {}
+        return changes
+
+
+class GameSpatialIndex:
+    """Spatial layers for both sides of a game plus exact tile occupancy"""
+
+    def __init__(self, game_state: GameState, cell_size: int = DEFAULT_CELL_SIZE):
+        width = game_state.map_size.get("width", 20)
+        height = game_state.map_size.get("height", 20)
+        # Small cells keep buckets short; cap the grid at ~64 cells per axis
+        self.cell_size = max(cell_size, -(-max(width, height) // 64))
+        self.layers: Dict[Tuple[str, str], SpatialGrid] = {
+            (side, kind): SpatialGrid(self.cell_size)
+            for side in ("player", "enemy") for kind in ("units", "buildings")
+        }
+        self._tiles: Dict[Cell, int] = {}
+        self._positions: Dict[str, Cell] = {}
+        # One per consumer kept in sync incrementally (see track_changes)
+        self._change_logs: List[ChangeLog] = []
+        for side in ("player", "enemy"):
+            player = getattr(game_state, side)
+            for unit in player.units:
+                self.add(side, "units", unit)
+            for building in player.buildings:
+                self.add(side, "buildings", building)
+
+    def layer(self, side: str, kind: str) -> SpatialGrid:
+        return self.layers[(side, kind)]
+
+    def occupied(self, x: int, y: int) -> bool:
+        return self._tiles.get((x, y), 0) > 0
+
+    def track_changes(self) -> ChangeLog:
+        """A new log of the entities added, moved, touched or removed from now on"""
+        log = ChangeLog()
+        self._change_logs.append(log)
+        return log
+
+    def stop_tracking(self, log: ChangeLog) -> None:
+        if log in self._change_logs:
+            self._change_logs.remove(log)
+
+    def add(self, side: str, kind: str, entity: Entity) -> None:
+        self.layers[(side, kind)].insert(entity)
+        self._occupy(entity.id, (entity.x, entity.y))
+        for log in self._change_logs:
+            log.record(entity.id, (side, kind, entity))
+
+    def remove(self, side: str, kind: str, entity: Entity) -> None:
+        self.layers[(side, kind)].remove(entity.id)
+        self._vacate(entity.id)
+        for log in self._change_logs:
+            log.record(entity.id, (side, kind, None))
+
+    def move(self, side: str, kind: str, entity: Entity, x: int, y: int) -> None:
+        """Move an entity and keep every structure in sync"""
+        if entity.x != x:
+            entity.x = x
+        if entity.y != y:
+            entity.y = y
+        self.layers[(side, kind)].update(entity)
+        self._vacate(entity.id)
+        self._occupy(entity.id, (x, y))
+        for log in self._change_logs:
+            log.record(entity.id, (side, kind, entity))
+
+    def touch(self, side: str, kind: str, entity: Entity) -> None:
+        """Record a change that leaves the entity in place, such as damage"""
+        for log in self._change_logs:
+            log.record(entity.id, (side, kind, entity))
+
+    def _occupy(self, entity_id: str, tile: Cell) -> None:
+        self._positions[entity_id] = tile
+        self._tiles[tile] = self._tiles.get(tile, 0) + 1
+
+    def _vacate(self, entity_id: str) -> None:
+        tile = self._positions.pop(entity_id, None)
+        if tile is None:
+            return
+        count = self._tiles[tile] - 1
+        if count:
+            self._tiles[tile] = count
+        else:
+            del self._tiles[tile]
+
+
+def get_spatial_index(game_state: GameState) -> GameSpatialIndex:
+    """Return the game's spatial index, building it on first use"""
+    index = game_state._spatial_index
+    if index is None:
+        index = GameSpatialIndex(game_state)
+        game_state._spatial_index = index
+    return index
+
+
+def _ring_cells(origin: Cell, ring: int) -> Iterator[Cell]:
+    ox, oy = origin
+    if ring == 0:
+        yield origin
+        return
+    for dx in range(-ring, ring + 1):
+        yield (ox + dx, oy - ring)
+        yield (ox + dx, oy + ring)
+    for dy in range(-ring + 1, ring):
+        yield (ox - ring, oy + dy)
+        yield (ox + ring, oy + dy)
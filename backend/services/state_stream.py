@@ -0,0 +1,274 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+from models.game import GameState
+from services.game_cache import GameStateCache
+from services.metrics import registry
+from services.spatial_index import ChangeLog, Entity, GameSpatialIndex, get_spatial_index
+from services.visibility import get_visibility, visible_state
+import asyncio
+import msgpack
+import time
+
+# Wire format (msgpack maps):
+#   snapshot {"t": "s", "seq", "status", "map", "res": {side: {..}}, "ent": {group: [row, ...]}}
+#   diff     {"t": "d", "seq", ["status"], ["res"], ["up": {group: [row, ...]}], ["rm": [id, ...]]}
+# Groups are "pu"/"pb"/"eu"/"eb" (player/enemy units/buildings) and a row
+# is [id, type, x, y, health]. Diff upserts are idempotent, so a client can
+# apply any diff on top of any earlier snapshot. With fog of war, enemy rows
+# are only those the player sees (one leaving sight is sent in "rm") and
+# enemy resources are empty.
+
+EntityRow = Tuple[str, str, int, int, int]
+EntityView = Dict[str, Tuple[str, EntityRow]]
+
+GROUPS = (("pu", "player", "units"), ("pb", "player", "buildings"),
+          ("eu", "enemy", "units"), ("eb", "enemy", "buildings"))
+GROUP_OF = {(side, kind): group for group, side, kind in GROUPS}
+
+FRAMES_SENT = registry.counter("rts_stream_frames_total", "Frames queued to stream subscribers", ["kind"])
+BYTES_SENT = registry.counter("rts_stream_bytes_total", "Encoded bytes queued to stream subscribers", ["kind"])
+ENCODE_SECONDS = registry.histogram("rts_stream_encode_seconds", "Time to diff and encode one game frame")
+SUBSCRIBERS = registry.gauge("rts_stream_subscribers", "Open state stream connections")
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def decode(payload: bytes) -> Any:
+    return msgpack.unpackb(payload, raw=False)
+
+
+class Subscription:
+    """Outgoing frame queue of one connected client"""
+
+    def __init__(self, game_id: str, max_pending: int):
+        self.game_id = game_id
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_pending)
+
+    def send(self, frame: bytes) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class _GameStream:
+    __slots__ = (
+        "subscribers", "view", "resources", "status", "updated_at", "seq",
+        "index", "changes", "visible", "visible_version",
+    )
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        # Last published entities, i.e. what every subscriber has seen
+        self.view: EntityView = {}
+        self.resources: Dict[str, Dict[str, int]] = {}
+        self.status: Optional[str] = None
+        self.updated_at: Optional[datetime] = None
+        self.seq = 0
+        # Entities changed since the last frame, from the game's spatial index
+        self.index: Optional[GameSpatialIndex] = None
+        self.changes: Optional[ChangeLog] = None
+        # With fog of war: enemy ids visible at the last frame
+        self.visible: Set[str] = set()
+        self.visible_version = -1
+
+    def untrack(self) -> None:
+        if self.index is not None:
+            self.index.stop_tracking(self.changes)
+        self.index = self.changes = None
+
+
+class StateStreamHub:
+    """Pushes per-tick entity diffs of watched games to their subscribers.
+
+    The hub remembers the last state it published for each watched game
+    and reads the entities added, moved, damaged or removed since then
+    from the game's spatial index (plus, with fog of war, the enemies that
+    entered or left sight). A diff only touches those entities, so its
+    cost follows activity rather than the number of entities on the map.
+    It is encoded once per game regardless of the number of subscribers.
+    Every `snapshot_every` ticks a full snapshot is sent instead for resync.
+    Watched games stay pinned in the cache until their last subscriber
+    leaves.
+    """
+
+    def __init__(self, cache: GameStateCache, snapshot_every: int = 50, max_pending: int = 64,
+                 fog_of_war: bool = True):
+        self.cache = cache
+        self.snapshot_every = snapshot_every
+        self.max_pending = max_pending
+        self.fog_of_war = fog_of_war
+        self._streams: Dict[str, _GameStream] = {}
+
+    def subscribe(self, game_state: GameState) -> Subscription:
+        """Register a client and queue an initial snapshot for it"""
+        stream = self._streams.get(game_state.id)
+        if stream is None:
+            stream = self._streams[game_state.id] = _GameStream()
+            self._refresh(stream, game_state)
+            # publish_tick only peeks, so a watched game must not expire
+            self.cache.pin(game_state.id)
+        subscription = Subscription(game_state.id, self.max_pending)
+        stream.subscribers.add(subscription)
+        SUBSCRIBERS.inc()
+        subscription.send(self._snapshot_frame(stream, game_state))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        stream = self._streams.get(subscription.game_id)
+        if stream is None or subscription not in stream.subscribers:
+            return
+        stream.subscribers.discard(subscription)
+        SUBSCRIBERS.dec()
+        if not stream.subscribers:
+            stream.untrack()
+            del self._streams[subscription.game_id]
+            self.cache.unpin(subscription.game_id)
+
+    async def publish_tick(self, tick: int) -> None:
+        """Send diffs (or periodic snapshots) for every watched game"""
+        resync = self.snapshot_every > 0 and tick % self.snapshot_every == 0
+        for game_id, stream in list(self._streams.items()):
+            game_state = self.cache.peek(game_id)
+            if game_state is None:
+                continue
+            if resync:
+                self._refresh(stream, game_state)
+                self._broadcast(stream, game_state, self._snapshot_frame(stream, game_state), "snapshot")
+            elif game_state.updated_at != stream.updated_at:
+                frame = self._diff_frame(stream, game_state)
+                if frame is not None:
+                    self._broadcast(stream, game_state, frame, "diff")
+
+    def _broadcast(self, stream: _GameStream, game_state: GameState, frame: bytes, kind: str) -> None:
+        for subscription in stream.subscribers:
+            if not subscription.send(frame):
+                # Slow client: drop its backlog and resync from a snapshot
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.send(self._snapshot_frame(stream, game_state))
+            FRAMES_SENT.inc(kind=kind)
+            BYTES_SENT.inc(len(frame), kind=kind)
+
+    def _snapshot_frame(self, stream: _GameStream, game_state: GameState) -> bytes:
+        entities: Dict[str, List[EntityRow]] = {group: [] for group, _, _ in GROUPS}
+        for group, row in stream.view.values():
+            entities[group].append(row)
+        return encode({
+            "t": "s",
+            "seq": stream.seq,
+            "status": stream.status,
+            "map": game_state.map_size,
+            "res": stream.resources,
+            "ent": entities,
+        })
+
+    def _diff_frame(self, stream: _GameStream, game_state: GameState) -> Optional[bytes]:
+        started = time.perf_counter()
+        message: Dict[str, Any] = {"t": "d"}
+        upserts: Dict[str, List[EntityRow]] = {}
+        removed: List[str] = []
+
+        if stream.index is not get_spatial_index(game_state):
+            # The game was reloaded: compare against a full view once
+            previous = stream.view
+            self._track(stream, game_state)
+            for entity_id, (group, row) in stream.view.items():
+                if previous.get(entity_id) != (group, row):
+                    upserts.setdefault(group, []).append(row)
+            removed = [entity_id for entity_id in previous if entity_id not in stream.view]
+        else:
+            for entity_id, (side, kind, entity) in self._changed(stream, game_state).items():
+                if entity is not None and (side == "player" or not self.fog_of_war or entity_id in stream.visible):
+                    entry = (GROUP_OF[(side, kind)], _row(entity))
+                    if stream.view.get(entity_id) != entry:
+                        stream.view[entity_id] = entry
+                        upserts.setdefault(entry[0], []).append(entry[1])
+                elif stream.view.pop(entity_id, None) is not None:
+                    removed.append(entity_id)
+        stream.updated_at = game_state.updated_at
+        resources = _resources(game_state, self.fog_of_war)
+
+        if upserts:
+            message["up"] = upserts
+        if removed:
+            message["rm"] = removed
+        if resources != stream.resources:
+            message["res"] = resources
+            stream.resources = resources
+        if game_state.game_status != stream.status:
+            message["status"] = game_state.game_status
+            stream.status = game_state.game_status
+        if len(message) == 1:
+            return None
+
+        stream.seq += 1
+        message["seq"] = stream.seq
+        frame = encode(message)
+        ENCODE_SECONDS.observe(time.perf_counter() - started)
+        return frame
+
+    def _changed(self, stream: _GameStream, game_state: GameState) -> Dict[str, Tuple[str, str, Optional[Entity]]]:
+        """Entities changed since the last frame, including enemies that entered or left sight"""
+        changes = stream.changes.drain()
+        if not self.fog_of_war:
+            return changes
+        visibility = get_visibility(game_state)
+        if visibility.version != stream.visible_version:
+            enemy = game_state.enemy
+            for entity_id in visibility.visible.symmetric_difference(stream.visible):
+                if entity_id in changes:
+                    continue
+                unit = enemy.get_unit(entity_id)
+                if unit is not None:
+                    changes[entity_id] = ("enemy", "units", unit)
+                else:
+                    changes[entity_id] = ("enemy", "buildings", enemy.get_building(entity_id))
+            stream.visible = set(visibility.visible)
+            stream.visible_version = visibility.version
+        return changes
+
+    def _refresh(self, stream: _GameStream, game_state: GameState) -> None:
+        self._track(stream, game_state)
+        stream.resources = _resources(game_state, self.fog_of_war)
+        stream.status = game_state.game_status
+        stream.updated_at = game_state.updated_at
+        stream.seq += 1
+
+    def _track(self, stream: _GameStream, game_state: GameState) -> None:
+        """Rebuild the stream's view from the whole game and log changes from here on"""
+        index = get_spatial_index(game_state)
+        if stream.index is not index:
+            stream.untrack()
+            stream.index = index
+            stream.changes = index.track_changes()
+        else:
+            stream.changes.drain()
+        if self.fog_of_war:
+            visibility = get_visibility(game_state)
+            stream.visible = set(visibility.visible)
+            stream.visible_version = visibility.version
+            game_state = visible_state(game_state)
+        stream.view = _entity_view(game_state)
+
+
+def _row(entity: Entity) -> EntityRow:
+    return (entity.id, entity.type, entity.x, entity.y, entity.health)
+
+
+def _entity_view(game_state: GameState) -> EntityView:
+    view: EntityView = {}
+    for group, side, list_name in GROUPS:
+        for entity in getattr(getattr(game_state, side), list_name):
+            view[entity.id] = (group, _row(entity))
+    return view
+
+
+def _resources(game_state: GameState, fog_of_war: bool) -> Dict[str, Dict[str, int]]:
+    return {
+        "player": dict(game_state.player.resources),
+        "enemy": {} if fog_of_war else dict(game_state.enemy.resources),
+    }
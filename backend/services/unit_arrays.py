@@ -0,0 +1,124 @@
+from typing import List, Sequence
+from models.game import GameState, Unit
+from services.rule_tables import UNIT_RULES, UNIT_RULES_BY_ID
+from services.spatial_index import get_spatial_index
+import numpy as np
+
+# Structure-of-arrays view of units for the AI and combat hot loops. The
+# pydantic models stay the source of truth: arrays are built from them at the
+# start of a step and only the units that actually changed are written back.
+
+ATTACK_BY_TYPE = np.array([rules.attack for rules in UNIT_RULES_BY_ID], dtype=np.int32)
+HEALTH_BY_TYPE = np.array([rules.health for rules in UNIT_RULES_BY_ID], dtype=np.int32)
+
+# Rows of the enemy x player distance matrix computed at once
+CHUNK_ROWS = 512
+
+# Legacy movement bounds of the AI (the default 20x20 map)
+MAP_MIN = 0
+MAP_MAX = 19
+
+
+class UnitArrays:
+    """x, y, health and type id of a list of units as NumPy vectors"""
+
+    __slots__ = ("units", "x", "y", "health", "type_id")
+
+    def __init__(self, units: Sequence[Unit]):
+        count = len(units)
+        self.units = units
+        self.x = np.fromiter((u.x for u in units), dtype=np.int32, count=count)
+        self.y = np.fromiter((u.y for u in units), dtype=np.int32, count=count)
+        self.health = np.fromiter((u.health for u in units), dtype=np.int32, count=count)
+        self.type_id = np.fromiter((UNIT_RULES[u.type].type_id for u in units), dtype=np.int16, count=count)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    @property
+    def attack(self) -> np.ndarray:
+        return ATTACK_BY_TYPE[self.type_id]
+
+
+def nearest_indices(sx: np.ndarray, sy: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> np.ndarray:
+    """Index of the Manhattan-nearest target for every source, first on ties.
+
+    Units share tiles heavily, so distances are computed between distinct
+    source and target positions only. Distinct targets are kept in order of
+    first occurrence, which makes argmin pick the same unit as a scan in
+    list order.
+    """
+    source_keys, source_inverse = np.unique(_position_keys(sx, sy), return_inverse=True)
+    _, target_first = np.unique(_position_keys(tx, ty), return_index=True)
+    target_first.sort()
+    utx, uty = tx[target_first], ty[target_first]
+    usx, usy = _split_keys(source_keys)
+
+    nearest = np.empty(len(source_keys), dtype=np.intp)
+    for start in range(0, len(source_keys), CHUNK_ROWS):
+        stop = start + CHUNK_ROWS
+        distance = (np.abs(usx[start:stop, None] - utx[None, :]) +
+                    np.abs(usy[start:stop, None] - uty[None, :]))
+        nearest[start:stop] = distance.argmin(axis=1)
+    return target_first[nearest[source_inverse.reshape(-1)]]
+
+
+def _position_keys(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return (x.astype(np.int64) << 32) | (y.astype(np.int64) & 0xFFFFFFFF)
+
+
+def _split_keys(keys: np.ndarray):
+    x = (keys >> 32).astype(np.int32)
+    y = (keys & 0xFFFFFFFF).astype(np.uint32).view(np.int32)
+    return x, y
+
+
+def step_towards(position: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """One tile towards the target, clamped like the scalar AI"""
+    return np.where(
+        position < target, np.minimum(position + 1, MAP_MAX),
+        np.where(position > target, np.maximum(position - 1, MAP_MIN), position)
+    )
+
+
+def ai_step(game_state: GameState, movers: List[bool]) -> None:
+    """Vectorized AI turn: every flagged enemy unit steps towards the nearest
+    player unit and strikes it if adjacent afterwards.
+
+    Matches the scalar rules: player units do not move during the AI turn,
+    so targets depend only on start positions, and damage is summed per
+    target then clamped at zero. Dead units are left for remove_dead.
+    """
+    enemy_units = game_state.enemy.units
+    player_units = game_state.player.units
+    if not enemy_units or not player_units:
+        return
+
+    enemy = UnitArrays(enemy_units)
+    player = UnitArrays(player_units)
+    mover_idx = np.flatnonzero(np.fromiter(movers, dtype=bool, count=len(movers)))
+    if not len(mover_idx):
+        return
+
+    x = enemy.x[mover_idx]
+    y = enemy.y[mover_idx]
+    target = nearest_indices(x, y, player.x, player.y)
+    new_x = step_towards(x, player.x[target])
+    new_y = step_towards(y, player.y[target])
+
+    # Adjacency attacks, all hits on a target resolved in one step
+    hit = (np.abs(new_x - player.x[target]) <= 1) & (np.abs(new_y - player.y[target]) <= 1)
+    damage = np.bincount(
+        target[hit], weights=enemy.attack[mover_idx][hit], minlength=len(player)
+    ).astype(np.int32)
+    new_health = np.maximum(0, player.health - damage)
+
+    # Write back only what changed
+    index = get_spatial_index(game_state)
+    moved = np.flatnonzero((new_x != x) | (new_y != y))
+    for i in moved:
+        unit = enemy_units[mover_idx[i]]
+        index.move("enemy", "units", unit, int(new_x[i]), int(new_y[i]))
+    for i in np.flatnonzero(new_health != player.health):
+        player_units[i].health = int(new_health[i])
+        index.touch("player", "units", player_units[i])
@@ -0,0 +1,156 @@
+from typing import Dict, List, Optional, Set, Tuple
+from models.game import GameState, Player
+from services.rule_tables import UNIT_RULES, BUILDING_RULES
+from services.spatial_index import Entity, get_spatial_index
+import numpy as np
+
+# Fog of war for the player, the only human side: an enemy unit or
+# building is visible while it stands on a tile within the sight radius
+# (Chebyshev) of some player unit or building. Enemy resources are never
+# shown.
+
+# Sight of an entity: x, y, radius
+Sight = Tuple[int, int, int]
+
+
+def sight_radius(kind: str, entity: Entity) -> int:
+    rules = (UNIT_RULES if kind == "units" else BUILDING_RULES).get(entity.type)
+    return rules.sight if rules else 0
+
+
+class VisibilityMap:
+    """Tiles the player sees and the enemy entities standing on them.
+
+    A coverage grid counts, per tile, the player entities that see it.
+    `sync` applies the entity changes the spatial index recorded since
+    the last call: a player entity that moved lifts its old sight and
+    lays the new one, and only tiles that turned lit or dark, plus enemy
+    entities that moved, spawned or died, are re-checked. `version`
+    changes whenever the visible set does, so views built from it are
+    reused until then.
+    """
+
+    def __init__(self, game_state: GameState):
+        self.width = game_state.map_size.get("width", 20)
+        self.height = game_state.map_size.get("height", 20)
+        self.coverage = np.zeros((self.height, self.width), dtype=np.int32)
+        self.lit = np.zeros((self.height, self.width), dtype=bool)
+        self.visible: Set[str] = set()
+        self.version = 0
+        self._sights: Dict[str, Sight] = {}
+        self._index = get_spatial_index(game_state)
+        self._changes = self._index.track_changes()
+        # Last enemy view handed out: (version, source player, view)
+        self._view: Optional[Tuple[int, Player, Player]] = None
+
+        for kind in ("units", "buildings"):
+            for entity in getattr(game_state.player, kind):
+                self._lay(entity.id, (entity.x, entity.y, sight_radius(kind, entity)), 1)
+        self.lit = self.coverage > 0
+        for kind in ("units", "buildings"):
+            for entity in getattr(game_state.enemy, kind):
+                if self.sees(entity.x, entity.y):
+                    self.visible.add(entity.id)
+
+    def sees(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and bool(self.lit[y, x])
+
+    def sync(self) -> None:
+        """Apply the entity changes recorded since the last sync"""
+        changes = self._changes.drain()
+        if not changes:
+            return
+        changed = False
+        box = None
+        recheck: List[Tuple[str, Optional[Entity]]] = []
+        for entity_id, (side, kind, entity) in changes.items():
+            if side == "enemy":
+                recheck.append((entity_id, entity))
+                continue
+            old = self._sights.pop(entity_id, None)
+            new = (entity.x, entity.y, sight_radius(kind, entity)) if entity is not None else None
+            if old == new:
+                if new is not None:
+                    self._sights[entity_id] = new
+                continue
+            if old is not None:
+                box = _union(box, self._lay(entity_id, old, -1))
+            if new is not None:
+                box = _union(box, self._lay(entity_id, new, 1))
+
+        if box is not None:
+            x0, y0, x1, y1 = box
+            lit = self.coverage[y0:y1, x0:x1] > 0
+            flipped = np.nonzero(lit != self.lit[y0:y1, x0:x1])
+            self.lit[y0:y1, x0:x1] = lit
+            for y, x in zip(flipped[0] + y0, flipped[1] + x0):
+                for kind in ("units", "buildings"):
+                    for entity in self._index.layer("enemy", kind).in_range(int(x), int(y), 0):
+                        changed = self._update(entity.id, entity) or changed
+
+        for entity_id, entity in recheck:
+            changed = self._update(entity_id, entity) or changed
+        if changed:
+            self.version += 1
+
+    def enemy_view(self, enemy: Player) -> Player:
+        """The enemy as the player sees it: visible entities, no resources.
+
+        Reused while the visible set is unchanged; its entities are the
+        live ones, so health and positions are always current.
+        """
+        if self._view is not None and self._view[0] == self.version and self._view[1] is enemy:
+            return self._view[2]
+        view = enemy.model_copy(update={
+            "resources": {},
+            "units": [u for u in enemy.units if u.id in self.visible],
+            "buildings": [b for b in enemy.buildings if b.id in self.visible],
+        })
+        self._view = (self.version, enemy, view)
+        return view
+
+    def _update(self, entity_id: str, entity: Optional[Entity]) -> bool:
+        """Re-check one enemy entity, True if its visibility changed"""
+        if entity is not None and self.sees(entity.x, entity.y):
+            if entity_id in self.visible:
+                return False
+            self.visible.add(entity_id)
+            return True
+        if entity_id not in self.visible:
+            return False
+        self.visible.discard(entity_id)
+        return True
+
+    def _lay(self, entity_id: str, sight: Sight, sign: int) -> Tuple[int, int, int, int]:
+        """Add or lift one sight square, returns the box it covered"""
+        x, y, radius = sight
+        if sign > 0:
+            self._sights[entity_id] = sight
+        x0, x1 = max(0, x - radius), min(self.width, x + radius + 1)
+        y0, y1 = max(0, y - radius), min(self.height, y + radius + 1)
+        if x0 < x1 and y0 < y1:
+            self.coverage[y0:y1, x0:x1] += sign
+        return x0, y0, max(x0, x1), max(y0, y1)
+
+
+def _union(box, other):
+    if box is None:
+        return other
+    return min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3])
+
+
+def get_visibility(game_state: GameState) -> VisibilityMap:
+    """Return the game's visibility map, built on first use and synced on every call"""
+    visibility = game_state._visibility
+    if visibility is None or visibility._index is not get_spatial_index(game_state):
+        visibility = VisibilityMap(game_state)
+        game_state._visibility = visibility
+    else:
+        visibility.sync()
+    return visibility
+
+
+def visible_state(game_state: GameState) -> GameState:
+    """Copy of a game that only holds what the player can see of the enemy"""
+    enemy = get_visibility(game_state).enemy_view(game_state.enemy)
+    return game_state.model_copy(update={"enemy": enemy})
@@ -0,0 +1 @@
+# Storage package initialization
@@ -0,0 +1,159 @@
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from datetime import datetime
+from models.game import GameState, GameAction, GameSummary, UnitProduction
+
+# (updated_at, id) of the last summary on the previous page
+SummaryKey = Tuple[datetime, str]
+
+
+class GameRepository(ABC):
+    """Stored game documents"""
+
+    @abstractmethod
+    async def insert(self, game_state: GameState) -> None:
+        """Store a new game; fails if the id is taken"""
+
+    @abstractmethod
+    async def get(self, game_id: str) -> Optional[GameState]:
+        """Load a game, clean, or None if it does not exist"""
+
+    @abstractmethod
+    async def save(self, games: List[GameState], full_ids: AbstractSet[str] = frozenset()) -> None:
+        """Write the changes of each game since it was last saved.
+
+        Every game is serialized and marked clean before the first await,
+        so changes made while the write is in flight are picked up by the
+        next save. Games in `full_ids` are rewritten whole because their
+        tracked changes were lost.
+        """
+
+    @abstractmethod
+    async def list(self, limit: int) -> List[GameState]:
+        """Up to `limit` games, in no particular order"""
+
+    @abstractmethod
+    async def summaries(self, limit: int, after: Optional[SummaryKey] = None) -> List[GameSummary]:
+        """Up to `limit` summaries newest first by (updated_at, id), starting after `after`"""
+
+    @abstractmethod
+    async def archivable(
+        self, statuses: Sequence[str], finished_before: datetime, idle_before: datetime, limit: int
+    ) -> List[str]:
+        """Ids of up to `limit` games in `statuses` last updated before
+        `finished_before`, or in any status last updated before `idle_before`"""
+
+    @abstractmethod
+    async def delete(self, game_id: str) -> None:
+        pass
+
+
+class ProductionRepository(ABC):
+    """Stored unit production orders"""
+
+    @abstractmethod
+    async def insert(self, production: UnitProduction) -> None:
+        """Store a new production order"""
+
+    @abstractmethod
+    async def get(self, production_id: str) -> Optional[UnitProduction]:
+        pass
+
+    @abstractmethod
+    async def claim(self, production_id: str) -> Optional[UnitProduction]:
+        """Atomically mark a pending production completed.
+
+        Returns the production as it was before the claim, or None if it
+        does not exist or is already completed.
+        """
+
+    @abstractmethod
+    async def complete(self, production_ids: List[str]) -> None:
+        """Mark productions completed"""
+
+    @abstractmethod
+    async def pending(self, game_id: Optional[str] = None, limit: Optional[int] = None) -> List[UnitProduction]:
+        """Productions not yet completed, of one game or all, by end_time"""
+
+    @abstractmethod
+    async def delete(self, game_id: str) -> None:
+        """Delete every production of a game"""
+
+    @abstractmethod
+    async def expire_completed(self, ended_before: datetime) -> int:
+        """Delete completed productions that ended before `ended_before`, returns how many"""
+
+
+class ActionRepository(ABC):
+    """Append-only log of game events (`game_actions`)"""
+
+    @abstractmethod
+    async def append(self, actions: List[GameAction]) -> None:
+        """Write a batch of events; a failed batch may be partly written"""
+
+    @abstractmethod
+    async def read(self, game_id: str, after_seq: int, until_seq: Optional[int] = None) -> List[GameAction]:
+        """A game's events with after_seq < seq <= until_seq, in seq order"""
+
+    @abstractmethod
+    async def delete(self, game_id: str) -> None:
+        """Delete a game's whole log"""
+
+
+class SnapshotRepository(ABC):
+    """Compressed game snapshots used to rebuild games.
+
+    Snapshots are dicts with game_id, seq, created_at and state (bytes).
+    """
+
+    @abstractmethod
+    async def append(self, snapshots: List[Dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    async def latest(self, game_id: str, seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The newest snapshot of a game, at or before `seq` if given"""
+
+    @abstractmethod
+    async def all(self, game_id: str) -> List[Dict[str, Any]]:
+        """Every snapshot of a game, in seq order"""
+
+    @abstractmethod
+    async def delete(self, game_id: str) -> None:
+        pass
+
+
+class ArchiveRepository(ABC):
+    """Cold copies of games moved out of the hot collections.
+
+    Records are dicts with game_id, game_status, player_name, archived_at
+    and data (bytes, see services.archiver).
+    """
+
+    @abstractmethod
+    async def put(self, record: Dict[str, Any]) -> None:
+        """Store a record, replacing any earlier one of the same game"""
+
+    @abstractmethod
+    async def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def delete(self, game_id: str) -> None:
+        pass
+
+
+class Storage:
+    """One storage backend: a repository per kind of record"""
+
+    games: GameRepository
+    productions: ProductionRepository
+    actions: ActionRepository
+    snapshots: SnapshotRepository
+    archive: ArchiveRepository
+
+    async def setup(self) -> None:
+        """Prepare the backend (indexes, tables) on startup"""
+
+    async def close(self) -> None:
+        """Release connections on shutdown"""
@@ -0,0 +1,182 @@
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence
+from collections import defaultdict
+from datetime import datetime
+from models.game import GameState, GameAction, GameSummary, UnitProduction
+from storage.base import (
+    ActionRepository, ArchiveRepository, GameRepository, ProductionRepository, SnapshotRepository, Storage,
+    SummaryKey
+)
+import bisect
+
+
+class MemoryGameRepository(GameRepository):
+    def __init__(self):
+        # Stored as plain dicts, so callers never share objects with the store
+        self._docs: Dict[str, Dict[str, Any]] = {}
+
+    async def insert(self, game_state: GameState) -> None:
+        if game_state.id in self._docs:
+            raise ValueError(f"Game {game_state.id} already exists")
+        self._docs[game_state.id] = game_state.model_dump()
+
+    async def get(self, game_id: str) -> Optional[GameState]:
+        doc = self._docs.get(game_id)
+        return GameState(**doc) if doc else None
+
+    async def save(self, games: List[GameState], full_ids: AbstractSet[str] = frozenset()) -> None:
+        for game_state in games:
+            self._docs[game_state.id] = game_state.model_dump()
+            game_state.mark_clean()
+
+    async def list(self, limit: int) -> List[GameState]:
+        return [GameState(**doc) for doc in list(self._docs.values())[:limit]]
+
+    async def summaries(self, limit: int, after: Optional[SummaryKey] = None) -> List[GameSummary]:
+        # A full sort per page; fine for the sizes tests and benchmarks use
+        keys = sorted(((doc["updated_at"], game_id) for game_id, doc in self._docs.items()), reverse=True)
+        summaries = []
+        for key in keys:
+            if after is not None and key >= after:
+                continue
+            doc = self._docs[key[1]]
+            summaries.append(GameSummary(
+                id=doc["id"],
+                player_name=doc["player"]["name"],
+                game_status=doc["game_status"],
+                updated_at=doc["updated_at"]
+            ))
+            if len(summaries) == limit:
+                break
+        return summaries
+
+    async def archivable(
+        self, statuses: Sequence[str], finished_before: datetime, idle_before: datetime, limit: int
+    ) -> List[str]:
+        return [
+            game_id for game_id, doc in self._docs.items()
+            if doc["updated_at"] < idle_before
+            or (doc["game_status"] in statuses and doc["updated_at"] < finished_before)
+        ][:limit]
+
+    async def delete(self, game_id: str) -> None:
+        self._docs.pop(game_id, None)
+
+
+class MemoryProductionRepository(ProductionRepository):
+    def __init__(self):
+        self._productions: Dict[str, UnitProduction] = {}
+
+    async def insert(self, production: UnitProduction) -> None:
+        if production.id in self._productions:
+            raise ValueError(f"Production {production.id} already exists")
+        self._productions[production.id] = production.model_copy()
+
+    async def get(self, production_id: str) -> Optional[UnitProduction]:
+        production = self._productions.get(production_id)
+        return production.model_copy() if production else None
+
+    async def claim(self, production_id: str) -> Optional[UnitProduction]:
+        production = self._productions.get(production_id)
+        if production is None or production.completed:
+            return None
+        claimed = production.model_copy()
+        production.completed = True
+        return claimed
+
+    async def complete(self, production_ids: List[str]) -> None:
+        for production_id in production_ids:
+            production = self._productions.get(production_id)
+            if production is not None:
+                production.completed = True
+
+    async def pending(self, game_id: Optional[str] = None, limit: Optional[int] = None) -> List[UnitProduction]:
+        pending = sorted(
+            (p for p in self._productions.values()
+             if not p.completed and (game_id is None or p.game_id == game_id)),
+            key=lambda p: p.end_time
+        )
+        return [p.model_copy() for p in pending[:limit]]
+
+    async def delete(self, game_id: str) -> None:
+        for production_id in [p.id for p in self._productions.values() if p.game_id == game_id]:
+            del self._productions[production_id]
+
+    async def expire_completed(self, ended_before: datetime) -> int:
+        expired = [p.id for p in self._productions.values() if p.completed and p.end_time < ended_before]
+        for production_id in expired:
+            del self._productions[production_id]
+        return len(expired)
+
+
+class MemoryActionRepository(ActionRepository):
+    def __init__(self):
+        # Per game, events in seq order with a parallel list of their seqs
+        self._events: Dict[str, List[GameAction]] = defaultdict(list)
+        self._seqs: Dict[str, List[int]] = defaultdict(list)
+
+    async def append(self, actions: List[GameAction]) -> None:
+        for action in actions:
+            events, seqs = self._events[action.game_id], self._seqs[action.game_id]
+            seq = action.seq if action.seq is not None else 0
+            index = bisect.bisect_right(seqs, seq)
+            events.insert(index, action.model_copy())
+            seqs.insert(index, seq)
+
+    async def read(self, game_id: str, after_seq: int, until_seq: Optional[int] = None) -> List[GameAction]:
+        events, seqs = self._events.get(game_id, []), self._seqs.get(game_id, [])
+        start = bisect.bisect_right(seqs, after_seq)
+        end = len(seqs) if until_seq is None else bisect.bisect_right(seqs, until_seq)
+        return [event.model_copy() for event in events[start:end]]
+
+    async def delete(self, game_id: str) -> None:
+        self._events.pop(game_id, None)
+        self._seqs.pop(game_id, None)
+
+
+class MemorySnapshotRepository(SnapshotRepository):
+    def __init__(self):
+        self._snapshots: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    async def append(self, snapshots: List[Dict[str, Any]]) -> None:
+        for snapshot in snapshots:
+            stored = self._snapshots[snapshot["game_id"]]
+            stored.append(dict(snapshot))
+            stored.sort(key=lambda s: s["seq"])
+
+    async def latest(self, game_id: str, seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        for snapshot in reversed(self._snapshots.get(game_id, [])):
+            if seq is None or snapshot["seq"] <= seq:
+                return dict(snapshot)
+        return None
+
+    async def all(self, game_id: str) -> List[Dict[str, Any]]:
+        return [dict(snapshot) for snapshot in self._snapshots.get(game_id, [])]
+
+    async def delete(self, game_id: str) -> None:
+        self._snapshots.pop(game_id, None)
+
+
+class MemoryArchiveRepository(ArchiveRepository):
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        self._records[record["game_id"]] = dict(record)
+
+    async def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(game_id)
+        return dict(record) if record else None
+
+    async def delete(self, game_id: str) -> None:
+        self._records.pop(game_id, None)
+
+
+class MemoryStorage(Storage):
+    """Process-local storage for tests and benchmarks; nothing survives a restart"""
+
+    def __init__(self):
+        self.games = MemoryGameRepository()
+        self.productions = MemoryProductionRepository()
+        self.actions = MemoryActionRepository()
+        self.snapshots = MemorySnapshotRepository()
+        self.archive = MemoryArchiveRepository()
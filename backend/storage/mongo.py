@@ -0,0 +1,230 @@
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, monitoring
+from bson import Binary
+from models.game import GameState, GameAction, GameSummary, UnitProduction
+from services.db_indexes import ensure_indexes
+from services.game_delta import build_update_operations, full_replace_operation
+from services.metrics import registry
+from storage.base import (
+    ActionRepository, ArchiveRepository, GameRepository, ProductionRepository, SnapshotRepository, Storage,
+    SummaryKey
+)
+
+MONGO_COMMANDS = registry.counter(
+    "rts_mongo_commands_total", "Mongo commands by name and outcome", ["command", "outcome"]
+)
+MONGO_COMMAND_SECONDS = registry.histogram(
+    "rts_mongo_command_seconds", "Mongo command round trips as timed by the driver", ["command"]
+)
+
+# Fields read for a game summary; units and buildings are never transferred
+SUMMARY_PROJECTION = {"_id": 0, "id": 1, "player.name": 1, "game_status": 1, "updated_at": 1}
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts and times every command the driver sends.
+
+    Pass it in the client's event_listeners. The driver calls it on its
+    own threads; the metrics take their own locks.
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMANDS.inc(command=event.command_name, outcome="ok")
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMANDS.inc(command=event.command_name, outcome="error")
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name)
+
+
+class MongoGameRepository(GameRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def insert(self, game_state: GameState) -> None:
+        await self.db.games.insert_one(game_state.model_dump())
+
+    async def get(self, game_id: str) -> Optional[GameState]:
+        game_doc = await self.db.games.find_one({"id": game_id})
+        return GameState(**game_doc) if game_doc else None
+
+    async def save(self, games: List[GameState], full_ids: AbstractSet[str] = frozenset()) -> None:
+        operations = []
+        for game_state in games:
+            if game_state.id in full_ids:
+                operations.append(full_replace_operation(game_state))
+            else:
+                operations.extend(build_update_operations(game_state))
+            game_state.mark_clean()
+        if operations:
+            # Ordered, because one game's delta is split into dependent stages
+            await self.db.games.bulk_write(operations, ordered=True)
+
+    async def list(self, limit: int) -> List[GameState]:
+        docs = await self.db.games.find().to_list(limit)
+        return [GameState(**doc) for doc in docs]
+
+    async def summaries(self, limit: int, after: Optional[SummaryKey] = None) -> List[GameSummary]:
+        query = {}
+        if after is not None:
+            updated_at, game_id = after
+            # Keyset pagination on (updated_at, id), served by the updated_at_id index
+            query = {"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "id": {"$lt": game_id}},
+            ]}
+        docs = await (
+            self.db.games.find(query, SUMMARY_PROJECTION)
+            .sort([("updated_at", DESCENDING), ("id", DESCENDING)])
+            .limit(limit)
+            .to_list(limit)
+        )
+        return [
+            GameSummary(
+                id=doc["id"],
+                player_name=doc["player"]["name"],
+                game_status=doc.get("game_status", "playing"),
+                updated_at=doc["updated_at"]
+            )
+            for doc in docs
+        ]
+
+    async def archivable(
+        self, statuses: Sequence[str], finished_before: datetime, idle_before: datetime, limit: int
+    ) -> List[str]:
+        # Each branch is served by an index: updated_at_id, game_status_updated_at
+        query = {"$or": [
+            {"updated_at": {"$lt": idle_before}},
+            {"game_status": {"$in": list(statuses)}, "updated_at": {"$lt": finished_before}},
+        ]}
+        docs = await self.db.games.find(query, {"_id": 0, "id": 1}).limit(limit).to_list(limit)
+        return [doc["id"] for doc in docs]
+
+    async def delete(self, game_id: str) -> None:
+        await self.db.games.delete_one({"id": game_id})
+
+
+class MongoProductionRepository(ProductionRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def insert(self, production: UnitProduction) -> None:
+        await self.db.unit_productions.insert_one(production.model_dump())
+
+    async def get(self, production_id: str) -> Optional[UnitProduction]:
+        doc = await self.db.unit_productions.find_one({"id": production_id})
+        return UnitProduction(**doc) if doc else None
+
+    async def claim(self, production_id: str) -> Optional[UnitProduction]:
+        doc = await self.db.unit_productions.find_one_and_update(
+            {"id": production_id, "completed": False},
+            {"$set": {"completed": True}}
+        )
+        return UnitProduction(**doc) if doc else None
+
+    async def complete(self, production_ids: List[str]) -> None:
+        await self.db.unit_productions.update_many(
+            {"id": {"$in": production_ids}, "completed": False},
+            {"$set": {"completed": True}}
+        )
+
+    async def pending(self, game_id: Optional[str] = None, limit: Optional[int] = None) -> List[UnitProduction]:
+        query: Dict[str, Any] = {"completed": False}
+        if game_id is not None:
+            query["game_id"] = game_id
+        cursor = self.db.unit_productions.find(query).sort("end_time", ASCENDING)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [UnitProduction(**doc) async for doc in cursor]
+
+    async def delete(self, game_id: str) -> None:
+        await self.db.unit_productions.delete_many({"game_id": game_id})
+
+    async def expire_completed(self, ended_before: datetime) -> int:
+        # Served by the completed_end_time index
+        result = await self.db.unit_productions.delete_many({"completed": True, "end_time": {"$lt": ended_before}})
+        return result.deleted_count
+
+
+class MongoActionRepository(ActionRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def append(self, actions: List[GameAction]) -> None:
+        # Unordered so one bad document does not hold back the rest
+        await self.db.game_actions.insert_many([action.model_dump() for action in actions], ordered=False)
+
+    async def read(self, game_id: str, after_seq: int, until_seq: Optional[int] = None) -> List[GameAction]:
+        seq: Dict[str, int] = {"$gt": after_seq}
+        if until_seq is not None:
+            seq["$lte"] = until_seq
+        cursor = self.db.game_actions.find({"game_id": game_id, "seq": seq}, {"_id": 0}).sort("seq", ASCENDING)
+        return [GameAction(**doc) async for doc in cursor]
+
+    async def delete(self, game_id: str) -> None:
+        await self.db.game_actions.delete_many({"game_id": game_id})
+
+
+class MongoSnapshotRepository(SnapshotRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def append(self, snapshots: List[Dict[str, Any]]) -> None:
+        await self.db.game_snapshots.insert_many(
+            [{**snapshot, "state": Binary(snapshot["state"])} for snapshot in snapshots], ordered=False
+        )
+
+    async def latest(self, game_id: str, seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query: Dict[str, Any] = {"game_id": game_id}
+        if seq is not None:
+            query["seq"] = {"$lte": seq}
+        doc = await self.db.game_snapshots.find_one(query, {"_id": 0}, sort=[("seq", DESCENDING)])
+        if doc:
+            doc["state"] = bytes(doc["state"])
+        return doc
+
+    async def all(self, game_id: str) -> List[Dict[str, Any]]:
+        cursor = self.db.game_snapshots.find({"game_id": game_id}, {"_id": 0}).sort("seq", ASCENDING)
+        return [{**doc, "state": bytes(doc["state"])} async for doc in cursor]
+
+    async def delete(self, game_id: str) -> None:
+        await self.db.game_snapshots.delete_many({"game_id": game_id})
+
+
+class MongoArchiveRepository(ArchiveRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        await self.db.archived_games.replace_one(
+            {"game_id": record["game_id"]}, {**record, "data": Binary(record["data"])}, upsert=True
+        )
+
+    async def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self.db.archived_games.find_one({"game_id": game_id}, {"_id": 0})
+        if doc:
+            doc["data"] = bytes(doc["data"])
+        return doc
+
+    async def delete(self, game_id: str) -> None:
+        await self.db.archived_games.delete_one({"game_id": game_id})
+
+
+class MongoStorage(Storage):
+    """Collections of one Mongo database, shared by every worker"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.games = MongoGameRepository(db)
+        self.productions = MongoProductionRepository(db)
+        self.actions = MongoActionRepository(db)
+        self.snapshots = MongoSnapshotRepository(db)
+        self.archive = MongoArchiveRepository(db)
+
+    async def setup(self) -> None:
+        await ensure_indexes(self.db)
@@ -0,0 +1,314 @@
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence
+from datetime import datetime
+from models.game import GameState, GameAction, GameSummary, UnitProduction
+from storage.base import (
+    ActionRepository, ArchiveRepository, GameRepository, ProductionRepository, SnapshotRepository, Storage,
+    SummaryKey
+)
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    game_status TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_updated_at_id ON games (updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS games_game_status_updated_at ON games (game_status, updated_at);
+
+CREATE TABLE IF NOT EXISTS unit_productions (
+    id TEXT PRIMARY KEY,
+    game_id TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    end_time TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS unit_productions_game_id_completed ON unit_productions (game_id, completed);
+CREATE INDEX IF NOT EXISTS unit_productions_completed_end_time ON unit_productions (completed, end_time);
+
+CREATE TABLE IF NOT EXISTS game_actions (
+    game_id TEXT NOT NULL,
+    seq INTEGER,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_actions_game_id_seq ON game_actions (game_id, seq);
+
+CREATE TABLE IF NOT EXISTS game_snapshots (
+    game_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_snapshots_game_id_seq ON game_snapshots (game_id, seq DESC);
+
+CREATE TABLE IF NOT EXISTS archived_games (
+    game_id TEXT PRIMARY KEY,
+    game_status TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    archived_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def _timestamp(value: datetime) -> str:
+    # Fixed width, so text order is time order
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class SQLiteGameRepository(GameRepository):
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def insert(self, game_state: GameState) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO games (id, updated_at, player_name, game_status, doc) VALUES (?, ?, ?, ?, ?)",
+                _game_row(game_state)
+            )
+
+    async def get(self, game_id: str) -> Optional[GameState]:
+        row = self.conn.execute("SELECT doc FROM games WHERE id = ?", (game_id,)).fetchone()
+        return GameState.model_validate_json(row[0]) if row else None
+
+    async def save(self, games: List[GameState], full_ids: AbstractSet[str] = frozenset()) -> None:
+        # Whole documents: a local write costs about the same either way
+        rows = []
+        for game_state in games:
+            rows.append(_game_row(game_state))
+            game_state.mark_clean()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO games (id, updated_at, player_name, game_status, doc) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    async def list(self, limit: int) -> List[GameState]:
+        rows = self.conn.execute("SELECT doc FROM games LIMIT ?", (limit,)).fetchall()
+        return [GameState.model_validate_json(row[0]) for row in rows]
+
+    async def summaries(self, limit: int, after: Optional[SummaryKey] = None) -> List[GameSummary]:
+        query = "SELECT id, player_name, game_status, updated_at FROM games"
+        params: List[Any] = []
+        if after is not None:
+            updated_at = _timestamp(after[0])
+            query += " WHERE updated_at < ? OR (updated_at = ? AND id < ?)"
+            params += [updated_at, updated_at, after[1]]
+        query += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [
+            GameSummary(
+                id=game_id,
+                player_name=player_name,
+                game_status=game_status,
+                updated_at=datetime.fromisoformat(updated_at)
+            )
+            for game_id, player_name, game_status, updated_at in self.conn.execute(query, params)
+        ]
+
+    async def archivable(
+        self, statuses: Sequence[str], finished_before: datetime, idle_before: datetime, limit: int
+    ) -> List[str]:
+        placeholders = ", ".join("?" * len(statuses))
+        rows = self.conn.execute(
+            f"SELECT id FROM games WHERE updated_at < ? OR (game_status IN ({placeholders}) AND updated_at < ?)"
+            " LIMIT ?",
+            [_timestamp(idle_before), *statuses, _timestamp(finished_before), limit]
+        )
+        return [row[0] for row in rows]
+
+    async def delete(self, game_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+
+
+def _game_row(game_state: GameState):
+    return (
+        game_state.id,
+        _timestamp(game_state.updated_at),
+        game_state.player.name,
+        game_state.game_status,
+        game_state.model_dump_json(),
+    )
+
+
+class SQLiteProductionRepository(ProductionRepository):
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def insert(self, production: UnitProduction) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO unit_productions (id, game_id, completed, end_time, doc) VALUES (?, ?, ?, ?, ?)",
+                (production.id, production.game_id, int(production.completed),
+                 _timestamp(production.end_time), production.model_dump_json())
+            )
+
+    async def get(self, production_id: str) -> Optional[UnitProduction]:
+        row = self.conn.execute(
+            "SELECT doc, completed FROM unit_productions WHERE id = ?", (production_id,)
+        ).fetchone()
+        return _production(row) if row else None
+
+    async def claim(self, production_id: str) -> Optional[UnitProduction]:
+        with self.conn:
+            claimed = self.conn.execute(
+                "UPDATE unit_productions SET completed = 1 WHERE id = ? AND completed = 0", (production_id,)
+            ).rowcount
+        if not claimed:
+            return None
+        production = await self.get(production_id)
+        production.completed = False
+        return production
+
+    async def complete(self, production_ids: List[str]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE unit_productions SET completed = 1 WHERE id = ?", [(pid,) for pid in production_ids]
+            )
+
+    async def pending(self, game_id: Optional[str] = None, limit: Optional[int] = None) -> List[UnitProduction]:
+        query = "SELECT doc, completed FROM unit_productions WHERE completed = 0"
+        params: List[Any] = []
+        if game_id is not None:
+            query += " AND game_id = ?"
+            params.append(game_id)
+        query += " ORDER BY end_time LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        return [_production(row) for row in self.conn.execute(query, params)]
+
+    async def delete(self, game_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM unit_productions WHERE game_id = ?", (game_id,))
+
+    async def expire_completed(self, ended_before: datetime) -> int:
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM unit_productions WHERE completed = 1 AND end_time < ?", (_timestamp(ended_before),)
+            ).rowcount
+
+
+def _production(row) -> UnitProduction:
+    # The completed column is authoritative; the document keeps its value at insert
+    production = UnitProduction.model_validate_json(row[0])
+    production.completed = bool(row[1])
+    return production
+
+
+class SQLiteActionRepository(ActionRepository):
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def append(self, actions: List[GameAction]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO game_actions (game_id, seq, doc) VALUES (?, ?, ?)",
+                [(action.game_id, action.seq, action.model_dump_json()) for action in actions]
+            )
+
+    async def read(self, game_id: str, after_seq: int, until_seq: Optional[int] = None) -> List[GameAction]:
+        query = "SELECT doc FROM game_actions WHERE game_id = ? AND seq > ?"
+        params: List[Any] = [game_id, after_seq]
+        if until_seq is not None:
+            query += " AND seq <= ?"
+            params.append(until_seq)
+        query += " ORDER BY seq"
+        return [GameAction.model_validate_json(row[0]) for row in self.conn.execute(query, params)]
+
+    async def delete(self, game_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM game_actions WHERE game_id = ?", (game_id,))
+
+
+class SQLiteSnapshotRepository(SnapshotRepository):
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def append(self, snapshots: List[Dict[str, Any]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO game_snapshots (game_id, seq, created_at, state) VALUES (?, ?, ?, ?)",
+                [(s["game_id"], s["seq"], _timestamp(s["created_at"]), s["state"]) for s in snapshots]
+            )
+
+    async def latest(self, game_id: str, seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = "SELECT game_id, seq, created_at, state FROM game_snapshots WHERE game_id = ?"
+        params: List[Any] = [game_id]
+        if seq is not None:
+            query += " AND seq <= ?"
+            params.append(seq)
+        row = self.conn.execute(query + " ORDER BY seq DESC LIMIT 1", params).fetchone()
+        return _snapshot(row) if row else None
+
+    async def all(self, game_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT game_id, seq, created_at, state FROM game_snapshots WHERE game_id = ? ORDER BY seq", (game_id,)
+        )
+        return [_snapshot(row) for row in rows]
+
+    async def delete(self, game_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM game_snapshots WHERE game_id = ?", (game_id,))
+
+
+def _snapshot(row) -> Dict[str, Any]:
+    return {"game_id": row[0], "seq": row[1], "created_at": datetime.fromisoformat(row[2]), "state": row[3]}
+
+
+class SQLiteArchiveRepository(ArchiveRepository):
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO archived_games (game_id, game_status, player_name, archived_at, data)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (record["game_id"], record["game_status"], record["player_name"],
+                 _timestamp(record["archived_at"]), record["data"])
+            )
+
+    async def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT game_id, game_status, player_name, archived_at, data FROM archived_games WHERE game_id = ?",
+            (game_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "game_id": row[0], "game_status": row[1], "player_name": row[2],
+            "archived_at": datetime.fromisoformat(row[3]), "data": row[4],
+        }
+
+    async def delete(self, game_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM archived_games WHERE game_id = ?", (game_id,))
+
+
+class SQLiteStorage(Storage):
+    """Embedded single-node storage in one SQLite file.
+
+    Statements run on the event loop thread: with WAL and
+    synchronous=NORMAL a commit is a local append without an fsync, which
+    costs less than handing it to a thread. Not shared between processes
+    in a way that supports game ownership; run a single worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.games = SQLiteGameRepository(self.conn)
+        self.productions = SQLiteProductionRepository(self.conn)
+        self.actions = SQLiteActionRepository(self.conn)
+        self.snapshots = SQLiteSnapshotRepository(self.conn)
+        self.archive = SQLiteArchiveRepository(self.conn)
+
+    async def setup(self) -> None:
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    async def close(self) -> None:
+        self.conn.close()
@@ -19,19 +19,15 @@ const GameScreenWithBackend = () => {
   const [gameCreated, setGameCreated] = useState(false);
   const [playerName, setPlayerName] = useState('');
 
-  // Resource generation and AI turn every 3 seconds
+  // Resources and AI are simulated by the server, refresh every 3 seconds
   useEffect(() => {
     if (!gameState || gameState.game_status !== 'playing') return;
 
     const interval = setInterval(async () => {
       try {
-        // Update resources
-        const updatedGame = await GameService.updateResources(gameState.id);
+        const refreshedGame = await GameService.getGame(gameState.id);
         
-        // Execute AI turn
-        const gameWithAI = await GameService.aiTurn(updatedGame.id);
-        
-        setGameState(gameWithAI);
+        setGameState(refreshedGame);
       } catch (error) {
         console.error('Error in game loop:', error);
       }
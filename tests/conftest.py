@@ -0,0 +1,23 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# The backend is run from its own directory and imports its packages
+# (models, services, storage) as top-level modules
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from storage.memory import MemoryStorage  # noqa: E402
+from storage.sqlite import SQLiteStorage  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request):
+    """Each embedded storage backend, empty"""
+    backend = MemoryStorage() if request.param == "memory" else SQLiteStorage(":memory:")
+    asyncio.run(backend.setup())
+    yield backend
+    asyncio.run(backend.close())
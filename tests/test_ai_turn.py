@@ -0,0 +1,87 @@
+import pytest
+
+from models.game import Building, GameState, Player, Unit
+from services import game_rules
+
+
+class AlwaysMove:
+    """Stands in for the AI's random stream: every unit moves"""
+
+    def random(self) -> float:
+        return 0.0
+
+
+def make_game(enemy_health: int) -> GameState:
+    player = Player(
+        id="player1",
+        name="player",
+        resources={},
+        units=[
+            Unit(id=f"p{i}", type="soldier", x=11, y=9 + i, health=100, owner="player")
+            for i in range(3)
+        ],
+        buildings=[],
+    )
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources={},
+        units=[Unit(id="e1", type="soldier", x=10, y=10, health=enemy_health, owner="enemy")],
+        buildings=[],
+    )
+    return GameState(player=player, enemy=enemy)
+
+
+def player_health(game_state: GameState) -> int:
+    return sum(unit.health for unit in game_state.player.units)
+
+
+@pytest.fixture(params=["scalar", "vectorized"])
+def ai_path(request, monkeypatch):
+    if request.param == "vectorized":
+        monkeypatch.setattr(game_rules, "VECTORIZE_MIN_PAIRS", 0)
+    return request.param
+
+
+def test_healthy_unit_attacks(ai_path):
+    game_state = make_game(enemy_health=100)
+    game_rules.ai_turn(game_state, AlwaysMove())
+
+    assert player_health(game_state) < 300
+
+
+def test_wounded_unit_falls_back_from_threat(ai_path):
+    game_state = make_game(enemy_health=20)
+    game_rules.ai_turn(game_state, AlwaysMove())
+
+    unit = game_state.enemy.units[0]
+    assert player_health(game_state) == 300
+    assert unit.x < 10
+    assert game_rules.get_spatial_index(game_state).occupied(unit.x, unit.y)
+
+
+def test_wounded_unit_with_support_fights_on():
+    game_state = make_game(enemy_health=20)
+    for i in range(4):
+        game_state.enemy.add_unit(Unit(id=f"guard{i}", type="knight", x=9, y=9 + i, health=150, owner="enemy"))
+    movers = [True] + [False] * 4
+    game_rules.retreat(game_state, movers)
+
+    assert movers[0]
+    assert (game_state.enemy.units[0].x, game_state.enemy.units[0].y) == (10, 10)
+
+
+@pytest.mark.parametrize("blocker", ["farm", "peasant"])
+def test_wounded_unit_only_falls_back_onto_free_tiles(ai_path, blocker):
+    game_state = make_game(enemy_health=20)
+    # Every tile on the safe side is taken
+    blocked = [(9, 9), (9, 10), (9, 11)]
+    for i, (x, y) in enumerate(blocked):
+        if blocker == "farm":
+            game_state.player.add_building(Building(id=f"farm{i}", type="farm", x=x, y=y, health=200, owner="player"))
+        else:
+            game_state.enemy.add_unit(Unit(id=f"peasant{i}", type="peasant", x=x, y=y, health=5, owner="enemy"))
+    game_rules.ai_turn(game_state, AlwaysMove())
+
+    unit = game_state.enemy.get_unit("e1")
+    assert (unit.x, unit.y) not in blocked
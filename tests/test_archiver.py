@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from services.archiver import ArchivedGame, GameArchiver, decode_archive, encode_archive
+from services.event_store import EventStore
+from services.game_cache import GameStateCache
+from services.game_rules import new_game
+from services.game_service import GameService
+from services.production_scheduler import ProductionScheduler
+
+
+class Leases:
+    """Ownership stand-in: games in `elsewhere` are held by another worker"""
+
+    def __init__(self, *elsewhere):
+        self.elsewhere = set(elsewhere)
+
+    async def ensure(self, game_id):
+        return "http://other" if game_id in self.elsewhere else None
+
+
+def make_service(storage):
+    cache = GameStateCache(storage.games)
+    events = EventStore(storage, snapshot_every=3)
+    scheduler = ProductionScheduler(storage.productions, cache, events)
+    archiver = GameArchiver(storage, cache, scheduler, events, finished_after=0, idle_after=3600)
+    service = GameService(storage, cache, scheduler, events=events, archiver=archiver)
+    return service, cache, scheduler, archiver
+
+
+async def played_game(service, cache):
+    game = await service.create_game("archived")
+    for x in range(1, 6):
+        await service.move_units(game.id, ["unit1"], x, 1)
+    await service.produce_unit(game.id, "building1", "peasant")
+    await cache.flush()
+    return game
+
+
+async def age(storage, cache, game_id, hours):
+    cache.discard(game_id)
+    game_state = await storage.games.get(game_id)
+    game_state.updated_at = datetime.utcnow() - timedelta(hours=hours)
+    await storage.games.save([game_state], {game_id})
+
+
+def test_encoding_round_trip():
+    game_state = new_game("encoded", seed=5)
+    data = encode_archive(ArchivedGame(game=game_state, actions=[], productions=[], snapshots=[
+        {"game_id": game_state.id, "seq": 0, "created_at": datetime(2024, 1, 1), "state": b"\x00\x01"},
+    ]))
+    archived = decode_archive(data)
+
+    assert archived.game.model_dump() == game_state.model_dump()
+    assert archived.snapshots[0]["state"] == b"\x00\x01"
+    assert archived.snapshots[0]["created_at"] == datetime(2024, 1, 1)
+
+
+def test_idle_game_round_trip(storage):
+    async def scenario():
+        service, cache, scheduler, archiver = make_service(storage)
+        game = await played_game(service, cache)
+        live = cache.peek(game.id).model_dump(exclude={"updated_at"})
+        await age(storage, cache, game.id, hours=2)
+
+        assert await archiver.sweep() == 1
+        assert await storage.games.get(game.id) is None
+        assert await storage.actions.read(game.id, -1) == []
+        assert await storage.productions.pending(game.id) == []
+        assert len(scheduler) == 0
+        record = await storage.archive.get(game.id)
+        assert record["game_status"] == "playing"
+
+        # Idle is not over: the game comes back as it was and takes orders
+        restored = await service.get_game(game.id)
+        assert restored.model_dump(exclude={"updated_at"}) == live
+        await service.move_units(game.id, ["unit1"], 1, 2)
+        assert await storage.archive.get(game.id) is None
+        assert len(await storage.productions.pending(game.id)) == 1
+        assert len(scheduler) == 1
+        rebuilt = await service.replay_game(game.id)
+        assert rebuilt.event_seq == restored.event_seq
+
+    asyncio.run(scenario())
+
+
+def test_finished_game_keeps_its_status(storage):
+    async def scenario():
+        service, cache, _, archiver = make_service(storage)
+        game = await played_game(service, cache)
+        game_state = cache.peek(game.id)
+        game_state.game_status = "victory"
+        cache.mark_dirty(game_state)
+        await cache.flush()
+        cache.discard(game.id)
+
+        assert await archiver.sweep() == 1
+        assert (await storage.archive.get(game.id))["game_status"] == "victory"
+        assert (await service.get_game(game.id)).game_status == "victory"
+
+    asyncio.run(scenario())
+
+
+def test_resident_and_recent_games_stay(storage):
+    async def scenario():
+        service, cache, _, archiver = make_service(storage)
+        resident = await played_game(service, cache)
+        recent = await played_game(service, cache)
+        await age(storage, cache, resident.id, hours=2)
+        await cache.get(resident.id)
+        cache.discard(recent.id)
+
+        assert await archiver.sweep() == 0
+        assert await storage.games.get(resident.id) is not None
+        assert await storage.games.get(recent.id) is not None
+
+    asyncio.run(scenario())
+
+
+def test_games_leased_elsewhere_stay(storage):
+    async def scenario():
+        service, cache, _, archiver = make_service(storage)
+        game = await played_game(service, cache)
+        await age(storage, cache, game.id, hours=2)
+        archiver.ownership = Leases(game.id)
+
+        assert not await archiver.archive(game.id)
+        assert await storage.games.get(game.id) is not None
+        archiver.ownership.elsewhere.clear()
+        assert await archiver.archive(game.id)
+
+    asyncio.run(scenario())
+
@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import game_routes
+from services.game_rules import new_game
+from services.game_service import GameService
+
+
+class FailingInserts:
+    """Production repository whose inserts fail"""
+
+    def __init__(self, productions):
+        self.productions = productions
+
+    def __getattr__(self, name):
+        return getattr(self.productions, name)
+
+    async def insert(self, production):
+        raise RuntimeError("write failed")
+
+
+def client_for(storage):
+    app = FastAPI()
+    app.include_router(game_routes.router)
+    app.dependency_overrides[game_routes.get_game_service] = lambda: GameService(storage)
+    return TestClient(app)
+
+
+def stored_game(storage, gold):
+    game_state = new_game("batcher", seed=1)
+    # Enough for one peasant; income adds one gold every three seconds
+    game_state.player.resources["gold"] = gold
+    asyncio.run(storage.games.insert(game_state))
+    return game_state
+
+
+def produce(unit_type="peasant"):
+    return {"action_type": "produce", "building_id": "building1", "unit_type": unit_type}
+
+
+def test_batch_reports_each_command_and_keeps_going(storage):
+    game_state = stored_game(storage, gold=50)
+    commands = [
+        produce(),
+        produce(),
+        produce("knight"),
+        {"action_type": "move", "unit_ids": ["ghost"], "target_x": 3, "target_y": 3},
+        {"action_type": "move", "unit_ids": ["unit1"], "target_x": 3, "target_y": 3},
+    ]
+    response = client_for(storage).post(f"/games/{game_state.id}/commands", json={"commands": commands})
+    assert response.status_code == 200
+    body = response.json()
+
+    results = body["results"]
+    assert [r["ok"] for r in results] == [True, False, False, False, True]
+    assert results[0]["production"]["unit_type"] == "peasant"
+    assert [r["error"] for r in results[1:4]] == [
+        "Insufficient gold", "Building cannot produce this unit", "Units not found"
+    ]
+    # Only the order that went through was paid for and queued
+    assert body["game"]["player"]["resources"]["gold"] == 0
+    pending = asyncio.run(storage.productions.pending(game_state.id))
+    assert [p.id for p in pending] == [results[0]["production"]["id"]]
+
+
+def test_unstored_production_order_costs_nothing(storage):
+    game_state = stored_game(storage, gold=50)
+    storage.productions = FailingInserts(storage.productions)
+    response = client_for(storage).post(f"/games/{game_state.id}/commands", json={"commands": [produce()]})
+    (result,) = response.json()["results"]
+
+    assert result == {"ok": False, "error": "write failed", "production": None}
+    assert asyncio.run(storage.games.get(game_state.id)).player.resources["gold"] == 50
+    assert asyncio.run(storage.actions.read(game_state.id, -1)) == []
@@ -0,0 +1,121 @@
+import asyncio
+import random
+
+import pytest
+
+from models.game import GameAction
+from services.action_log import ActionLog
+from services.event_store import EventStore
+from services.game_cache import GameStateCache
+from services.game_service import GameService
+from services.simulation import SimulationLoop
+from services.production_scheduler import ProductionScheduler
+
+
+def live_state(game_state):
+    return game_state.model_dump(exclude={"updated_at"})
+
+
+def test_rebuild_matches_live_state(storage):
+    async def scenario():
+        cache = GameStateCache(storage.games)
+        events = EventStore(storage, snapshot_every=7)
+        scheduler = ProductionScheduler(storage.productions, cache, events)
+        service = GameService(storage, cache, scheduler, events=events)
+        simulation = SimulationLoop(cache, scheduler, ai_interval=0.2, move_interval=0.1, events=events)
+        game = await service.create_game("replayed")
+        rng = random.Random(3)
+
+        for step in range(60):
+            game_state = cache.peek(game.id)
+            if game_state.game_status != "playing":
+                break
+            try:
+                if step % 5 == 0:
+                    unit = rng.choice(game_state.player.units)
+                    await service.move_units(game.id, [unit.id], rng.randrange(20), rng.randrange(20))
+                elif step % 11 == 0:
+                    await service.produce_unit(game.id, "building1", "peasant")
+            except ValueError:
+                pass
+            await simulation.tick()
+
+        live = cache.peek(game.id)
+        assert live.event_seq > 7
+        rebuilt = await events.rebuild(game.id)
+        assert live_state(rebuilt) == live_state(live)
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_as_of_an_earlier_event(storage):
+    async def scenario():
+        cache = GameStateCache(storage.games)
+        events = EventStore(storage, snapshot_every=2)
+        service = GameService(storage, cache, events=events)
+        game = await service.create_game("replayed")
+
+        await service.move_units(game.id, ["unit1"], 1, 1)
+        before = live_state(cache.peek(game.id))
+        for x in range(2, 5):
+            await service.move_units(game.id, ["unit1"], x, 1)
+
+        assert live_state(await events.rebuild(game.id, 1)) == before
+        with pytest.raises(ValueError):
+            await events.rebuild(game.id, 99)
+
+    asyncio.run(scenario())
+
+
+def test_events_out_of_sequence_are_rejected(storage):
+    async def scenario():
+        events = EventStore(storage)
+        service = GameService(storage, GameStateCache(storage.games), events=events)
+        game = await service.create_game("strict")
+        game_state = await service.get_game(game.id)
+
+        with pytest.raises(ValueError):
+            events.apply(game_state, GameAction(game_id=game.id, action_type="resources", seq=5))
+        assert game_state.event_seq == 0
+
+    asyncio.run(scenario())
+
+
+def test_games_are_stored_after_their_events(storage):
+    async def scenario():
+        # Buffered until flushed; nothing writes it in the background
+        events = EventStore(storage, ActionLog(storage.actions))
+        cache = GameStateCache(storage.games, events=events)
+        service = GameService(storage, cache, events=events)
+        game = await service.create_game("ordered")
+        for x in range(1, 4):
+            await service.move_units(game.id, ["unit1"], x, 1)
+
+        await cache.flush()
+        stored = await storage.games.get(game.id)
+        assert stored.event_seq == 3
+        assert [e.seq for e in await storage.actions.read(game.id, 0)] == [1, 2, 3]
+
+    asyncio.run(scenario())
+
+
+def test_games_behind_their_log_catch_up_on_load(storage):
+    async def scenario():
+        events = EventStore(storage)
+        cache = GameStateCache(storage.games, events=events)
+        service = GameService(storage, cache, events=events)
+        game = await service.create_game("recovered")
+        await service.move_units(game.id, ["unit1"], 1, 1)
+        await cache.flush()
+        # Logged, but the worker died before the game was written again
+        await service.move_units(game.id, ["unit1"], 2, 1)
+        live = live_state(cache.peek(game.id))
+        cache.discard(game.id)
+
+        assert (await storage.games.get(game.id)).event_seq == 1
+        assert live_state(await cache.get(game.id)) == live
+        # The next event follows the log rather than reusing its number
+        await service.move_units(game.id, ["unit1"], 3, 1)
+        assert [e.seq for e in await storage.actions.read(game.id, 0)] == [1, 2, 3]
+
+    asyncio.run(scenario())
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from models.game import GameState, Player
+from services.game_actor import GameActorRegistry
+
+
+class Games:
+    """In-memory load/save pair that records what the actors do"""
+
+    def __init__(self, *games):
+        self.games = {game.id: game for game in games}
+        self.loads = 0
+        self.saves = 0
+        self.fail_save = False
+
+    async def load(self, game_id):
+        self.loads += 1
+        await asyncio.sleep(0)
+        return self.games.get(game_id)
+
+    async def save(self, game_state):
+        self.saves += 1
+        if self.fail_save:
+            raise RuntimeError("save failed")
+
+
+def make_game(name):
+    def side(player_id):
+        return Player(id=player_id, name=name, resources={}, units=[], buildings=[])
+
+    return GameState(player=side("player1"), enemy=side("enemy1"))
+
+
+def appender(log, value, delay=0):
+    async def command(game_state):
+        if delay:
+            await asyncio.sleep(delay)
+        log.append((game_state.id, value))
+        return value
+
+    return command
+
+
+def test_commands_on_one_game_run_in_arrival_order():
+    async def scenario():
+        game = make_game("ordered")
+        games = Games(game)
+        actors = GameActorRegistry(games.load, games.save)
+        log = []
+
+        # Earlier commands are slower, so only the queue keeps them in order
+        results = await asyncio.gather(*(
+            actors.submit(game.id, appender(log, i, delay=0.005 * (5 - i))) for i in range(5)
+        ))
+
+        assert results == list(range(5))
+        assert [value for _, value in log] == list(range(5))
+        await actors.stop()
+
+    asyncio.run(scenario())
+
+
+def test_queued_commands_share_one_load_and_save():
+    async def scenario():
+        game = make_game("batched")
+        games = Games(game)
+        actors = GameActorRegistry(games.load, games.save)
+        log = []
+
+        await asyncio.gather(*(actors.submit(game.id, appender(log, i)) for i in range(10)))
+
+        assert len(log) == 10
+        assert games.loads == games.saves == 1
+        await actors.stop()
+
+    asyncio.run(scenario())
+
+
+def test_games_run_independently():
+    async def scenario():
+        first, second = make_game("first"), make_game("second")
+        games = Games(first, second)
+        actors = GameActorRegistry(games.load, games.save)
+        log = []
+
+        await asyncio.gather(
+            actors.submit(first.id, appender(log, "slow", delay=0.02)),
+            actors.submit(second.id, appender(log, "fast")),
+        )
+
+        assert log == [(second.id, "fast"), (first.id, "slow")]
+        await actors.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failures_reach_their_callers_only():
+    async def scenario():
+        game = make_game("failing")
+        games = Games(game)
+        actors = GameActorRegistry(games.load, games.save)
+
+        async def broken(game_state):
+            raise ValueError("bad command")
+
+        results = await asyncio.gather(
+            actors.submit(game.id, broken),
+            actors.submit(game.id, appender([], "ok")),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], ValueError) and results[1] == "ok"
+
+        with pytest.raises(ValueError, match="Game not found"):
+            await actors.submit("missing", appender([], "lost"))
+
+        games.fail_save = True
+        with pytest.raises(RuntimeError):
+            await actors.submit(game.id, appender([], "unsaved"))
+        await actors.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_refuses_new_commands():
+    async def scenario():
+        game = make_game("stopping")
+        games = Games(game)
+        actors = GameActorRegistry(games.load, games.save)
+        await actors.submit(game.id, appender([], 1))
+        await actors.stop()
+
+        assert len(actors) == 0
+        with pytest.raises(ValueError):
+            await actors.submit(game.id, appender([], 2))
+
+    asyncio.run(scenario())
@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+
+from models.game import GameState, Player
+from services.game_cache import GameStateCache
+from storage.memory import MemoryStorage
+
+
+class FailingOnce:
+    """Game repository whose next save fails, recording every save"""
+
+    def __init__(self, games):
+        self.games = games
+        self.fail_next = False
+        self.saves = []
+
+    def __getattr__(self, name):
+        return getattr(self.games, name)
+
+    async def save(self, games, full_ids=frozenset()):
+        self.saves.append(([g.id for g in games], set(full_ids)))
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("write failed")
+        await self.games.save(games, full_ids)
+
+
+def make_game(name):
+    def side(player_id):
+        return Player(id=player_id, name=name, resources={"gold": 100}, units=[], buildings=[])
+
+    return GameState(player=side("player1"), enemy=side("enemy1"))
+
+
+async def stored(storage, count=1):
+    games = [make_game(f"player{i}") for i in range(count)]
+    for game_state in games:
+        await storage.games.insert(game_state)
+    return games
+
+
+def test_loads_once_and_shares_the_instance(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        cache = GameStateCache(storage.games)
+        first, second = await asyncio.gather(cache.get(game.id), cache.get(game.id))
+        assert first is second
+        assert await cache.get(game.id) is first
+        assert await cache.get("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_flush_writes_dirty_games_once(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        cache = GameStateCache(storage.games)
+        game_state = await cache.get(game.id)
+        game_state.player.resources["gold"] = 7
+        cache.mark_dirty(game_state)
+
+        assert await cache.flush() == 1
+        assert await cache.flush() == 0
+        assert (await storage.games.get(game.id)).player.resources["gold"] == 7
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_retries_with_a_full_rewrite(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        games = FailingOnce(storage.games)
+        cache = GameStateCache(games)
+        game_state = await cache.get(game.id)
+        game_state.player.resources["gold"] = 7
+        cache.mark_dirty(game_state)
+
+        games.fail_next = True
+        with pytest.raises(RuntimeError):
+            await cache.flush()
+        assert await cache.flush() == 1
+
+        assert games.saves == [([game.id], set()), ([game.id], {game.id})]
+        assert (await storage.games.get(game.id)).player.resources["gold"] == 7
+
+    asyncio.run(scenario())
+
+
+def test_evicts_least_recently_used_clean_games(storage):
+    async def scenario():
+        games = await stored(storage, 3)
+        cache = GameStateCache(storage.games, max_games=2)
+        first = await cache.get(games[0].id)
+        await cache.get(games[1].id)
+        cache.mark_dirty(first)
+        await cache.get(games[2].id)
+
+        # The dirty game is the oldest but kept; the next clean one goes
+        assert cache.resident_ids() == [games[0].id, games[2].id]
+        # Once flushed it is clean and, as the least recently used, next
+        await cache.flush()
+        await cache.get(games[1].id)
+        assert cache.resident_ids() == [games[2].id, games[1].id]
+
+    asyncio.run(scenario())
+
+
+def test_evicts_expired_games(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        cache = GameStateCache(storage.games, ttl_seconds=0)
+        await cache.get(game.id)
+        await cache.flush()
+        assert game.id not in cache
+
+    asyncio.run(scenario())
+
+
+def test_pinned_games_outlive_their_ttl(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        cache = GameStateCache(storage.games, ttl_seconds=0)
+        # Pinned before it is loaded, or the load would already expire it
+        cache.pin(game.id)
+        cache.pin(game.id)
+        await cache.get(game.id)
+
+        await cache.flush()
+        assert game.id in cache
+        cache.unpin(game.id)
+        await cache.flush()
+        assert game.id in cache
+        cache.unpin(game.id)
+        await cache.flush()
+        assert game.id not in cache
+
+    asyncio.run(scenario())
+
+
+def test_flush_skips_games_owned_elsewhere(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        owned = set()
+        cache = GameStateCache(storage.games, owns=owned.__contains__)
+        game_state = await cache.get(game.id)
+        game_state.player.resources["gold"] = 7
+        cache.mark_dirty(game_state)
+
+        assert await cache.flush() == 0
+        assert (await storage.games.get(game.id)).player.resources["gold"] != 7
+        owned.add(game.id)
+        assert await cache.flush() == 1
+        assert (await storage.games.get(game.id)).player.resources["gold"] == 7
+
+    asyncio.run(scenario())
+
+
+def test_legacy_game_keeps_its_defaulted_seed():
+    async def scenario():
+        storage = MemoryStorage()
+        (game,) = await stored(storage)
+        # Stored before games had a seed or an event number
+        del storage.games._docs[game.id]["seed"]
+        del storage.games._docs[game.id]["event_seq"]
+
+        cache = GameStateCache(storage.games)
+        seed = (await cache.get(game.id)).seed
+        assert await cache.flush() == 1
+        cache.discard(game.id)
+        assert (await cache.get(game.id)).seed == seed
+
+    asyncio.run(scenario())
+
+
+def test_run_unloaded_skips_resident_games(storage):
+    async def scenario():
+        (game,) = await stored(storage)
+        cache = GameStateCache(storage.games)
+
+        async def task():
+            return "ran"
+
+        assert await cache.run_unloaded(game.id, task) == "ran"
+        await cache.get(game.id)
+        assert await cache.run_unloaded(game.id, task) is None
+
+    asyncio.run(scenario())
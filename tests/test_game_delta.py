@@ -0,0 +1,83 @@
+from models.game import Building, GameState, Player, Unit
+from services.game_delta import build_update_operations, full_replace_operation
+
+
+def clean_game():
+    player = Player(
+        id="player1",
+        name="delta",
+        resources={"gold": 100},
+        units=[Unit(id="unit1", type="peasant", x=5, y=5, health=50, owner="player")],
+        buildings=[],
+    )
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources={"gold": 100},
+        units=[Unit(id="enemy_unit1", type="soldier", x=15, y=15, health=100, owner="enemy")],
+        buildings=[],
+    )
+    game_state = GameState(player=player, enemy=enemy)
+    game_state.mark_clean()
+    return game_state
+
+
+def test_clean_game_has_no_operations():
+    assert build_update_operations(clean_game()) == []
+
+
+def test_changed_scalars_and_entities_are_set_in_place():
+    game_state = clean_game()
+    game_state.game_status = "paused"
+    game_state.player.resources["gold"] = 42
+    game_state.player.units[0].x = 9
+
+    (operation,) = build_update_operations(game_state)
+
+    assert operation._filter == {"id": game_state.id}
+    assert operation._doc == {"$set": {
+        "game_status": "paused",
+        "player.resources.gold": 42,
+        "player.units.$[e0].x": 9,
+    }}
+    assert operation._array_filters == [{"e0.id": "unit1"}]
+
+
+def test_added_and_removed_entities_are_separate_stages():
+    game_state = clean_game()
+    game_state.enemy.units = [u for u in game_state.enemy.units if u.id != "enemy_unit1"]
+    farm = Building(id="farm1", type="farm", x=1, y=1, health=200, owner="player")
+    game_state.player.add_building(farm)
+
+    pull, push = build_update_operations(game_state)
+
+    assert pull._doc == {"$pull": {"enemy.units": {"id": {"$in": ["enemy_unit1"]}}}}
+    assert push._doc == {"$push": {"player.buildings": {"$each": [farm.model_dump()]}}}
+
+
+def test_replaced_player_is_written_whole():
+    game_state = clean_game()
+    game_state.enemy = game_state.enemy.model_copy(update={"units": []})
+
+    (operation,) = build_update_operations(game_state)
+
+    assert operation._doc["$set"]["enemy"]["units"] == []
+
+
+def test_new_units_are_pushed_not_set():
+    game_state = clean_game()
+    unit = Unit(id="unit9", type="peasant", x=2, y=2, health=50, owner="player")
+    game_state.player.add_unit(unit)
+
+    (operation,) = build_update_operations(game_state)
+
+    assert operation._doc == {"$push": {"player.units": {"$each": [unit.model_dump()]}}}
+
+
+def test_full_replace_upserts_the_whole_document():
+    game_state = clean_game()
+    operation = full_replace_operation(game_state)
+
+    assert operation._filter == {"id": game_state.id}
+    assert operation._doc == game_state.model_dump()
+    assert operation._upsert
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from services.game_cache import GameStateCache
+from services.game_ownership import GameOwnership
+from services.game_rules import new_game
+from storage.mongo import MongoStorage
+
+
+async def workers(*names):
+    db = AsyncMongoMockClient()["rts"]
+    storage = MongoStorage(db)
+    await storage.setup()
+    cache = GameStateCache(storage.games)
+    return storage, [GameOwnership(db, cache, worker_id=name, worker_url=f"http://{name}") for name in names]
+
+
+def test_only_stored_games_are_leased():
+    async def scenario():
+        storage, (first, second) = await workers("first", "second")
+        live = new_game("live")
+        await storage.games.insert(live)
+        await storage.archive.put({"game_id": "archived", "game_status": "playing", "player_name": "p",
+                                   "archived_at": datetime.utcnow(), "data": b""})
+
+        assert await first.ensure(live.id) is None
+        assert await second.ensure(live.id) == "http://first"
+        assert await second.ensure("archived") is None
+        assert second.owns("archived")
+
+        # Made-up ids run here and fail there, without leaving a lease behind
+        assert await first.ensure("missing") is None
+        assert not first.owns("missing")
+        assert await storage.db.game_leases.count_documents({"game_id": "missing"}) == 0
+
+    asyncio.run(scenario())
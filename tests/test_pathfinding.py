@@ -0,0 +1,118 @@
+import pytest
+
+from models.game import Building, GameState, Player, Unit
+from services.game_rules import apply_moves, build_building, move_units, plan_moves
+from services.pathfinding import get_navigator
+from services.spatial_index import get_spatial_index
+
+
+def make_game():
+    player = Player(
+        id="player1",
+        name="navigator",
+        resources={"gold": 1000, "wood": 1000},
+        units=[Unit(id="unit1", type="peasant", x=5, y=5, health=50, owner="player")],
+        buildings=[Building(id="building1", type="town_hall", x=5, y=6, health=500, owner="player")],
+    )
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources={},
+        units=[],
+        buildings=[Building(id="enemy_building1", type="town_hall", x=15, y=16, health=500, owner="enemy")],
+    )
+    return GameState(player=player, enemy=enemy)
+
+
+def targets(game_state):
+    return [(u.target_x, u.target_y) for u in game_state.player.units]
+
+
+def run_moves(game_state, ticks=100):
+    for _ in range(ticks):
+        moves = plan_moves(game_state)
+        if not moves:
+            return
+        apply_moves(game_state, moves)
+    raise AssertionError("units never arrived")
+
+
+def with_soldiers(count):
+    game_state = make_game()
+    index = get_spatial_index(game_state)
+    for i in range(count):
+        unit = Unit(id=f"s{i}", type="soldier", x=1 + i % 4, y=1 + i // 4, health=100, owner="player")
+        game_state.player.add_unit(unit)
+        index.add("player", "units", unit)
+    return game_state
+
+
+def test_single_unit_walks_around_buildings():
+    game_state = make_game()
+    # The town hall at (5, 6) stands between unit1 and the goal
+    move_units(game_state, ["unit1"], 5, 8)
+    run_moves(game_state)
+
+    unit = game_state.player.get_unit("unit1")
+    assert (unit.x, unit.y) == (5, 8)
+    assert unit.target_x is None
+
+
+def test_group_spreads_over_free_tiles():
+    game_state = with_soldiers(8)
+    unit_ids = [u.id for u in game_state.player.units]
+    move_units(game_state, unit_ids, 10, 10)
+    run_moves(game_state)
+
+    tiles = [(u.x, u.y) for u in game_state.player.units]
+    assert len(set(tiles)) == len(tiles)
+    assert (10, 10) in tiles
+    assert all(max(abs(x - 10), abs(y - 10)) <= 2 for x, y in tiles)
+
+
+def test_building_goal_becomes_the_tiles_around_it():
+    game_state = with_soldiers(4)
+    # The enemy town hall
+    move_units(game_state, ["s0", "s1", "s2", "s3"], 15, 16)
+    run_moves(game_state)
+
+    buildings = {(b.x, b.y) for side in (game_state.player, game_state.enemy) for b in side.buildings}
+    tiles = [(u.x, u.y) for u in game_state.player.units if u.id.startswith("s")]
+    assert len(set(tiles)) == 4
+    assert not buildings & set(tiles)
+    assert all(max(abs(x - 15), abs(y - 16)) <= 2 for x, y in tiles)
+
+
+def test_orders_off_the_map_are_rejected():
+    game_state = make_game()
+    with pytest.raises(ValueError):
+        move_units(game_state, ["unit1"], 20, 3)
+
+
+@pytest.mark.parametrize("unit_ids", [[], ["ghost"], ["enemy_unit1"]])
+def test_orders_without_own_units_are_rejected(unit_ids):
+    game_state = make_game()
+    with pytest.raises(ValueError, match="Units not found"):
+        move_units(game_state, unit_ids, 10, 10)
+
+
+def test_assignment_does_not_depend_on_id_order():
+    first, second = with_soldiers(6), with_soldiers(6)
+    move_units(first, [f"s{i}" for i in range(6)], 12, 12)
+    move_units(second, [f"s{i}" for i in reversed(range(6))], 12, 12)
+
+    assert targets(first) == targets(second)
+
+
+def test_new_buildings_reroute_moving_units():
+    game_state = make_game()
+    move_units(game_state, ["unit1"], 5, 12)
+    navigator = get_navigator(game_state)
+    path = list(navigator._paths["unit1"])
+
+    x, y = path[2]
+    build_building(game_state, "farm", x, y)
+    run_moves(game_state)
+
+    unit = game_state.player.get_unit("unit1")
+    assert (unit.x, unit.y) == (5, 12)
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from services.event_store import EventStore
+from services.game_cache import GameStateCache
+from services.game_service import GameService
+from services.production_scheduler import ProductionScheduler
+
+
+def make_service(storage):
+    cache = GameStateCache(storage.games)
+    events = EventStore(storage)
+    scheduler = ProductionScheduler(storage.productions, cache, events)
+    return GameService(storage, cache, scheduler, events=events), scheduler
+
+
+def test_orders_on_one_building_queue_behind_each_other(storage):
+    async def scenario():
+        service, scheduler = make_service(storage)
+        game = await service.create_game("producer")
+        first = await service.produce_unit(game.id, "building1", "peasant")
+        second = await service.produce_unit(game.id, "building1", "peasant")
+
+        assert second.start_time == first.end_time
+        assert len(scheduler) == 2
+
+    asyncio.run(scenario())
+
+
+def test_complete_due_spawns_units_and_marks_rows(storage):
+    async def scenario():
+        service, scheduler = make_service(storage)
+        game = await service.create_game("producer")
+        first = await service.produce_unit(game.id, "building1", "peasant")
+        await service.produce_unit(game.id, "building1", "peasant")
+
+        assert await scheduler.complete_due(first.end_time) == 1
+        game_state = await service.get_game(game.id)
+        assert len(game_state.player.units) == 4
+        assert [p.id for p in await storage.productions.pending(game.id)] != [first.id]
+        assert (await storage.productions.get(first.id)).completed
+
+        assert await scheduler.complete_due(first.end_time + timedelta(hours=1)) == 1
+        assert len(game_state.player.units) == 5
+        assert await storage.productions.pending(game.id) == []
+
+    asyncio.run(scenario())
+
+
+def test_rehydrate_reloads_pending_rows(storage):
+    async def scenario():
+        service, _ = make_service(storage)
+        game = await service.create_game("producer")
+        other = await service.create_game("other")
+        await service.produce_unit(game.id, "building1", "peasant")
+        await service.produce_unit(other.id, "building1", "peasant")
+
+        # A restarted worker, or one that just took over a game
+        _, scheduler = make_service(storage)
+        assert await scheduler.rehydrate(game.id) == 1
+        assert await scheduler.rehydrate() == 1
+        assert await scheduler.rehydrate() == 0
+
+        scheduler.forget_game(other.id)
+        assert len(scheduler) == 1
+        assert await scheduler.complete_due(datetime.utcnow() + timedelta(hours=1)) == 1
+
+    asyncio.run(scenario())
+
+
+def test_production_of_a_destroyed_building_is_dropped(storage):
+    async def scenario():
+        service, scheduler = make_service(storage)
+        game = await service.create_game("producer")
+        production = await service.produce_unit(game.id, "building1", "peasant")
+        game_state = await service.get_game(game.id)
+        game_state.player.buildings = []
+
+        assert await scheduler.complete_due(production.end_time) == 0
+        assert len(game_state.player.units) == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import asyncio
+
+from services.event_store import EventStore
+from services.game_cache import GameStateCache
+from services.game_service import GameService
+from services.production_scheduler import ProductionScheduler
+from services.simulation import SimulationLoop
+
+
+def make_loop(storage, owns=None):
+    cache = GameStateCache(storage.games)
+    events = EventStore(storage)
+    scheduler = ProductionScheduler(storage.productions, cache, events)
+    service = GameService(storage, cache, scheduler, events=events)
+    simulation = SimulationLoop(cache, scheduler, ai_interval=0.1, move_interval=0.1, events=events, owns=owns)
+    return service, cache, simulation
+
+
+def test_ticks_advance_playing_games(storage):
+    async def scenario():
+        service, cache, simulation = make_loop(storage)
+        game = await service.create_game("simulated")
+        await service.move_units(game.id, ["unit1"], 1, 1)
+        seq = cache.peek(game.id).event_seq
+
+        for _ in range(5):
+            await simulation.tick()
+        game_state = cache.peek(game.id)
+        assert game_state.event_seq > seq
+        assert (game_state.player.units[0].x, game_state.player.units[0].y) != (5, 5)
+
+    asyncio.run(scenario())
+
+
+def test_ticks_skip_games_not_playing(storage):
+    async def scenario():
+        service, cache, simulation = make_loop(storage)
+        game = await service.create_game("paused")
+        game_state = cache.peek(game.id)
+        game_state.game_status = "paused"
+        seq = game_state.event_seq
+
+        for _ in range(5):
+            await simulation.tick()
+        assert game_state.event_seq == seq
+
+    asyncio.run(scenario())
+
+
+def test_ticks_leave_games_owned_elsewhere_alone(storage):
+    async def scenario():
+        owned = set()
+        service, cache, simulation = make_loop(storage, owns=owned.__contains__)
+        game = await service.create_game("fenced")
+        await service.move_units(game.id, ["unit1"], 1, 1)
+        seq = cache.peek(game.id).event_seq
+
+        for _ in range(5):
+            await simulation.tick()
+        assert cache.peek(game.id).event_seq == seq
+
+        owned.add(game.id)
+        await simulation.tick()
+        assert cache.peek(game.id).event_seq > seq
+
+    asyncio.run(scenario())
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import timedelta
+
+from models.game import GameState, Player, Unit
+from services.game_cache import GameStateCache
+from services.spatial_index import get_spatial_index
+from services.state_stream import StateStreamHub, decode
+
+
+def make_game():
+    player = Player(
+        id="player1",
+        name="watched",
+        resources={"gold": 100},
+        units=[Unit(id="unit1", type="peasant", x=5, y=5, health=50, owner="player")],
+        buildings=[],
+    )
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources={"gold": 100},
+        units=[Unit(id="enemy_unit1", type="soldier", x=6, y=6, health=100, owner="enemy")],
+        buildings=[],
+    )
+    return GameState(player=player, enemy=enemy)
+
+
+def watched(ttl_seconds=600.0, **hub_options):
+    game_state = make_game()
+    cache = GameStateCache(None, ttl_seconds=ttl_seconds)
+    hub = StateStreamHub(cache, **hub_options)
+    subscription = hub.subscribe(game_state)
+    cache.put(game_state, dirty=False)
+    return game_state, hub, subscription
+
+
+def drain(subscription):
+    frames = []
+    while not subscription.queue.empty():
+        frames.append(decode(subscription.queue.get_nowait()))
+    return frames
+
+
+def changed(game_state):
+    game_state.updated_at = game_state.updated_at + timedelta(seconds=1)
+
+
+def test_subscribers_start_from_a_snapshot():
+    game_state, _, subscription = watched()
+    (frame,) = drain(subscription)
+
+    assert frame["t"] == "s"
+    assert frame["res"]["player"] == {"gold": 100}
+    assert frame["ent"]["pu"] == [["unit1", "peasant", 5, 5, 50]]
+    assert frame["ent"]["eu"] == [["enemy_unit1", "soldier", 6, 6, 100]]
+
+
+def test_ticks_send_only_what_changed():
+    async def scenario():
+        game_state, hub, subscription = watched()
+        drain(subscription)
+
+        # Mutations go through the spatial index, like the game rules
+        index = get_spatial_index(game_state)
+        index.move("player", "units", game_state.player.units[0], 6, 5)
+        enemy = game_state.enemy.units[0]
+        game_state.enemy.units = []
+        index.remove("enemy", "units", enemy)
+        changed(game_state)
+        await hub.publish_tick(1)
+        (frame,) = drain(subscription)
+
+        assert frame["t"] == "d"
+        assert frame["up"] == {"pu": [["unit1", "peasant", 6, 5, 50]]}
+        assert frame["rm"] == ["enemy_unit1"]
+        assert "res" not in frame and "status" not in frame
+
+        # Nothing moved since the last frame
+        await hub.publish_tick(2)
+        assert drain(subscription) == []
+
+    asyncio.run(scenario())
+
+
+def test_periodic_snapshots_resync():
+    async def scenario():
+        game_state, hub, subscription = watched(snapshot_every=3)
+        drain(subscription)
+
+        for tick in range(1, 4):
+            await hub.publish_tick(tick)
+        assert [frame["t"] for frame in drain(subscription)] == ["s"]
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscribers_get_a_fresh_snapshot():
+    async def scenario():
+        game_state, hub, subscription = watched(max_pending=2)
+
+        # The snapshot and one diff fill the queue, the next diff overflows it
+        for tick in range(1, 3):
+            game_state.player.resources["gold"] += 1
+            changed(game_state)
+            await hub.publish_tick(tick)
+        (frame,) = drain(subscription)
+
+        assert frame["t"] == "s"
+        assert frame["res"]["player"] == {"gold": 102}
+
+    asyncio.run(scenario())
+
+
+def test_damage_is_sent_once_touched():
+    async def scenario():
+        game_state, hub, subscription = watched()
+        drain(subscription)
+
+        unit = game_state.player.units[0]
+        unit.health = 20
+        get_spatial_index(game_state).touch("player", "units", unit)
+        changed(game_state)
+        await hub.publish_tick(1)
+        (frame,) = drain(subscription)
+
+        assert frame["up"] == {"pu": [["unit1", "peasant", 5, 5, 20]]}
+
+    asyncio.run(scenario())
+
+
+def test_watched_games_stay_resident_until_the_last_subscriber_leaves():
+    async def scenario():
+        game_state, hub, first = watched(ttl_seconds=0)
+        second = hub.subscribe(game_state)
+        drain(first)
+
+        # Nobody reads the game, only the stream peeks at it
+        await hub.cache.flush()
+        game_state.player.resources["gold"] = 7
+        changed(game_state)
+        await hub.publish_tick(1)
+        assert drain(first)[0]["res"]["player"] == {"gold": 7}
+
+        hub.unsubscribe(first)
+        await hub.cache.flush()
+        assert game_state.id in hub.cache
+        hub.unsubscribe(second)
+        await hub.cache.flush()
+        assert game_state.id not in hub.cache
+
+    asyncio.run(scenario())
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.game import GameAction, UnitProduction
+from services.game_rules import new_game
+from services.game_service import GameService
+
+START = datetime(2024, 1, 1)
+
+
+async def insert_games(storage, count, status="playing", same_time=False):
+    games = []
+    for i in range(count):
+        game_state = new_game(f"player{i}", seed=i)
+        game_state.game_status = status
+        game_state.updated_at = START if same_time else START + timedelta(minutes=i)
+        await storage.games.insert(game_state)
+        games.append(game_state)
+    return games
+
+
+def test_summaries_page_newest_first_without_gaps(storage):
+    async def scenario():
+        games = await insert_games(storage, 5) + await insert_games(storage, 4, same_time=True)
+        # Newest first, ids break the tie between games updated together
+        expected = [g.id for g in sorted(games, key=lambda g: (g.updated_at, g.id), reverse=True)]
+
+        seen, after = [], None
+        while True:
+            page = await storage.games.summaries(2, after)
+            if not page:
+                break
+            seen += [s.id for s in page]
+            after = (page[-1].updated_at, page[-1].id)
+        assert seen == expected
+
+    asyncio.run(scenario())
+
+
+def test_summary_cursor_round_trip(storage):
+    async def scenario():
+        games = await insert_games(storage, 5)
+        service = GameService(storage)
+
+        first = await service.list_game_summaries(limit=3)
+        second = await service.list_game_summaries(limit=3, cursor=first.next_cursor)
+
+        ids = [s.id for s in first.games + second.games]
+        assert ids == [g.id for g in reversed(games)]
+        assert second.next_cursor is None
+        assert first.games[0].player_name == "player4"
+        with pytest.raises(ValueError):
+            await service.list_game_summaries(cursor="not-a-cursor")
+
+    asyncio.run(scenario())
+
+
+def test_archivable_picks_finished_and_idle_games(storage):
+    async def scenario():
+        playing = await insert_games(storage, 3)
+        finished = await insert_games(storage, 3, status="victory")
+
+        # Finished before minute 2, or idle since before minute 1
+        ids = await storage.games.archivable(
+            ("victory", "defeat"), START + timedelta(minutes=2), START + timedelta(minutes=1), 10
+        )
+        assert set(ids) == {playing[0].id, finished[0].id, finished[1].id}
+        assert len(await storage.games.archivable(("victory",), START + timedelta(hours=1), START, 2)) == 2
+
+    asyncio.run(scenario())
+
+
+def test_delete_removes_every_record_of_a_game(storage):
+    async def scenario():
+        game, other = await insert_games(storage, 2)
+        for game_state in (game, other):
+            await storage.actions.append([GameAction(game_id=game_state.id, action_type="resources", seq=1)])
+            await storage.snapshots.append([
+                {"game_id": game_state.id, "seq": 0, "created_at": START, "state": b"state"}
+            ])
+            await storage.productions.insert(UnitProduction(
+                game_id=game_state.id, building_id="building1", unit_type="peasant",
+                start_time=START, end_time=START
+            ))
+
+        await storage.games.delete(game.id)
+        await storage.actions.delete(game.id)
+        await storage.snapshots.delete(game.id)
+        await storage.productions.delete(game.id)
+
+        assert await storage.games.get(game.id) is None
+        assert await storage.actions.read(game.id, -1) == []
+        assert await storage.snapshots.all(game.id) == []
+        assert await storage.productions.pending(game.id) == []
+        assert await storage.games.get(other.id) is not None
+        assert len(await storage.actions.read(other.id, -1)) == 1
+        assert len(await storage.snapshots.all(other.id)) == 1
+        assert len(await storage.productions.pending(other.id)) == 1
+
+    asyncio.run(scenario())
+
+
+def test_completed_productions_expire_after_they_ended(storage):
+    async def scenario():
+        productions = [
+            UnitProduction(game_id="g", building_id="b", unit_type="peasant",
+                           start_time=START, end_time=START + timedelta(hours=i))
+            for i in range(3)
+        ]
+        for production in productions:
+            await storage.productions.insert(production)
+        await storage.productions.complete([productions[0].id, productions[2].id])
+
+        assert await storage.productions.expire_completed(START + timedelta(hours=1)) == 1
+        assert await storage.productions.get(productions[0].id) is None
+        assert await storage.productions.get(productions[1].id) is not None
+        assert await storage.productions.get(productions[2].id) is not None
+
+    asyncio.run(scenario())
+
+
+def test_archive_records(storage):
+    async def scenario():
+        record = {"game_id": "g", "game_status": "victory", "player_name": "p",
+                  "archived_at": START, "data": b"\x00compressed"}
+        await storage.archive.put(record)
+        await storage.archive.put({**record, "data": b"replaced"})
+
+        assert (await storage.archive.get("g"))["data"] == b"replaced"
+        await storage.archive.delete("g")
+        assert await storage.archive.get("g") is None
+
+    asyncio.run(scenario())
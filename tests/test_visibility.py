@@ -0,0 +1,81 @@
+from models.game import GameState, Player, Unit, Building
+from services.spatial_index import get_spatial_index
+from services.visibility import get_visibility, visible_state
+
+
+def make_game() -> GameState:
+    player = Player(
+        id="player1",
+        name="player",
+        resources={"gold": 100},
+        # Soldier sight is 3 tiles
+        units=[Unit(id="scout", type="soldier", x=2, y=2, health=100, owner="player")],
+        buildings=[],
+    )
+    enemy = Player(
+        id="enemy1",
+        name="IA",
+        resources={"gold": 999},
+        units=[
+            Unit(id="near", type="soldier", x=5, y=5, health=100, owner="enemy"),
+            Unit(id="far", type="soldier", x=15, y=15, health=100, owner="enemy"),
+        ],
+        buildings=[Building(id="hall", type="town_hall", x=17, y=17, health=500, owner="enemy")],
+    )
+    return GameState(player=player, enemy=enemy)
+
+
+def enemy_ids(game_state: GameState):
+    view = visible_state(game_state).enemy
+    return {e.id for e in view.units} | {e.id for e in view.buildings}
+
+
+def test_only_enemies_in_sight_are_visible():
+    game_state = make_game()
+    view = visible_state(game_state)
+
+    assert enemy_ids(game_state) == {"near"}
+    assert view.enemy.resources == {}
+    # The live game is untouched
+    assert len(game_state.enemy.units) == 2 and game_state.enemy.resources["gold"] == 999
+
+
+def test_sight_follows_moves():
+    game_state = make_game()
+    index = get_spatial_index(game_state)
+    version = get_visibility(game_state).version
+
+    index.move("player", "units", game_state.player.units[0], 13, 13)
+    assert enemy_ids(game_state) == {"far"}
+    assert get_visibility(game_state).version > version
+
+    index.move("enemy", "units", game_state.enemy.units[1], 0, 0)
+    assert enemy_ids(game_state) == set()
+
+
+def test_spawns_and_deaths_update_the_view():
+    game_state = make_game()
+    index = get_spatial_index(game_state)
+    assert enemy_ids(game_state) == {"near"}
+
+    tower = Building(id="tower", type="farm", x=16, y=16, health=200, owner="player")
+    game_state.player.add_building(tower)
+    index.add("player", "buildings", tower)
+    assert enemy_ids(game_state) == {"near", "far", "hall"}
+
+    near = game_state.enemy.units[0]
+    game_state.enemy.units = game_state.enemy.units[1:]
+    index.remove("enemy", "units", near)
+    assert enemy_ids(game_state) == {"far", "hall"}
+
+
+def test_view_is_reused_until_sight_changes():
+    game_state = make_game()
+    visibility = get_visibility(game_state)
+    first = visibility.enemy_view(game_state.enemy)
+
+    # Damage changes no sight: same view, live entities
+    game_state.enemy.units[0].health = 10
+    get_spatial_index(game_state).touch("enemy", "units", game_state.enemy.units[0])
+    assert get_visibility(game_state).enemy_view(game_state.enemy) is first
+    assert first.units[0].health == 10